@@ -0,0 +1,119 @@
+from is_msgs.image_pb2 import Image
+from typing import Callable, Dict, List
+import numpy as np
+import argparse
+import platform
+import glob
+import json
+import time
+import sys
+import os
+import cv2
+
+# Make the service modules importable when running from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+from classes import Detector
+from functions import to_np, to_image
+
+
+def benchmark(name: str, fn: Callable, inputs: List, warmup: int, repeat: int) -> Dict[str, float]:
+    """Times a function over a list of inputs and summarizes the latencies.
+
+    Args:
+        name (str): Name of the stage being measured, used in the printed summary.
+        fn (Callable): Function called with each input.
+        inputs (List): Inputs, cycled until `warmup + repeat` calls were made.
+        warmup (int): Number of untimed calls made first.
+        repeat (int): Number of timed calls.
+
+    Returns:
+        Dict[str, float]: Number of samples, mean, p50, p95 and p99 latency in
+            milliseconds, and the corresponding throughput in frames per second.
+    """
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+    latencies = np.empty(repeat)
+    for i in range(repeat):
+        value = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(value)
+        latencies[i] = time.perf_counter() - start
+    latencies *= 1000.0
+    stats = {
+        "samples": repeat,
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "fps": float(1000.0 / latencies.mean()),
+    }
+    print(
+        f"{name:<20} p50={stats['p50_ms']:8.2f} ms  p95={stats['p95_ms']:8.2f} ms  "
+        f"p99={stats['p99_ms']:8.2f} ms  fps={stats['fps']:8.1f}"
+    )
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the detection Detector on recorded frames.")
+    parser.add_argument("frames", help="Directory with the recorded JPEG frames")
+    parser.add_argument("--model", default="models/detection_model.pt", help="Model to load")
+    parser.add_argument("--backend", default="ultralytics", choices=["ultralytics", "onnxruntime", "openvino"])
+    parser.add_argument("--device", default="cuda", help="Device of the ultralytics backend")
+    parser.add_argument("--imgsz", type=int, default=640, help="Inference image size")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed iterations per stage")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed iterations per stage")
+    parser.add_argument("--output", default=None, help="JSON file where the results are written")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.frames, "*.jpg")) + glob.glob(os.path.join(args.frames, "*.jpeg")))
+    if not paths:
+        sys.exit(f"No JPEG frames found in {args.frames}")
+    encoded = []
+    for path in paths:
+        with open(path, "rb") as f:
+            encoded.append(Image(data=f.read()))
+
+    detector = Detector(args.model, device=args.device, imgsz=args.imgsz, backend=args.backend)
+    decoded = [to_np(image) for image in encoded]
+    results = [detector.predict(img) for img in decoded]
+    result_dicts = [detector.results_to_dict(result) for result in results]
+    with_boxes = [result_dict for result_dict in result_dicts if result_dict["boxes"]]
+
+    stages = {
+        "to_np": benchmark("to_np", to_np, encoded, args.warmup, args.repeat),
+        "to_np_reduced": benchmark(
+            "to_np_reduced", lambda image: to_np(image, args.imgsz), encoded, args.warmup, args.repeat
+        ),
+        "predict": benchmark("predict", detector.predict, decoded, args.warmup, args.repeat),
+        "results_to_dict": benchmark("results_to_dict", detector.results_to_dict, results, args.warmup, args.repeat),
+        "to_image": benchmark("to_image", to_image, decoded, args.warmup, args.repeat),
+    }
+    if with_boxes:
+        stages["dict_to_obj_annot"] = benchmark(
+            "dict_to_obj_annot", detector.dict_to_obj_annot, with_boxes, args.warmup, args.repeat
+        )
+
+    report = {
+        "service": "is-tiffany-detection",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": platform.node(),
+        "config": {
+            "model": args.model,
+            "backend": args.backend,
+            "device": args.device,
+            "imgsz": args.imgsz,
+            "frames": len(paths),
+            "resolution": list(decoded[0].shape[1::-1]),
+            "opencv": cv2.__version__,
+        },
+        "stages": stages,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+from google.protobuf.wrappers_pb2 import FloatValue
+from is_wire.core import StatusCode, Status, Subscription
+from opencensus.trace.blank_span import BlankSpan
+from is_msgs.image_pb2 import ObjectAnnotations
+from amqp.exceptions import UnexpectedFrame
+from .StreamChannel import StreamChannel
+from .Connection import Connection
+from .AnnotationsPublisher import AnnotationsPublisher
+from .Threading import Threading
+from .Detector import Detector
+from .Metrics import Metrics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import threading
+import time
+
+
+class BatchDetection:
+    """Serves several cameras from a single detection loop and a single model.
+
+    Instead of running one detection thread (and one model copy) per camera,
+    this class subscribes to the frames of every camera on one channel, collects
+    the latest frame of each, runs one batched `Detector.predict_batch` call and
+    splits the results back into the per-camera `Threading` instances, which keep
+    serving their own `Tiffany.Detection.{id}.*` endpoints.
+
+    Attributes:
+        cameras (Dict[int, Threading]): Per-camera state and RPC handlers, keyed by camera ID.
+        detection_event (threading.Event): Set while the batched detection loop is running.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        detector: Detector,
+        camera_ids: List[int],
+        motion_threshold: float = 0.0,
+        motion_max_skips: int = 30,
+        stream_fps: float = 15.0,
+        stream_budget: Optional[float] = None,
+        encoder_workers: int = 2,
+        metrics: Optional[Metrics] = None
+    ):
+        """Initializes the batched detection manager.
+
+        Args:
+            connection (Connection): Manages the broker connection.
+            detector (Detector): Responsible for running predictions, shared by all cameras.
+            camera_ids (List[int]): IDs of the cameras served by this process.
+            motion_threshold (float): Motion gate threshold of every camera (see `Threading`).
+                Static cameras are left out of the batch. Disabled when 0.
+            motion_max_skips (int): Maximum number of consecutive frames reusing a detection.
+            stream_fps (float): Maximum rate of the annotated stream of every camera. No cap when 0.
+            stream_budget (Optional[float]): Target bytes per second of each camera's annotated stream.
+            encoder_workers (int): Number of threads encoding the annotated frames of all cameras.
+            metrics (Optional[Metrics]): Registry shared by the batched loop and every camera.
+        """
+        self.connection = connection
+        self.log = connection.log
+        self.detector = detector
+        self.detection_event = threading.Event()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.encoder_pool = ThreadPoolExecutor(max_workers=encoder_workers, thread_name_prefix="FrameEncoder")
+        self.cameras: Dict[int, Threading] = {
+            camera_id: Threading(
+                connection,
+                detector,
+                camera_id,
+                batch=self,
+                motion_threshold=motion_threshold,
+                motion_max_skips=motion_max_skips,
+                stream_fps=stream_fps,
+                stream_budget=stream_budget,
+                encoder_pool=self.encoder_pool,
+                metrics=self.metrics
+            )
+            for camera_id in camera_ids
+        }
+
+    def subscribe_cameras(self) -> StreamChannel:
+        """Creates a channel subscribed to the frames of every served camera.
+
+        Returns:
+            StreamChannel: The channel bound to all `CameraGateway.{id}.Frame` topics.
+        """
+        channel_cameras = StreamChannel(self.connection.broker_uri)
+        subscription = Subscription(channel_cameras)
+        for camera_id in self.cameras:
+            subscription.subscribe(f"CameraGateway.{camera_id}.Frame")
+        return channel_cameras
+
+    def detection_thread(self, minutes: FloatValue) -> None:
+        """Runs for a defined duration, detecting on the latest frame of every camera.
+
+        Designed to run as a daemon thread in the background. Each iteration
+        gathers the newest frame of each camera, runs a single batched prediction
+        and stores every result in the matching camera's `Threading` instance.
+        """
+        from functions import get_images_from_cameras
+        self.detection_event.set()
+        for camera in self.cameras.values():
+            camera.reset_motion_gate()
+
+        channel_cameras = self.subscribe_cameras()
+        publisher = AnnotationsPublisher(self.connection.broker_uri, self.log)
+        exporter = self.connection.exporter
+
+        threading.current_thread().name = "BatchDetectionThread"
+
+        duration_seconds = minutes.value * 60
+        start_time = time.time()
+        self.log.info(
+            f"Batched detection started for cameras {list(self.cameras)}. "
+            f"Duration: {duration_seconds / 60:.2f} minutes."
+        )
+        end_time = start_time + duration_seconds
+        while time.time() < end_time:
+            try:
+                frames = get_images_from_cameras(
+                    channel_cameras, exporter, end_time, self.detector.imgsz, self.metrics
+                )
+            except KeyboardInterrupt:
+                self.log.error("Shutting down...")
+                raise
+            except (ConnectionResetError, IndexError, UnexpectedFrame, TypeError):
+                continue
+            except OSError:
+                self.log.warn("Resetting server connection due to OSError...")
+                time.sleep(2.5)
+                channel_cameras = self.subscribe_cameras()
+                continue
+            except:
+                continue
+
+            if not frames:
+                continue
+            camera_ids = [camera_id for camera_id in frames if camera_id in self.cameras]
+            # Static cameras reuse their previous detection and are left out of the batch
+            moving_ids = [
+                camera_id for camera_id in camera_ids
+                if not self.cameras[camera_id].is_static(frames[camera_id][0])
+            ]
+            if moving_ids:
+                imgs = [frames[camera_id][0] for camera_id in moving_ids]
+                start = time.perf_counter()
+                batch_results = dict(zip(moving_ids, self.detector.predict_batch(imgs)))
+                elapsed = time.perf_counter() - start
+                self.metrics.observe("stage_seconds", elapsed, stage="predict_batch")
+                self.detector.record_latency(elapsed)
+            else:
+                batch_results = {}
+
+            for camera_id in camera_ids:
+                camera = self.cameras[camera_id]
+                _, tracer, span, scale, frame, capture_ts = frames[camera_id]
+                if camera_id in batch_results:
+                    with tracer.span(name="predict_tiffany"), camera.stage_timer.measure("results_to_dict"):
+                        result_dict = self.detector.results_to_dict(batch_results[camera_id], scale)
+                    camera._last_result_dict = result_dict
+                else:
+                    result_dict = camera._last_result_dict
+
+                with tracer.span(name="pack_and_publish_detection"), camera.stage_timer.measure("publish"):
+                    camera.store_detection(result_dict, frame, span, capture_ts, publisher)
+
+                tracer.end_span()
+        channel_cameras.close()
+        publisher.close()
+        self.log.info("Batched detection finished.")
+        for camera in self.cameras.values():
+            if camera.motion_gate is not None:
+                self.log.info(f"Camera {camera.camera_id}: {camera.motion_gate.format()}")
+            camera.set_last_detection_and_image_and_span(ObjectAnnotations(), None, BlankSpan())
+        self.detection_event.clear()
+
+    def init_detection(self, minutes: FloatValue, ctx) -> Status:
+        """Starts the batched detection thread if not already running.
+
+        Exposed through the `StartDetection` endpoint of every served camera.
+
+        Args:
+            minutes (FloatValue): Desired duration of detection in minutes.
+            ctx: Service context provided by is-wire RPC.
+
+        Returns:
+            Status: `OK` if detection started, or `ALREADY_EXISTS` if already running.
+        """
+        if not self.detection_event.is_set():
+            thread = threading.Thread(target=self.detection_thread, args=(minutes,))
+            thread.daemon = True
+            thread.start()
+            return Status(StatusCode.OK, "Detection started")
+        else:
+            return Status(StatusCode.ALREADY_EXISTS, "Detection already running")
@@ -1,41 +1,111 @@
 from is_msgs.image_pb2 import ObjectAnnotation, BoundingPoly, Vertex
 from ultralytics.engine.results import Results
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
+from .OpenVinoBackend import OpenVinoBackend
+from .AdaptiveResolution import AdaptiveResolution
+from .OnnxBackend import OnnxBackend
 from ultralytics import YOLO
 import numpy as np
 
+BACKENDS = ("ultralytics", "onnxruntime", "openvino")
+
 class Detector():
     """Encapsulates the YOLO model for object detection.
 
     This class loads a detection model, performs inference on images,
     and provides methods to convert the results into standardized formats.
+
+    Besides the default `ultralytics` backend, exported models can be run on the
+    CPU through lean ONNX Runtime or OpenVINO backends (see `Backend`), which
+    produce the same `results_to_dict` output.
+
+    With an `AdaptiveResolution` controller, the inference image size follows
+    the measured inference latency (see `record_latency`).
     """
 
-    def __init__(self, model_path: str, device: str = "cuda") -> None:
+    def __init__(
+        self,
+        model_path: str,
+        device: str = "cuda",
+        imgsz: int = 640,
+        backend: str = "ultralytics",
+        adaptive: Optional[AdaptiveResolution] = None
+    ) -> None:
         """Initializes the YOLO object detector.
 
         Args:
-            model_path (str): The path to the trained model file (e.g., 'yolov8n.pt').
-            device (str): The device to load the model on ('cuda' or 'cpu').
+            model_path (str): The path to the trained model file (e.g., 'yolov8n.pt'), or to
+                              the exported model when using the "onnxruntime" or "openvino" backend.
+            device (str): The device to load the model on ('cuda' or 'cpu'). Exported
+                          backends always run on the CPU.
+            imgsz (int): The inference image size. Images may be decoded at any
+                         resolution whose longest side is at least this size.
+            backend (str): The inference backend, one of "ultralytics", "onnxruntime" or "openvino".
+            adaptive (Optional[AdaptiveResolution]): If given, the inference image size starts at
+                the largest size of its ladder (instead of `imgsz`) and adapts to the load.
+
+        Raises:
+            ValueError: If the backend is not supported.
         """
 
-        self.model = YOLO(model_path)
-        self.model.to(device)
-
-    def predict(self, img: np.ndarray) -> Results:
+        if backend == "ultralytics":
+            self.model = YOLO(model_path)
+            self.model.to(device)
+        elif backend == "onnxruntime":
+            self.model = OnnxBackend(model_path)
+        elif backend == "openvino":
+            self.model = OpenVinoBackend(model_path)
+        else:
+            raise ValueError(f"Invalid backend '{backend}', expected one of {BACKENDS}")
+        self.backend = backend
+        self.adaptive = adaptive
+        self.imgsz = adaptive.imgsz if adaptive is not None else imgsz
+
+    def predict(self, img: np.ndarray, imgsz: Optional[int] = None) -> Results:
         """Performs object detection on a single image.
 
         Args:
             img (np.ndarray): The input image as a NumPy array.
+            imgsz (Optional[int]): Overrides the inference image size (e.g., a smaller
+                                   size for search window crops). Defaults to `self.imgsz`.
 
         Returns:
-            results (Results): A `ultralytics` result object containing the detections.
+            results (Results): A `ultralytics` result object containing the detections
+                               (a `BackendResults` with the same fields for exported backends).
         """
 
-        results = self.model.predict(source=img, imgsz=640, verbose=False)
+        imgsz = self.imgsz if imgsz is None else imgsz
+        results = self.model.predict(source=img, imgsz=imgsz, verbose=False)
         return results[0]
-    
-    def results_to_dict(self, results: Results) -> Dict[str, List[dict]]:
+
+    def record_latency(self, seconds: float) -> None:
+        """Reports the inference time of a frame at `imgsz`, adapting `imgsz` if enabled.
+
+        Args:
+            seconds (float): Time spent in `predict` (or `predict_batch`) for the last frame.
+        """
+        if self.adaptive is not None:
+            self.imgsz = self.adaptive.update(seconds)
+
+    def predict_batch(self, imgs: List[np.ndarray]) -> List[Results]:
+        """Performs object detection on several images in a single forward pass.
+
+        Args:
+            imgs (List[np.ndarray]): The input images as NumPy arrays.
+
+        Returns:
+            results (List[Results]): One `ultralytics` result object per input image,
+                                     in the same order as `imgs`.
+        """
+
+        return self.model.predict(source=imgs, imgsz=self.imgsz, verbose=False)
+
+    def results_to_dict(
+        self,
+        results: Results,
+        scale: float = 1.0,
+        offset: Optional[np.ndarray] = None
+    ) -> Dict[str, List[dict]]:
         """Converts the YOLO detection result into a dictionary.
 
         This function extracts the detection with the highest confidence (the first in the
@@ -43,6 +113,12 @@ class Detector():
 
         Args:
             results (Results): The result object returned by the `predict` method.
+            scale (float): Factor between the full frame and the image given to
+                           `predict`, used to map the box back to full-frame coordinates
+                           when the frame was decoded at a reduced resolution.
+            offset (Optional[np.ndarray]): [x, y] position of the image given to `predict`
+                                           inside the decoded frame, when it is a crop.
+                                           Applied before `scale`.
 
         Returns:
             results (Dict[str, List[dict]]): A dictionary containing the bounding box (xyxy)
@@ -52,13 +128,26 @@ class Detector():
         results_dict = {
             "boxes": [],
         }
+        offset_4_x_1 = np.zeros(4) if offset is None else np.tile(offset, 2)
         if len(results.boxes) > 0:
             results_dict["boxes"].append({
-                "conf": results.boxes.conf.cpu().numpy()[0],
-                "xyxy": results.boxes.xyxy.cpu().numpy()[0],
+                "conf": self.to_numpy(results.boxes.conf)[0],
+                "xyxy": (self.to_numpy(results.boxes.xyxy)[0] + offset_4_x_1) * scale,
             })
         return results_dict
 
+    @staticmethod
+    def to_numpy(values: Union[np.ndarray, Any]) -> np.ndarray:
+        """Converts a `torch` tensor from `ultralytics` results, or a backend array, to NumPy.
+
+        Args:
+            values (Union[np.ndarray, torch.Tensor]): Values of a results field.
+
+        Returns:
+            np.ndarray: The values as a NumPy array on the CPU.
+        """
+        return values.cpu().numpy() if hasattr(values, "cpu") else np.asarray(values)
+
     @staticmethod
     def dict_to_obj_annot(result_dict: Dict[str, Any]) -> ObjectAnnotation:
         """Converts a detection dictionary to the `ObjectAnnotation` format from `is-msgs`.
@@ -0,0 +1,91 @@
+from .StreamChannel import StreamChannel
+from is_wire.core import Message
+from typing import Deque, Optional, Set
+from collections import deque
+import threading
+import socket
+import time
+
+class FakeChannel(StreamChannel):
+    """In-process stand-in for `StreamChannel` that needs no broker.
+
+    Messages published on the channel are queued in memory and handed back by
+    `consume`, so the inherited `consume_last` and `consume_last_by_topic`
+    behave as with a real broker. Useful to feed recorded frames to the
+    detection code (see `FrameReplayer`) on a workstation.
+
+    Attributes:
+        topics (Set[str]): Topics accepted by the channel. Every topic is accepted while empty.
+        maxlen (Optional[int]): Maximum number of queued messages; the oldest ones are
+            dropped when full, as a slow consumer of a real queue would lag behind.
+    """
+
+    def __init__(self, topics: Optional[Set[str]] = None, maxlen: Optional[int] = None) -> None:
+        """Initializes the fake channel.
+
+        Args:
+            topics (Optional[Set[str]]): Topics to accept, like the subscriptions of a
+                real channel. Defaults to every topic.
+            maxlen (Optional[int]): Maximum number of queued messages. Unbounded by default.
+        """
+        self.topics: Set[str] = set(topics or ())
+        self.maxlen = maxlen
+        self._queue: Deque[Message] = deque(maxlen=maxlen)
+        self._condition = threading.Condition()
+
+    def subscribe(self, topic: str) -> None:
+        """Accepts the messages of a topic.
+
+        Args:
+            topic (str): The topic to accept (e.g., "CameraGateway.1.Frame").
+        """
+        self.topics.add(topic)
+
+    def publish(self, message: Message, topic: Optional[str] = None) -> None:
+        """Queues a message for consumption.
+
+        Args:
+            message (Message): The message to publish.
+            topic (Optional[str]): Topic to publish on. Defaults to the message topic.
+
+        Raises:
+            RuntimeError: If neither the message nor the call provide a topic.
+        """
+        if topic is not None:
+            message.topic = topic
+        if not message.has_topic():
+            raise RuntimeError("Trying to publish message without topic")
+        if self.topics and message.topic not in self.topics:
+            return
+        with self._condition:
+            self._queue.append(message)
+            self._condition.notify()
+
+    def consume(self, timeout: Optional[float] = None) -> Message:
+        """Blocks waiting for a queued message.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait, in seconds. Blocks forever if None.
+
+        Returns:
+            Message: The oldest queued message.
+
+        Raises:
+            socket.timeout: If no message arrives within the timeout.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while not self._queue:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise socket.timeout()
+                self._condition.wait(remaining)
+            return self._queue.popleft()
+
+    def close(self) -> None:
+        """Discards the queued messages."""
+        with self._condition:
+            self._queue.clear()
+
+    def __len__(self) -> int:
+        return len(self._queue)
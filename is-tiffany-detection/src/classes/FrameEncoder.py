@@ -0,0 +1,131 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from is_msgs.image_pb2 import Image
+from typing import Callable, Dict, Optional
+import numpy as np
+import threading
+import time
+import cv2
+
+class FrameEncoder:
+    """Encodes annotated frames on a thread pool, adapting JPEG quality to a bandwidth budget.
+
+    `cv2.imencode` releases the GIL, so frames submitted by one or several
+    stream threads are rendered and encoded in parallel. When a budget is set,
+    the encoder measures the bytes per second it produces and lowers the JPEG
+    quality, then the output resolution, while the budget is exceeded, raising
+    them back (resolution first) when there is room left.
+
+    Attributes:
+        budget (Optional[float]): Target bytes per second of the encoded stream, or None
+            to always encode at `max_quality` and full resolution.
+        quality (float): Current JPEG quality, from 0.0 to 1.0.
+        scale (float): Current output scale relative to the input frames.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[float] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+        max_workers: int = 2,
+        max_quality: float = 0.8,
+        min_quality: float = 0.3,
+        min_scale: float = 0.5,
+        step: float = 0.05
+    ) -> None:
+        """Initializes the encoder.
+
+        Args:
+            budget (Optional[float]): Target bytes per second. Disabled if None.
+            executor (Optional[ThreadPoolExecutor]): Pool to encode on, e.g. shared by the
+                encoders of several cameras. A pool with `max_workers` threads is created if None.
+            max_workers (int): Number of threads of the pool created when none is given.
+            max_quality (float): Highest (and initial) JPEG quality.
+            min_quality (float): Lowest JPEG quality before the resolution is reduced.
+            min_scale (float): Lowest output scale.
+            step (float): Quality and scale change applied at each adjustment.
+        """
+        self.budget = budget
+        self.executor = executor if executor is not None else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="FrameEncoder"
+        )
+        self._owns_executor = executor is None
+        self.max_quality = max_quality
+        self.min_quality = min_quality
+        self.min_scale = min_scale
+        self.step = step
+        self.quality = max_quality
+        self.scale = 1.0
+        self._rate = 0.0
+        self._last_time: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def encode(self, image: np.ndarray) -> Image:
+        """Encodes a frame at the current quality and scale, then updates them.
+
+        Args:
+            image (np.ndarray): The BGR frame.
+
+        Returns:
+            Image: The JPEG-encoded frame.
+        """
+        from functions import to_image
+
+        with self.lock:
+            quality, scale = self.quality, self.scale
+        if scale < 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        encoded = to_image(image, compression_level=quality)
+        self.update(len(encoded.data))
+        return encoded
+
+    def submit(self, render: Callable[..., np.ndarray], *args) -> "Future[Image]":
+        """Renders and encodes a frame on the pool.
+
+        Args:
+            render (Callable[..., np.ndarray]): Function returning the frame to encode,
+                e.g. decoding a frame and drawing the detection on it.
+            *args: Arguments of `render`.
+
+        Returns:
+            Future[Image]: The encoded frame.
+        """
+        return self.executor.submit(lambda: self.encode(render(*args)))
+
+    def update(self, size: int) -> None:
+        """Updates the measured bandwidth with an encoded frame and adjusts quality and scale.
+
+        Args:
+            size (int): Size of the encoded frame, in bytes.
+        """
+        with self.lock:
+            now = time.time()
+            if self._last_time is not None and now > self._last_time:
+                rate = size / (now - self._last_time)
+                self._rate = rate if self._rate == 0.0 else 0.8 * self._rate + 0.2 * rate
+            self._last_time = now
+            if self.budget is None or self._rate == 0.0:
+                return
+            if self._rate > 1.05 * self.budget:
+                if self.quality > self.min_quality:
+                    self.quality = max(self.quality - self.step, self.min_quality)
+                else:
+                    self.scale = max(self.scale - self.step, self.min_scale)
+            elif self._rate < 0.85 * self.budget:
+                if self.scale < 1.0:
+                    self.scale = min(self.scale + self.step, 1.0)
+                else:
+                    self.quality = min(self.quality + self.step, self.max_quality)
+
+    def stats(self) -> Dict[str, float]:
+        """Retrieves the current encoding settings and measured bandwidth.
+
+        Returns:
+            Dict[str, float]: The JPEG quality, output scale and bytes per second.
+        """
+        with self.lock:
+            return {"quality": self.quality, "scale": self.scale, "bytes_per_second": self._rate}
+
+    def shutdown(self) -> None:
+        """Stops the pool if it was created by this encoder."""
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,107 @@
+from is_wire.core import Message
+from typing import Optional
+import numpy as np
+import json
+import time
+import os
+
+# One fixed-size index record per frame: where its data starts in the data file,
+# the length of the encoded frame and of its JSON header, and its timestamps
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("body_length", "<u4"),
+    ("header_length", "<u4"),
+    ("created_at", "<f8"),
+    ("received_at", "<f8"),
+])
+
+def recording_paths(directory: str, camera_id: int) -> tuple:
+    """Builds the paths of the data and index files of a camera recording.
+
+    Args:
+        directory (str): Directory holding the recordings.
+        camera_id (int): ID of the recorded camera.
+
+    Returns:
+        tuple: The (data, index) file paths.
+    """
+    base = os.path.join(directory, f"camera_{camera_id}")
+    return f"{base}.frames", f"{base}.index"
+
+
+class FrameRecorder:
+    """Appends the frames published by a camera to a compact indexed recording.
+
+    Each frame is stored as the raw message body (the encoded `Image` protobuf,
+    which is not decoded) followed by a small JSON header with the topic and the
+    message metadata, which carries the tracing context. A separate index file
+    holds one fixed-size `INDEX_DTYPE` record per frame, so recordings can be
+    memory-mapped and accessed randomly by `FrameReplayer`. Both files are only
+    appended to; a record is valid once its index entry is written.
+
+    Attributes:
+        camera_id (int): ID of the recorded camera.
+        count (int): Number of frames in the recording.
+    """
+
+    def __init__(self, directory: str, camera_id: int, flush_every: int = 30) -> None:
+        """Opens (or creates) the recording of a camera for appending.
+
+        Args:
+            directory (str): Directory where the recording files are written.
+            camera_id (int): ID of the recorded camera.
+            flush_every (int): Number of frames between two flushes to disk.
+        """
+        os.makedirs(directory, exist_ok=True)
+        data_path, index_path = recording_paths(directory, camera_id)
+        self.camera_id = camera_id
+        self.flush_every = flush_every
+        self._data = open(data_path, "ab")
+        self._index = open(index_path, "ab")
+        self._offset = self._data.tell()
+        self.count = self._index.tell() // INDEX_DTYPE.itemsize
+
+    def write(self, message: Message, received_at: Optional[float] = None) -> None:
+        """Appends a frame message to the recording.
+
+        Args:
+            message (Message): The message consumed from `CameraGateway.{id}.Frame`.
+            received_at (Optional[float]): Time the message was received, in seconds.
+                Used to replay frames at their original rate. Defaults to now.
+        """
+        body = message.body if isinstance(message.body, bytes) else bytes(message.body, "utf-8")
+        header = json.dumps({"topic": message.topic, "metadata": message.metadata}, default=str).encode()
+        record = np.array(
+            [(
+                self._offset,
+                len(body),
+                len(header),
+                message.created_at or 0.0,
+                time.time() if received_at is None else received_at,
+            )],
+            dtype=INDEX_DTYPE,
+        )
+        self._data.write(body)
+        self._data.write(header)
+        self._index.write(record.tobytes())
+        self._offset += len(body) + len(header)
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered frames to disk."""
+        self._data.flush()
+        self._index.flush()
+
+    def close(self) -> None:
+        """Flushes and closes the recording files."""
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,155 @@
+from .FrameRecorder import INDEX_DTYPE, recording_paths
+from is_wire.core import Message, ContentType, Channel
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import heapq
+import glob
+import json
+import mmap
+import time
+import os
+
+class FrameReplayer:
+    """Reads frame recordings made by `FrameRecorder` and publishes them again.
+
+    Recordings are memory-mapped, so frames are read lazily without loading the
+    files. Frames of all cameras are replayed in the order they were received,
+    at their original rate, faster, or as fast as possible, on any channel with
+    a `publish(message)` method: a `StreamChannel` connected to a broker or an
+    in-process `FakeChannel`.
+
+    Attributes:
+        camera_ids (List[int]): IDs of the loaded camera recordings.
+    """
+
+    def __init__(self, directory: str, camera_ids: Optional[List[int]] = None) -> None:
+        """Opens the recordings of a directory.
+
+        Args:
+            directory (str): Directory holding the recordings.
+            camera_ids (Optional[List[int]]): Cameras to load. Defaults to every
+                recording found in the directory.
+
+        Raises:
+            FileNotFoundError: If no recording is found.
+        """
+        if camera_ids is None:
+            camera_ids = sorted(
+                int(os.path.basename(path)[len("camera_"):-len(".index")])
+                for path in glob.glob(os.path.join(directory, "camera_*.index"))
+            )
+        if not camera_ids:
+            raise FileNotFoundError(f"No frame recordings found in {directory}")
+        self.camera_ids = camera_ids
+        self._data: Dict[int, Union[mmap.mmap, bytes]] = {}
+        self._index: Dict[int, np.ndarray] = {}
+        for camera_id in camera_ids:
+            data_path, index_path = recording_paths(directory, camera_id)
+            with open(index_path, "rb") as f:
+                raw = f.read()
+            # Ignore a partially written last record
+            raw = raw[:len(raw) - len(raw) % INDEX_DTYPE.itemsize]
+            self._index[camera_id] = np.frombuffer(raw, dtype=INDEX_DTYPE)
+            if os.path.getsize(data_path) == 0:
+                # Empty files cannot be memory-mapped
+                self._data[camera_id] = b""
+                continue
+            with open(data_path, "rb") as f:
+                self._data[camera_id] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._index.values())
+
+    def count(self, camera_id: int) -> int:
+        """Returns the number of recorded frames of a camera.
+
+        Args:
+            camera_id (int): ID of the camera.
+
+        Returns:
+            int: The number of frames.
+        """
+        return len(self._index[camera_id])
+
+    def message(self, camera_id: int, i: int) -> Message:
+        """Rebuilds a recorded frame message.
+
+        Args:
+            camera_id (int): ID of the camera.
+            i (int): Position of the frame in the recording.
+
+        Returns:
+            Message: The message with its original topic, body, creation time and
+                metadata (including the tracing context).
+        """
+        record = self._index[camera_id][i]
+        start = int(record["offset"])
+        middle = start + int(record["body_length"])
+        end = middle + int(record["header_length"])
+        data = self._data[camera_id]
+        header = json.loads(data[middle:end])
+
+        message = Message()
+        message.topic = header["topic"]
+        message.body = data[start:middle]
+        message.content_type = ContentType.PROTOBUF
+        message.created_at = float(record["created_at"])
+        message.metadata = header["metadata"]
+        return message
+
+    def frames(self) -> Iterator[Tuple[float, int, int]]:
+        """Iterates over the frames of every camera in the order they were received.
+
+        Yields:
+            Tuple[float, int, int]: The reception time, camera ID and position of each frame.
+        """
+        def stream(camera_id: int) -> Iterator[Tuple[float, int, int]]:
+            for i, received_at in enumerate(self._index[camera_id]["received_at"]):
+                yield float(received_at), camera_id, i
+
+        return heapq.merge(*(stream(camera_id) for camera_id in self.camera_ids))
+
+    def replay(self, channel: Channel, speed: float = 1.0, loop: bool = False, retime: bool = True) -> int:
+        """Publishes the recorded frames on a channel.
+
+        Args:
+            channel (Channel): Channel to publish on (e.g., `StreamChannel` or `FakeChannel`).
+            speed (float): Replay rate relative to the original one (2.0 replays twice
+                as fast). 0 publishes as fast as possible.
+            loop (bool): If True, starts over when the recording ends, until interrupted.
+            retime (bool): If True, shifts the creation time of each message to the time
+                it is published (keeping the original capture-to-reception delay), so
+                latencies measured downstream stay meaningful.
+
+        Returns:
+            int: The number of published frames.
+        """
+        published = 0
+        while True:
+            start = None
+            for received_at, camera_id, i in self.frames():
+                if start is None:
+                    start = (time.perf_counter(), received_at)
+                if speed > 0:
+                    delay = (received_at - start[1]) / speed - (time.perf_counter() - start[0])
+                    if delay > 0:
+                        time.sleep(delay)
+                message = self.message(camera_id, i)
+                if retime:
+                    message.created_at += time.time() - received_at
+                channel.publish(message)
+                published += 1
+            if not loop or start is None:
+                return published
+
+    def close(self) -> None:
+        """Closes the memory-mapped recordings."""
+        for data in self._data.values():
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    def __enter__(self) -> "FrameReplayer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
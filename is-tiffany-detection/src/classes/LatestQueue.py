@@ -0,0 +1,70 @@
+from collections import deque
+from typing import Any, Optional
+import threading
+import time
+
+class LatestQueue:
+    """Bounded thread-safe queue that keeps only the most recent items.
+
+    Used to join the stages of the detection pipeline. When a consumer stage
+    falls behind, `put` discards the oldest queued item instead of blocking the
+    producer, so every stage always works on the freshest data available.
+
+    Attributes:
+        maxsize (int): Maximum number of items kept in the queue.
+        dropped (int): Number of items discarded because the queue was full.
+    """
+
+    def __init__(self, maxsize: int = 1) -> None:
+        """Initializes the queue.
+
+        Args:
+            maxsize (int): Maximum number of items kept in the queue. Defaults to 1.
+        """
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._items = deque()
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def put(self, item: Any) -> None:
+        """Adds an item, discarding the oldest one if the queue is full.
+
+        Args:
+            item (Any): The item to be queued.
+        """
+        with self._condition:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Removes and returns the oldest queued item, waiting for one if needed.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds. Waits
+                                       forever if None.
+
+        Returns:
+            Optional[Any]: The item, or None if the timeout expired or the queue was closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._items and not self._closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            return self._items.popleft() if self._items else None
+
+    def close(self) -> None:
+        """Closes the queue, waking up every consumer waiting on `get`."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._items)
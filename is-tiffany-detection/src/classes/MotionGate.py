@@ -0,0 +1,108 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+import threading
+import cv2
+
+class MotionGate:
+    """Cheap frame-difference gate used to skip inference on static scenes.
+
+    Each frame is reduced to a small grayscale thumbnail and compared with the
+    thumbnail of the last frame that went through inference. When the mean
+    absolute difference stays below the threshold, the previous detection can
+    be reused instead of running the model again.
+
+    Attributes:
+        threshold (float): Mean absolute difference (in gray levels, 0-255) above
+            which a frame is considered changed.
+        max_skips (int): Maximum number of consecutive skipped frames before
+            inference is forced, so the detection is refreshed periodically.
+        hits (int): Number of frames that went through inference.
+        skips (int): Number of frames whose detection was reused.
+    """
+
+    def __init__(self, threshold: float, max_skips: int = 30, size: Tuple[int, int] = (64, 36)) -> None:
+        """Initializes the motion gate.
+
+        Args:
+            threshold (float): Mean absolute difference above which a frame is considered changed.
+            max_skips (int): Maximum number of consecutive skipped frames.
+            size (Tuple[int, int]): (width, height) of the thumbnails that are compared.
+        """
+        self.threshold = threshold
+        self.max_skips = max_skips
+        self.size = size
+        self.hits = 0
+        self.skips = 0
+        self._consecutive_skips = 0
+        self._reference: Optional[np.ndarray] = None
+        self.lock = threading.Lock()
+
+    def thumbnail(self, img: np.ndarray) -> np.ndarray:
+        """Reduces an image to the small grayscale thumbnail used for comparisons.
+
+        Args:
+            img (np.ndarray): The BGR image, at any resolution.
+
+        Returns:
+            np.ndarray: The thumbnail as an int16 array, so differences do not overflow.
+        """
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def changed(self, img: np.ndarray) -> bool:
+        """Checks whether a frame differs enough from the last inferred one.
+
+        A changed frame becomes the new reference and counts as a hit; an
+        unchanged one counts as a skip.
+
+        Args:
+            img (np.ndarray): The decoded frame.
+
+        Returns:
+            bool: True if inference should run on this frame, False if the
+                previous detection can be reused.
+        """
+        thumbnail = self.thumbnail(img)
+        with self.lock:
+            if (
+                self._reference is not None
+                and self._reference.shape == thumbnail.shape
+                and self._consecutive_skips < self.max_skips
+                and np.abs(thumbnail - self._reference).mean() < self.threshold
+            ):
+                self.skips += 1
+                self._consecutive_skips += 1
+                return False
+            self._reference = thumbnail
+            self._consecutive_skips = 0
+            self.hits += 1
+            return True
+
+    def reset(self) -> None:
+        """Forgets the reference frame, so the next frame always goes through inference."""
+        with self.lock:
+            self._reference = None
+            self._consecutive_skips = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Retrieves the gate counters.
+
+        Returns:
+            Dict[str, float]: The number of hits and skips, and the fraction of skipped frames.
+        """
+        with self.lock:
+            total = self.hits + self.skips
+            return {
+                "hits": self.hits,
+                "skips": self.skips,
+                "skip_ratio": self.skips / total if total else 0.0,
+            }
+
+    def format(self) -> str:
+        """Formats the gate counters as a single log entry.
+
+        Returns:
+            str: The hits, skips and skip percentage.
+        """
+        stats = self.stats()
+        return f"motion gate hits={stats['hits']}, skips={stats['skips']} ({100 * stats['skip_ratio']:.0f}%)"
@@ -0,0 +1,42 @@
+from typing import Optional
+from .Backend import Backend
+import numpy as np
+
+
+class OnnxBackend(Backend):
+    """Runs an exported YOLO ONNX model with ONNX Runtime on the CPU.
+
+    `onnxruntime` is only imported when this backend is selected, so it is not
+    required by deployments using the default `ultralytics` backend.
+    """
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None, **kwargs) -> None:
+        """Loads the ONNX model and creates an inference session.
+
+        Args:
+            model_path (str): Path to the `.onnx` file exported with `yolo export format=onnx`.
+            num_threads (Optional[int]): Number of intra-op threads. Defaults to the
+                ONNX Runtime default (one per physical core).
+            **kwargs: Thresholds forwarded to `Backend` (conf, iou, max_det).
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        batch_size, _, height, width = model_input.shape
+        fixed_size = isinstance(height, int) and isinstance(width, int)
+        super().__init__(
+            input_shape=(height, width) if fixed_size else None,
+            batch_size=batch_size if isinstance(batch_size, int) else None,
+            metadata=self.session.get_modelmeta().custom_metadata_map,
+            **kwargs
+        )
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch})[0]
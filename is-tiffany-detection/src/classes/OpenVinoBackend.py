@@ -0,0 +1,50 @@
+from typing import Optional
+from .Backend import Backend
+from pathlib import Path
+import numpy as np
+
+
+class OpenVinoBackend(Backend):
+    """Runs an exported YOLO OpenVINO model on the CPU.
+
+    `openvino` is only imported when this backend is selected, so it is not
+    required by deployments using the default `ultralytics` backend.
+    """
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None, **kwargs) -> None:
+        """Loads and compiles the OpenVINO model.
+
+        Args:
+            model_path (str): Path to the `_openvino_model` directory exported with
+                `yolo export format=openvino`, or to the `.xml` file inside it.
+            num_threads (Optional[int]): Number of inference threads. Defaults to
+                the OpenVINO default.
+            **kwargs: Thresholds forwarded to `Backend` (conf, iou, max_det).
+        """
+        import openvino as ov
+        import yaml
+
+        path = Path(model_path)
+        xml_path = path if path.suffix == ".xml" else next(path.glob("*.xml"))
+        metadata_path = xml_path.parent / "metadata.yaml"
+        metadata = yaml.safe_load(metadata_path.read_text()) if metadata_path.exists() else {}
+
+        core = ov.Core()
+        model = core.read_model(xml_path)
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if num_threads:
+            config["INFERENCE_NUM_THREADS"] = num_threads
+        self.compiled_model = core.compile_model(model, "CPU", config)
+
+        input_shape = model.inputs[0].get_partial_shape()
+        static = [dim.get_length() if dim.is_static else None for dim in input_shape]
+        batch_size, _, height, width = static
+        super().__init__(
+            input_shape=(height, width) if height and width else None,
+            batch_size=batch_size,
+            metadata=metadata,
+            **kwargs
+        )
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        return self.compiled_model(batch)[0]
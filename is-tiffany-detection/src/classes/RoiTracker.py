@@ -0,0 +1,131 @@
+from typing import Optional, Tuple
+import numpy as np
+import threading
+import time
+
+class RoiTracker:
+    """Constant-velocity tracker that predicts where to search for Tiffany next.
+
+    Since a single, slowly moving robot is tracked, the box of the next frame is
+    close to the last one. The tracker extrapolates the last box with its
+    estimated velocity and returns an enlarged search window around it, so the
+    detector can run on a small crop instead of the full frame. A full-frame
+    detection is requested when there is no track (start or after a miss) and
+    periodically, every `refresh_interval` frames.
+
+    All coordinates are full-frame pixel coordinates.
+
+    Attributes:
+        imgsz (int): Inference image size used for the search window crops.
+        margin (float): Extra size added around the predicted box, as a fraction of its size.
+        min_size (int): Minimum side of the search window, in pixels.
+        refresh_interval (int): Number of crop detections after which a full-frame
+            detection is forced.
+        smoothing (float): Weight of the newest measurement in the velocity estimate.
+    """
+
+    def __init__(
+        self,
+        imgsz: int = 320,
+        margin: float = 1.0,
+        min_size: int = 160,
+        refresh_interval: int = 30,
+        smoothing: float = 0.5
+    ) -> None:
+        """Initializes the tracker.
+
+        Args:
+            imgsz (int): Inference image size used for the search window crops.
+            margin (float): Extra size added around the predicted box, as a fraction of its size.
+            min_size (int): Minimum side of the search window, in pixels.
+            refresh_interval (int): Number of crop detections between full-frame detections.
+            smoothing (float): Weight of the newest measurement in the velocity estimate.
+        """
+        self.imgsz = imgsz
+        self.margin = margin
+        self.min_size = min_size
+        self.refresh_interval = refresh_interval
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        self.full_frames = 0
+        self.roi_frames = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Drops the current track, so the next detection runs on the full frame."""
+        self._center: Optional[np.ndarray] = None
+        self._size: Optional[np.ndarray] = None
+        self._velocity = np.zeros(2)
+        self._last_time = 0.0
+        self._since_full = 0
+
+    def search_window(
+        self,
+        frame_size: Tuple[float, float],
+        timestamp: Optional[float] = None
+    ) -> Optional[Tuple[int, int, int, int]]:
+        """Predicts the region of the frame where the robot should be searched.
+
+        Args:
+            frame_size (Tuple[float, float]): (width, height) of the full frame.
+            timestamp (Optional[float]): Time of the frame, in seconds. Defaults to now.
+
+        Returns:
+            Optional[Tuple[int, int, int, int]]: The (x1, y1, x2, y2) window clipped
+                to the frame, or None if a full-frame detection is needed.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            if self._center is None or self._since_full >= self.refresh_interval:
+                return None
+            dt = max(timestamp - self._last_time, 0.0)
+            center = self._center + self._velocity * dt
+            half = np.maximum(self._size * (1.0 + self.margin), self.min_size) / 2.0
+            width, height = frame_size
+            x1, y1 = np.clip(center - half, 0, [width, height])
+            x2, y2 = np.clip(center + half, 0, [width, height])
+            if x2 - x1 < 1 or y2 - y1 < 1:
+                return None
+            return int(x1), int(y1), int(np.ceil(x2)), int(np.ceil(y2))
+
+    def update(
+        self,
+        xyxy: Optional[np.ndarray],
+        full_frame: bool,
+        timestamp: Optional[float] = None
+    ) -> None:
+        """Updates the track with the result of a detection.
+
+        Args:
+            xyxy (Optional[np.ndarray]): [x1, y1, x2, y2] box of the detection in full-frame
+                coordinates, or None if nothing was detected (the track is dropped).
+            full_frame (bool): Whether the detection ran on the full frame or on a search window.
+            timestamp (Optional[float]): Time of the frame, in seconds. Defaults to now.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            if full_frame:
+                self.full_frames += 1
+            else:
+                self.roi_frames += 1
+            if xyxy is None:
+                self.reset()
+                return
+            xyxy = np.asarray(xyxy, dtype=float)
+            center = (xyxy[:2] + xyxy[2:]) / 2.0
+            if self._center is not None and timestamp > self._last_time:
+                velocity = (center - self._center) / (timestamp - self._last_time)
+                self._velocity = self.smoothing * velocity + (1.0 - self.smoothing) * self._velocity
+            self._center = center
+            self._size = xyxy[2:] - xyxy[:2]
+            self._last_time = timestamp
+            self._since_full = 0 if full_frame else self._since_full + 1
+
+    def format(self) -> str:
+        """Formats the number of full-frame and search window detections as a log entry.
+
+        Returns:
+            str: The detection counts per mode.
+        """
+        with self.lock:
+            return f"tracker full-frame={self.full_frames}, roi={self.roi_frames}"
@@ -1,6 +1,6 @@
 from is_wire.core import Channel
 from is_wire.core import Message
-from typing import Tuple, Union
+from typing import Dict, Tuple, Union
 import socket
 
 class StreamChannel(Channel):
@@ -43,10 +43,44 @@ class StreamChannel(Channel):
                             of the initial consume call.
         """
         dropped = 0
-        msg = super().consume()
+        msg = self.consume()
         while True:
             try:
-                msg = super().consume(timeout=0.0)
+                msg = self.consume(timeout=0.0)
                 dropped += 1
             except socket.timeout:
                 return (msg, dropped) if return_dropped else msg
+
+    def consume_last_by_topic(self, return_dropped: bool = False) -> Union[Dict[str, Message], Tuple[Dict[str, Message], int]]:
+        """Consumes the latest available message of each topic, discarding previous ones.
+
+        Behaves like `consume_last`, but keeps one message per topic instead of a
+        single message overall. Useful when one subscription is bound to several
+        camera topics and the most recent frame of every camera is needed.
+
+        Args:
+            return_dropped (bool): If True, also returns the number of messages
+                                that were dropped. Defaults to False.
+
+        Returns:
+            msgs (Dict[str, Message] | Tuple[Dict[str, Message], int]): The latest
+                                                    message of each topic, keyed by topic.
+                                                    If `return_dropped` is True,
+                                                    returns a tuple containing the
+                                                    messages and the number of dropped messages.
+
+        Raises:
+            socket.timeout: If no message is received within the timeout period
+                            of the initial consume call.
+        """
+        dropped = 0
+        msg = self.consume()
+        msgs = {msg.topic: msg}
+        while True:
+            try:
+                msg = self.consume(timeout=0.0)
+                if msg.topic in msgs:
+                    dropped += 1
+                msgs[msg.topic] = msg
+            except socket.timeout:
+                return (msgs, dropped) if return_dropped else msgs
@@ -1,48 +1,131 @@
 from is_wire.core import Message, StatusCode, Status, Subscription
-from is_msgs.image_pb2 import ObjectAnnotations, Resolution
+from is_msgs.image_pb2 import ObjectAnnotations, Resolution, Image
 from google.protobuf.wrappers_pb2 import FloatValue
 from opencensus.trace.blank_span import BlankSpan
+from opencensus.trace import execution_context
 from amqp.exceptions import UnexpectedFrame
 from .StreamChannel import StreamChannel
 from opencensus.trace.span import Span
-from typing import Optional, Union
+from typing import Optional, Tuple, Union, TYPE_CHECKING
+from .LatestQueue import LatestQueue
+from .StageTimer import StageTimer
+from .Metrics import Metrics
+from .AnnotationsPublisher import AnnotationsPublisher
+from concurrent.futures import ThreadPoolExecutor
+from concurrent import futures
+from .FrameEncoder import FrameEncoder
+from .MotionGate import MotionGate
+from .RoiTracker import RoiTracker
+from .SharedFrameRing import SharedFrameRing
 from .Connection import Connection
 from .Detector import Detector
+from collections import deque
 import numpy as np
 import threading
 import time
 import cv2
 
+if TYPE_CHECKING:
+    from .BatchDetection import BatchDetection
+
 
 class Threading:
     """Manages background threads for object detection and streaming results.
 
     This class encapsulates logic to run two main threads:
     1. A continuous detection thread that consumes images and runs the model.
+       In pipelined mode it is split into decode, inference and publish stages
+       running in separate threads.
     2. An on-demand streaming thread that annotates images with detections and
        publishes them for a specified duration.
 
     A lock is used to ensure thread-safe access to the last detection data.
     """
 
-    def __init__(self, connection: Connection, detector: Detector):
+    def __init__(
+        self,
+        connection: Connection,
+        detector: Detector,
+        camera_id: Optional[int] = None,
+        batch: Optional["BatchDetection"] = None,
+        pipelined: bool = False,
+        motion_threshold: float = 0.0,
+        motion_max_skips: int = 30,
+        tracker: Optional[RoiTracker] = None,
+        stream_fps: float = 15.0,
+        stream_budget: Optional[float] = None,
+        encoder_pool: Optional[ThreadPoolExecutor] = None,
+        metrics: Optional[Metrics] = None,
+        frame_ring: Optional[SharedFrameRing] = None
+    ):
         """Initializes the threading manager.
 
         Args:
             connection (Connection): Manages the broker connection.
             detector (Detector): Responsible for running predictions.
+            camera_id (Optional[int]): ID of the camera handled by this instance.
+                Defaults to the camera ID of the connection.
+            batch (Optional[BatchDetection]): Shared batched detection loop. When given,
+                detection requests are forwarded to it instead of starting a
+                per-camera detection thread.
+            pipelined (bool): If True, runs detection as overlapping decode, inference
+                and publish stages instead of a single sequential loop.
+            motion_threshold (float): If positive, frames whose mean absolute difference
+                to the last inferred frame is below this value (in gray levels) reuse
+                the previous detection instead of running the model (see `MotionGate`).
+            motion_max_skips (int): Maximum number of consecutive frames reusing a detection.
+            tracker (Optional[RoiTracker]): If given, detection runs on a search window
+                around the predicted position of the robot, falling back to the full
+                frame after a miss and periodically.
+            stream_fps (float): Maximum rate at which annotated frames are streamed. No cap when 0.
+            stream_budget (Optional[float]): Target bytes per second of the annotated stream.
+                The JPEG quality, then the resolution, are lowered to meet it (see `FrameEncoder`).
+            encoder_pool (Optional[ThreadPoolExecutor]): Pool on which annotated frames are
+                encoded, e.g. shared by several cameras. Each camera gets its own pool if None.
+            metrics (Optional[Metrics]): Registry in which the stage latencies, frame counters
+                and component statistics are recorded, labelled with the camera ID. A private
+                registry is created if None.
+            frame_ring (Optional[SharedFrameRing]): Shared memory ring to which every decoded
+                frame is written at full resolution, for co-located services to read.
         """
         self.connection = connection
         self.log = connection.log
         self.detector = detector
+        self.camera_id = connection.camera_id if camera_id is None else camera_id
+        self.batch = batch
+        self.pipelined = pipelined
+        self.metrics = (metrics if metrics is not None else Metrics()).child(camera=self.camera_id)
+        self.metrics.add_collector(self.collect_metrics)
+        self.stage_timer = StageTimer(self.metrics)
+        self._frame_times = deque(maxlen=30)
+        self._last_timings_log = time.time()
+        self.motion_gate = MotionGate(motion_threshold, motion_max_skips) if motion_threshold > 0 else None
+        self._last_result_dict: Optional[dict] = None
+        self.tracker = tracker
+        self.frame_ring = frame_ring
+        self.stream_fps = stream_fps
+        self.encoder = FrameEncoder(budget=stream_budget, executor=encoder_pool)
 
         self._last_detection: ObjectAnnotations = ObjectAnnotations()
         self._last_span: Union[Span, BlankSpan] = BlankSpan()
-        self._last_image: Optional[np.ndarray] = None
+        self._last_image: Optional[Image] = None
 
         self.stream_event = threading.Event()
-        self.detection_event = threading.Event()
+        self.detection_event = batch.detection_event if batch is not None else threading.Event()
         self.lock = threading.Lock()
+        # Notified, under `lock`, whenever a new detection and frame are stored
+        self.new_detection = threading.Condition(self.lock)
+        self._version = 0
+
+    def subscribe_camera(self) -> StreamChannel:
+        """Creates a channel subscribed to the frames of this instance's camera.
+
+        Returns:
+            StreamChannel: The channel bound to the `CameraGateway.{id}.Frame` topic.
+        """
+        channel_camera = StreamChannel(self.connection.broker_uri)
+        Subscription(channel_camera).subscribe(f"CameraGateway.{self.camera_id}.Frame")
+        return channel_camera
 
     def detection_thread(self, minutes: FloatValue) -> None:
         """Runs for a defined duration to fetch images and perform detection.
@@ -53,12 +136,13 @@ class Threading:
         """
         from functions import get_images_from_camera
         self.detection_event.set()
+        self.reset_motion_gate()
 
-        channel_camera = StreamChannel(self.connection.broker_uri)
-        Subscription(channel_camera).subscribe(f"CameraGateway.{self.connection.camera_id}.Frame")
+        channel_camera = self.subscribe_camera()
+        publisher = AnnotationsPublisher(self.connection.broker_uri, self.log)
         exporter = self.connection.exporter
 
-        threading.current_thread().name = "DetectionThread"
+        threading.current_thread().name = f"DetectionThread.{self.camera_id}"
 
         duration_seconds = minutes.value * 60
         start_time = time.time()
@@ -66,7 +150,10 @@ class Threading:
         end_time = start_time + duration_seconds
         while time.time() < end_time:
             try:
-                img, tracer, span = get_images_from_camera(channel_camera, exporter, end_time)
+                img, tracer, span, scale, frame, capture_ts = get_images_from_camera(
+                    channel_camera, exporter, end_time, self.stage_timer, self.detector.imgsz,
+                    self.metrics, self.frame_ring
+                )
             except KeyboardInterrupt:
                 self.log.error("Shutting down...")
                 raise
@@ -76,48 +163,366 @@ class Threading:
             except OSError:
                 self.log.warn("Resetting server connection due to OSError...")
                 time.sleep(2.5)
-                channel_camera = StreamChannel(self.connection.broker_uri)
-                Subscription(channel_camera).subscribe(f"CameraGateway.{self.connection.camera_id}.Frame")
+                channel_camera = self.subscribe_camera()
                 continue
             except:
                 continue
 
-            with tracer.span(name="predict_tiffany"):
-                results = self.detector.predict(img)
-                result_dict = self.detector.results_to_dict(results)
+            if self.is_static(img):
+                result_dict = self._last_result_dict
+            else:
+                with tracer.span(name="predict_tiffany"), self.stage_timer.measure("infer"):
+                    result_dict = self.predict_frame(img, scale)
+                self._last_result_dict = result_dict
 
-            with tracer.span(name="pack_and_publish_detection"):
-                if len(result_dict["boxes"]):
-                    obj = ObjectAnnotations(
-                        objects=[self.detector.dict_to_obj_annot(result_dict)],
-                        resolution=Resolution(height=720, width=1280),
-                        frame_id=self.connection.camera_id
-                    )
-                    self.set_last_detection_and_image_and_span(obj, img, span)
+            with tracer.span(name="pack_and_publish_detection"), self.stage_timer.measure("publish"):
+                self.store_detection(result_dict, frame, span, capture_ts, publisher)
 
             tracer.end_span()
+            self.log_stage_timings()
         channel_camera.close()
+        publisher.close()
         self.log.info("Detection finished.")
+        if self.motion_gate is not None:
+            self.log.info(f"Camera {self.camera_id}: {self.motion_gate.format()}")
         self.set_last_detection_and_image_and_span(ObjectAnnotations(), None, BlankSpan())
         self.detection_event.clear()
 
+    def pipelined_detection_thread(self, minutes: FloatValue) -> None:
+        """Runs for a defined duration, detecting with overlapping pipeline stages.
+
+        Produces the same results as `detection_thread`, but consuming and decoding,
+        inference, and packing run in separate threads joined by latest-only queues.
+        While frame N is being inferred, frame N+1 is already being decoded; when
+        inference falls behind, stale decoded frames are dropped instead of queued.
+
+        Args:
+            minutes (FloatValue): Duration of detection in minutes.
+        """
+        self.detection_event.set()
+        self.reset_motion_gate()
+        threading.current_thread().name = f"DetectionThread.{self.camera_id}"
+
+        duration_seconds = minutes.value * 60
+        end_time = time.time() + duration_seconds
+        self.log.info(f"Pipelined detection started. Duration: {duration_seconds / 60:.2f} minutes.")
+
+        decoded = LatestQueue(maxsize=1)
+        # Set when publishing ends, so the decode stage stops even if a later stage failed
+        stop = threading.Event()
+        inferred = LatestQueue(maxsize=1)
+        stages = [
+            threading.Thread(target=self.decode_stage, args=(decoded, end_time, stop), name=f"DecodeStage.{self.camera_id}"),
+            threading.Thread(target=self.infer_stage, args=(decoded, inferred), name=f"InferStage.{self.camera_id}"),
+        ]
+        for stage in stages:
+            stage.daemon = True
+            stage.start()
+        try:
+            self.publish_stage(inferred)
+        except Exception as e:
+            self.log.error(f"Publish stage failed: {e!r}")
+        # Unblock the other stages, whichever one ended the pipeline
+        stop.set()
+        decoded.close()
+        for stage in stages:
+            stage.join()
+
+        self.log.info(f"Pipelined detection finished. Dropped frames: decode={decoded.dropped}, infer={inferred.dropped}.")
+        self.metrics.inc("frames_dropped_total", decoded.dropped, stage="decode")
+        self.metrics.inc("frames_dropped_total", inferred.dropped, stage="infer")
+        if self.motion_gate is not None:
+            self.log.info(f"Camera {self.camera_id}: {self.motion_gate.format()}")
+        self.set_last_detection_and_image_and_span(ObjectAnnotations(), None, BlankSpan())
+        self.detection_event.clear()
+
+    def decode_stage(self, decoded: LatestQueue, end_time: float, stop: threading.Event) -> None:
+        """Pipeline stage that consumes and decodes camera frames until `end_time`.
+
+        Args:
+            decoded (LatestQueue): Output queue of the tuples returned by
+                `get_images_from_camera`. Closed when the stage finishes.
+            end_time (float): The time at which the stage stops.
+            stop (threading.Event): Stops the stage early when set, e.g. when a later stage failed.
+        """
+        from functions import get_images_from_camera
+
+        try:
+            channel_camera = self.subscribe_camera()
+            exporter = self.connection.exporter
+            while time.time() < end_time and not stop.is_set():
+                try:
+                    frame = get_images_from_camera(
+                        channel_camera, exporter, end_time, self.stage_timer, self.detector.imgsz,
+                        self.metrics, self.frame_ring
+                    )
+                except (ConnectionResetError, IndexError, UnexpectedFrame, TypeError):
+                    continue
+                except OSError:
+                    self.log.warn("Resetting server connection due to OSError...")
+                    time.sleep(2.5)
+                    channel_camera = self.subscribe_camera()
+                    continue
+                except:
+                    continue
+                if frame is not None:
+                    decoded.put(frame)
+            channel_camera.close()
+        except Exception as e:
+            self.log.error(f"Decode stage failed: {e!r}")
+        finally:
+            decoded.close()
+
+    def infer_stage(self, decoded: LatestQueue, inferred: LatestQueue) -> None:
+        """Pipeline stage that runs the detector on decoded frames.
+
+        Args:
+            decoded (LatestQueue): Input queue of the tuples returned by `get_images_from_camera`.
+            inferred (LatestQueue): Output queue of (result_dict, frame, tracer, span, capture_ts)
+                                    tuples. Closed when the input queue is exhausted.
+        """
+        try:
+            while True:
+                frame = decoded.get()
+                if frame is None:
+                    break
+                img, tracer, span, scale, image_proto, capture_ts = frame
+                execution_context.set_current_span(span)
+                if self.is_static(img):
+                    result_dict = self._last_result_dict
+                else:
+                    with tracer.span(name="predict_tiffany"), self.stage_timer.measure("infer"):
+                        result_dict = self.predict_frame(img, scale)
+                    self._last_result_dict = result_dict
+                inferred.put((result_dict, image_proto, tracer, span, capture_ts))
+        except Exception as e:
+            self.log.error(f"Inference stage failed: {e!r}")
+        finally:
+            inferred.close()
+
+    def publish_stage(self, inferred: LatestQueue) -> None:
+        """Pipeline stage that packs and stores inference results.
+
+        Args:
+            inferred (LatestQueue): Input queue of (result_dict, frame, tracer, span, capture_ts) tuples.
+        """
+        publisher = AnnotationsPublisher(self.connection.broker_uri, self.log)
+        try:
+            while True:
+                item = inferred.get()
+                if item is None:
+                    break
+                result_dict, frame, tracer, span, capture_ts = item
+                execution_context.set_current_span(span)
+                with tracer.span(name="pack_and_publish_detection"), self.stage_timer.measure("publish"):
+                    self.store_detection(result_dict, frame, span, capture_ts, publisher)
+                tracer.end_span()
+                self.log_stage_timings()
+        finally:
+            publisher.close()
+
+    def get_stage_timings(self) -> dict:
+        """Retrieves the per-stage timing statistics accumulated since the last log.
+
+        Returns:
+            dict: Count, mean, last and maximum time in milliseconds for each
+                  stage ("decode", "infer" and "publish").
+        """
+        return self.stage_timer.summary()
+
+    def log_stage_timings(self, interval: float = 10.0) -> None:
+        """Logs and resets the per-stage timings if `interval` seconds have passed.
+
+        Args:
+            interval (float): Minimum time between two logs, in seconds.
+        """
+        if time.time() - self._last_timings_log < interval:
+            return
+        self._last_timings_log = time.time()
+        self.log.info(f"Stage timings (mean/max): {self.stage_timer.format(reset=True)}")
+        if self.motion_gate is not None:
+            self.log.info(f"Camera {self.camera_id}: {self.motion_gate.format()}")
+        if self.tracker is not None:
+            self.log.info(f"Camera {self.camera_id}: {self.tracker.format()}")
+        if self.detector.adaptive is not None:
+            self.log.info(f"Adaptive resolution: {self.detector.adaptive.format()}")
+
+    def is_static(self, img: np.ndarray) -> bool:
+        """Checks whether the previous detection can be reused for a frame.
+
+        Args:
+            img (np.ndarray): The decoded frame.
+
+        Returns:
+            bool: True if the motion gate is enabled, a previous detection exists and
+                  the frame did not change enough to run inference again.
+        """
+        if self.motion_gate is None:
+            return False
+        changed = self.motion_gate.changed(img)
+        return not changed and self._last_result_dict is not None
+
+    def reset_motion_gate(self) -> None:
+        """Forgets the cached detection, reference frame and track when detection (re)starts."""
+        self._last_result_dict = None
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        if self.tracker is not None:
+            self.tracker.reset()
+
+    def predict_frame(self, img: np.ndarray, scale: float) -> dict:
+        """Runs the detector on a decoded frame, using the search window of the tracker if any.
+
+        With a tracker, the detector first runs on a crop around the predicted
+        position at the tracker's smaller image size. If nothing is found there,
+        or no window is available, it runs on the full frame.
+
+        Args:
+            img (np.ndarray): The decoded frame.
+            scale (float): Factor between the full frame and `img`.
+
+        Returns:
+            dict: Detection data in full-frame coordinates, as generated by
+                  `Detector.results_to_dict`.
+        """
+        if self.tracker is None:
+            return self.run_detector(img, scale)
+
+        height, width = img.shape[:2]
+        window = self.tracker.search_window((width * scale, height * scale))
+        if window is not None:
+            x1, y1, x2, y2 = (int(v / scale) for v in window)
+            result_dict = self.run_detector(
+                img[y1:y2, x1:x2], scale, imgsz=self.tracker.imgsz, offset=np.array([x1, y1])
+            )
+            if result_dict["boxes"]:
+                self.tracker.update(result_dict["boxes"][0]["xyxy"], full_frame=False)
+                return result_dict
+
+        result_dict = self.run_detector(img, scale)
+        box = result_dict["boxes"][0]["xyxy"] if result_dict["boxes"] else None
+        self.tracker.update(box, full_frame=True)
+        return result_dict
+
+    def run_detector(
+        self,
+        img: np.ndarray,
+        scale: float,
+        imgsz: Optional[int] = None,
+        offset: Optional[np.ndarray] = None
+    ) -> dict:
+        """Runs `Detector.predict` and `Detector.results_to_dict`, timing each one as a stage.
+
+        Full-frame inference times are reported to the detector, which adapts its
+        image size to them when an `AdaptiveResolution` controller is set.
+
+        Args:
+            img (np.ndarray): The image given to the detector.
+            scale (float): Factor between the full frame and the decoded frame.
+            imgsz (Optional[int]): Overrides the inference image size.
+            offset (Optional[np.ndarray]): [x, y] position of `img` inside the decoded frame.
+
+        Returns:
+            dict: Detection data in full-frame coordinates.
+        """
+        start = time.perf_counter()
+        results = self.detector.predict(img, imgsz=imgsz)
+        elapsed = time.perf_counter() - start
+        self.stage_timer.record("predict", elapsed)
+        if imgsz is None:
+            # Search window crops run at the tracker's size and do not reflect the full-frame load
+            self.detector.record_latency(elapsed)
+        with self.stage_timer.measure("results_to_dict"):
+            return self.detector.results_to_dict(results, scale, offset=offset)
+
+    def collect_metrics(self) -> None:
+        """Refreshes the gauges read on demand: frame rate, image size, motion gate, tracker and encoder."""
+        now = time.time()
+        times = list(self._frame_times)
+        if len(times) > 1 and now - times[-1] < 2.0:
+            self.metrics.set("fps", (len(times) - 1) / max(times[-1] - times[0], 1e-6))
+        else:
+            self.metrics.set("fps", 0.0)
+        self.metrics.set("detection_running", float(self.detection_event.is_set()))
+        self.metrics.set("stream_running", float(self.stream_event.is_set()))
+        self.metrics.set("imgsz", self.detector.imgsz)
+        if self.detector.adaptive is not None:
+            stats = self.detector.adaptive.stats()
+            self.metrics.set("adaptive_latency_ms", stats["latency_ms"])
+            self.metrics.set("adaptive_steps", stats["steps_down"], direction="down")
+            self.metrics.set("adaptive_steps", stats["steps_up"], direction="up")
+        for name, value in self.get_motion_stats().items():
+            self.metrics.set(f"motion_gate_{name}", value)
+        if self.tracker is not None:
+            self.metrics.set("tracker_frames", self.tracker.full_frames, mode="full")
+            self.metrics.set("tracker_frames", self.tracker.roi_frames, mode="roi")
+        for name, value in self.encoder.stats().items():
+            self.metrics.set(f"encoder_{name}", value)
+
+    def get_motion_stats(self) -> dict:
+        """Retrieves the motion gate counters.
+
+        Returns:
+            dict: Number of inferred (hits) and reused (skips) frames and the skip
+                  ratio, or an empty dict if the gate is disabled.
+        """
+        return self.motion_gate.stats() if self.motion_gate is not None else {}
+
+    def store_detection(
+        self,
+        result_dict: dict,
+        image: Image,
+        span: Union[Span, BlankSpan],
+        capture_ts: Optional[float] = None,
+        publisher: Optional[AnnotationsPublisher] = None
+    ) -> None:
+        """Packs a detection dictionary and stores it as the latest detection.
+
+        Frames without detections are ignored, keeping the previous result, but
+        every frame is counted in the metrics.
+        When a publisher is given, the detection is also published on the
+        `Tiffany.Detection.{id}.Annotations` topic.
+
+        Args:
+            result_dict (dict): Detection data, as generated by `Detector.results_to_dict`.
+            image (Image): The encoded frame on which detection was performed.
+            span (Union[Span, BlankSpan]): The tracing span associated with the detection.
+            capture_ts (Optional[float]): Capture time of the frame, in seconds.
+            publisher (Optional[AnnotationsPublisher]): Publisher owned by the calling thread.
+        """
+        self._frame_times.append(time.time())
+        self.metrics.inc("frames_total")
+        if len(result_dict["boxes"]):
+            self.metrics.inc("detections_total")
+            obj = ObjectAnnotations(
+                objects=[self.detector.dict_to_obj_annot(result_dict)],
+                resolution=Resolution(height=720, width=1280),
+                frame_id=self.camera_id
+            )
+            self.set_last_detection_and_image_and_span(obj, image, span)
+            if publisher is not None:
+                publisher.publish(f"Tiffany.Detection.{self.camera_id}.Annotations", obj, span, capture_ts)
+
     def set_last_detection_and_image_and_span(
         self, 
         detection: ObjectAnnotations, 
-        image: Optional[np.ndarray], 
+        image: Optional[Image], 
         span: Union[Span, BlankSpan]
     ) -> None:
         """Safely updates the last detection, image, and tracing span.
 
         Args:
             detection (ObjectAnnotations): Detected object annotations.
-            image (Optional[np.ndarray]): The image on which detection was performed.
+            image (Optional[Image]): The encoded frame on which detection was performed.
+                                     It is only decoded at full resolution when streaming.
             span (Union[Span, BlankSpan]): The tracing span associated with the detection.
         """
         with self.lock:
             self._last_detection = detection
             self._last_image = image
             self._last_span = span
+            self._version += 1
+            self.new_detection.notify_all()
 
     def get_last_detection(self, *args) -> ObjectAnnotations:
         """Safely retrieves the latest detection result.
@@ -128,15 +533,36 @@ class Threading:
         with self.lock:
             return self._last_detection
 
-    def get_last_image(self) -> Optional[np.ndarray]:
-        """Safely retrieves the latest image with detection.
+    def get_last_image(self) -> Optional[Image]:
+        """Safely retrieves the latest encoded frame with detection.
 
         Returns:
-            Optional[np.ndarray]: The last stored image, or None if none exists.
+            Optional[Image]: The last stored frame, or None if none exists.
         """
         with self.lock:
             return self._last_image
 
+    def wait_for_detection(
+        self,
+        version: int,
+        timeout: Optional[float] = None
+    ) -> Optional[Tuple[int, ObjectAnnotations, Optional[Image], Union[Span, BlankSpan]]]:
+        """Blocks until a detection newer than `version` is stored.
+
+        Args:
+            version (int): Version of the last detection already handled (0 for none).
+            timeout (Optional[float]): Maximum time to wait, in seconds. Waits forever if None.
+
+        Returns:
+            Optional[Tuple[int, ObjectAnnotations, Optional[Image], Union[Span, BlankSpan]]]:
+                The version, detection, frame and span of the latest stored detection,
+                or None if nothing new was stored within the timeout.
+        """
+        with self.lock:
+            if not self.new_detection.wait_for(lambda: self._version != version, timeout):
+                return None
+            return self._version, self._last_detection, self._last_image, self._last_span
+
     def get_last_span(self) -> Union[Span, BlankSpan]:
         """Safely retrieves the last tracing span.
 
@@ -146,70 +572,105 @@ class Threading:
         with self.lock:
             return self._last_span
 
+    def draw_detection(self, frame: Image, det: ObjectAnnotations) -> np.ndarray:
+        """Decodes a frame at full resolution and draws a detection on it.
+
+        Args:
+            frame (Image): The encoded frame on which detection was performed.
+            det (ObjectAnnotations): The detection to draw.
+
+        Returns:
+            np.ndarray: The annotated image.
+        """
+        from functions import to_np
+
+        img_to_draw = to_np(frame)
+        if det.objects:
+            box = det.objects[0].region.vertices
+            bb1 = (int(box[0].x), int(box[0].y))
+            bb2 = (int(box[1].x), int(box[1].y))
+            cv2.rectangle(img_to_draw, bb1, bb2, (255, 255, 0), 2)
+            cv2.putText(
+                img_to_draw, 
+                f"Score: {det.objects[0].score:.2f}", 
+                (10, 30), 
+                cv2.FONT_HERSHEY_SIMPLEX, 
+                0.7, 
+                (255, 255, 0), 
+                2
+            )
+        return img_to_draw
+
     def stream_detection_thread(self, minutes: FloatValue) -> None:
         """Draws detections on images and streams them for a defined duration.
 
-        Runs in a separate thread. Continuously fetches the latest detection,
-        draws bounding boxes on a copy of the image, and publishes it to a topic.
+        Runs in a separate thread. Waits for a new detection to be stored and
+        hands its frame to the encoder pool, which decodes it at full resolution,
+        draws the bounding box and encodes it, so several frames can be encoded
+        at once. Encoded frames are published to a topic in order, at most
+        `stream_fps` times per second. Detections stored in between are skipped.
         Terminates after the specified duration.
 
         Args:
             minutes (FloatValue): Duration in minutes for streaming.
         """
-        from functions import to_image
-
         self.stream_event.set()
-        threading.current_thread().name = "StreamThread"
+        threading.current_thread().name = f"StreamThread.{self.camera_id}"
         channel = StreamChannel(self.connection.broker_uri)
         duration_seconds = minutes.value * 60
         init_time = time.time()
         self.log.info(f"Streaming started. Duration: {duration_seconds / 60:.2f} minutes.")
         end_time = init_time + duration_seconds
-
-        while time.time() < end_time:
-            det = self.get_last_detection()
-            img = self.get_last_image()
-            span = self.get_last_span()
-
-            if img is None:
-                continue
-
-            img_to_draw = img.copy()
-
-            if det.objects:
-                box = det.objects[0].region.vertices
-                bb1 = (int(box[0].x), int(box[0].y))
-                bb2 = (int(box[1].x), int(box[1].y))
-                cv2.rectangle(img_to_draw, bb1, bb2, (255, 255, 0), 2)
-                cv2.putText(
-                    img_to_draw, 
-                    f"Score: {det.objects[0].score:.2f}", 
-                    (10, 30), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 
-                    0.7, 
-                    (255, 255, 0), 
-                    2
-                )
-
-            try:
-                msg = Message()
-                msg.inject_tracing(span)
-                msg.topic = f"Tiffany.{self.connection.camera_id}.Frame"
-                msg.pack(to_image(img_to_draw))
-                channel.publish(msg)
-            except (ConnectionResetError):
-                continue
-            except OSError:
-                self.log.warn("Resetting server connection due to OSError...")
-                time.sleep(2.5)
-                channel = StreamChannel(self.connection.broker_uri)
-                continue
-            except Exception as e:
-                self.log.error(f"Unexpected error while publishing: {e}")
-                continue
+        min_interval = 1.0 / self.stream_fps if self.stream_fps > 0 else 0.0
+        version = 0
+        last_publish = 0.0
+        pending = deque()
+
+        while time.time() < end_time or pending:
+            now = time.time()
+            # Cap the stream rate; newer detections keep replacing the pending one meanwhile
+            next_time = min(last_publish + min_interval, end_time)
+            if now < next_time:
+                if pending:
+                    futures.wait([pending[0][0]], timeout=next_time - now)
+                else:
+                    time.sleep(next_time - now)
+            elif now < end_time:
+                # Only block briefly while encoded frames are waiting to be published
+                timeout = 0.01 if pending else min(1.0, end_time - now)
+                latest = self.wait_for_detection(version, timeout=timeout)
+                if latest is not None and latest[2] is not None:
+                    version, det, frame, span = latest
+                    last_publish = time.time()
+                    pending.append((self.encoder.submit(self.draw_detection, frame, det), span))
+
+            # Publish encoded frames in order; wait for the oldest when too many are in flight
+            while pending and (pending[0][0].done() or len(pending) > 2 or time.time() >= end_time):
+                future, span = pending.popleft()
+                try:
+                    msg = Message()
+                    msg.inject_tracing(span)
+                    msg.topic = f"Tiffany.{self.camera_id}.Frame"
+                    msg.pack(future.result())
+                    channel.publish(msg)
+                    self.metrics.inc("stream_frames_total")
+                except (ConnectionResetError):
+                    continue
+                except OSError:
+                    self.log.warn("Resetting server connection due to OSError...")
+                    time.sleep(2.5)
+                    channel = StreamChannel(self.connection.broker_uri)
+                    continue
+                except Exception as e:
+                    self.log.error(f"Unexpected error while publishing: {e}")
+                    continue
         
         channel.close()
-        self.log.info("Streaming finished.")
+        stats = self.encoder.stats()
+        self.log.info(
+            f"Streaming finished. Encoder quality={stats['quality']:.2f}, scale={stats['scale']:.2f}, "
+            f"{stats['bytes_per_second'] / 1000:.0f} kB/s."
+        )
         self.stream_event.clear()
 
     def init_stream(self, minutes: FloatValue, ctx) -> Status:
@@ -249,8 +710,11 @@ class Threading:
         Returns:
             Status: `OK` if detection started, or `ALREADY_EXISTS` if already running.
         """
+        if self.batch is not None:
+            return self.batch.init_detection(minutes, ctx)
         if not self.detection_event.is_set():
-            thread = threading.Thread(target=self.detection_thread, args=(minutes,))
+            target = self.pipelined_detection_thread if self.pipelined else self.detection_thread
+            thread = threading.Thread(target=target, args=(minutes,))
             thread.daemon = True
             thread.start()
             return Status(StatusCode.OK, "Detection started")
@@ -1,4 +1,20 @@
+from .Backend import Backend, BackendResults
+from .OnnxBackend import OnnxBackend
+from .OpenVinoBackend import OpenVinoBackend
+from .AdaptiveResolution import AdaptiveResolution
 from .Detector import Detector
 from .Connection import Connection
 from .StreamChannel import StreamChannel
-from .Threading import Threading
\ No newline at end of file
+from .FakeChannel import FakeChannel
+from .FrameRecorder import FrameRecorder
+from .FrameReplayer import FrameReplayer
+from .AnnotationsPublisher import AnnotationsPublisher
+from .FrameEncoder import FrameEncoder
+from .SharedFrameRing import SharedFrameRing, ring_path
+from .LatestQueue import LatestQueue
+from .Metrics import Metrics
+from .StageTimer import StageTimer
+from .MotionGate import MotionGate
+from .RoiTracker import RoiTracker
+from .Threading import Threading
+from .BatchDetection import BatchDetection
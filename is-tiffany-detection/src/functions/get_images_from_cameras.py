@@ -0,0 +1,57 @@
+from opencensus.ext.zipkin.trace_exporter import ZipkinExporter
+from is_wire.core import Tracer
+from opencensus.trace.span import Span
+from is_msgs.image_pb2 import Image
+from classes import StreamChannel, Metrics
+from typing import Dict, Optional, Tuple
+from .to_np import to_np, decode_factor
+import numpy as np
+import time
+
+def get_images_from_cameras(
+    channel_cameras: StreamChannel,
+    exporter: ZipkinExporter,
+    end_time: float,
+    target_size: Optional[int] = None,
+    metrics: Optional[Metrics] = None
+) -> Dict[int, Tuple[np.ndarray, Tracer, Span, int, Image, float]]:
+    """Consumes the most recent image of every subscribed camera and prepares distributed tracing.
+
+    The channel is expected to be subscribed to several `CameraGateway.{id}.Frame`
+    topics. Only cameras that published a new frame since the last call are returned.
+
+    Args:
+        channel_cameras (StreamChannel): The channel from which the images will be consumed.
+        exporter (ZipkinExporter): The Zipkin exporter used to create the tracers.
+        end_time (float): The time at which the function should stop trying to get images.
+        target_size (Optional[int]): If given, frames are decoded at the lowest
+            resolution whose longest side is at least `target_size` pixels.
+        metrics (Optional[Metrics]): If given, counts the frames dropped by
+            `consume_last_by_topic` in "frames_dropped_total".
+
+    Returns:
+        Dict[int, Tuple[np.ndarray, Tracer, Span, int, Image, float]]: For each camera ID, the
+            image as a NumPy array, the Tracer object, the Span, the factor the frame was reduced
+            by when decoding, the encoded frame, and its capture time in seconds.
+    """
+    while time.time() < end_time:
+        messages, dropped = channel_cameras.consume_last_by_topic(return_dropped=True)
+
+        if not messages:
+            continue
+        if metrics is not None:
+            metrics.inc("frames_dropped_total", dropped, stage="consume")
+        frames = {}
+        for topic, message in messages.items():
+            camera_id = int(topic.split(".")[1])
+            tracer: Tracer = Tracer(
+                exporter=exporter,
+                span_context=message.extract_tracing()
+            )
+            span: Span = tracer.start_span(name="tiffany_detection")
+            with tracer.span(name="get_and_unpack_image_from_camera"):
+                image_proto = message.unpack(Image)
+                scale = decode_factor(image_proto, target_size)
+                image_np = to_np(image_proto, target_size)
+            frames[camera_id] = (image_np, tracer, span, scale, image_proto, message.created_at)
+        return frames
@@ -0,0 +1,95 @@
+from importlib.util import module_from_spec, spec_from_file_location
+import numpy as np
+import pytest
+import glob
+import sys
+import os
+import cv2
+
+SERVICE_DIR = os.path.join(os.path.dirname(__file__), "..")
+BACKEND_PATH = os.path.join(SERVICE_DIR, "src", "classes", "Backend.py")
+
+# Backend.py only needs NumPy and OpenCV, so it is loaded on its own instead of through `classes`
+spec = spec_from_file_location("Backend", BACKEND_PATH)
+backend_module = module_from_spec(spec)
+spec.loader.exec_module(backend_module)
+Backend = backend_module.Backend
+
+
+class ConstantBackend(Backend):
+    """Backend returning a fixed raw output, to test the shared pre- and post-processing."""
+
+    def __init__(self, output: np.ndarray, metadata: dict) -> None:
+        super().__init__(None, None, metadata)
+        self.output = output
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        return np.repeat(self.output[None], len(batch), axis=0)
+
+
+def test_forward_is_abstract():
+    with pytest.raises(TypeError):
+        Backend(None, None, {})
+
+
+def test_low_confidence_keypoints_are_zeroed():
+    # One anchor: box centered at (32, 32), class score 0.9, keypoints with confidence 0.9 and 0.3
+    output = np.array([[32], [32], [20], [20], [0.9], [30], [28], [0.9], [40], [36], [0.3]], dtype=np.float32)
+    backend = ConstantBackend(output, {"names": "{0: 'Tiffany'}", "kpt_shape": "[2, 3]"})
+    results = backend.predict(np.zeros((64, 64, 3), dtype=np.uint8), imgsz=64)[0]
+
+    assert len(results.boxes) == 1
+    np.testing.assert_allclose(results.keypoints.xy[0, 0], [30, 28])
+    np.testing.assert_array_equal(results.keypoints.xy[0, 1], [0, 0])
+    np.testing.assert_allclose(results.keypoints.conf[0], [0.9, 0.3], rtol=1e-6)
+
+
+@pytest.mark.parametrize("shape", [(720, 1280), (96, 64), (33, 257)])
+def test_letterbox_matches_ultralytics(shape):
+    LetterBox = pytest.importorskip("ultralytics.data.augment").LetterBox
+    img = np.random.default_rng(0).integers(0, 255, (*shape, 3), dtype=np.uint8)
+    backend = ConstantBackend(np.zeros((1, 1), dtype=np.float32), {})
+    for auto in (True, False):
+        expected = LetterBox((640, 640), auto=auto, stride=32)(image=img)
+        actual, _, _ = backend.letterbox(img, 640, auto)
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_exported_model_matches_ultralytics():
+    # BACKEND_PARITY_EXPORTED (.onnx file or OpenVINO directory) and BACKEND_PARITY_FRAMES (directory
+    # of images) enable the comparison; BACKEND_PARITY_MODEL and BACKEND_PARITY_BACKEND are optional
+    exported, frames = os.getenv("BACKEND_PARITY_EXPORTED"), os.getenv("BACKEND_PARITY_FRAMES")
+    if not exported or not frames:
+        pytest.skip("BACKEND_PARITY_EXPORTED and BACKEND_PARITY_FRAMES are not set")
+    YOLO = pytest.importorskip("ultralytics").YOLO
+    model = os.getenv("BACKEND_PARITY_MODEL", os.path.join(SERVICE_DIR, "src", "models", "detection_model.pt"))
+    paths = sorted(glob.glob(os.path.join(frames, "*.jpg")) + glob.glob(os.path.join(frames, "*.png")))
+    assert paths, f"No frames found in {frames}"
+
+    sys.path.insert(0, os.path.join(SERVICE_DIR, "src"))
+    from classes import OnnxBackend, OpenVinoBackend
+    reference = YOLO(model)
+    if os.getenv("BACKEND_PARITY_BACKEND", "onnxruntime") == "openvino":
+        candidate = OpenVinoBackend(exported)
+    else:
+        candidate = OnnxBackend(exported)
+    for path in paths:
+        img = cv2.imread(path)
+        expected = reference.predict(img, verbose=False)[0]
+        actual = candidate.predict(img)[0]
+        assert len(actual.boxes) == len(expected.boxes), path
+        np.testing.assert_allclose(actual.boxes.xyxy, expected.boxes.xyxy.cpu().numpy(), atol=1.0, err_msg=path)
+        np.testing.assert_allclose(actual.boxes.conf, expected.boxes.conf.cpu().numpy(), atol=0.02, err_msg=path)
+        if expected.keypoints is not None:
+            np.testing.assert_allclose(actual.keypoints.xy, expected.keypoints.xy.cpu().numpy(), atol=1.0, err_msg=path)
+            np.testing.assert_allclose(actual.keypoints.conf, expected.keypoints.conf.cpu().numpy(), atol=0.02, err_msg=path)
+
+
+@pytest.mark.parametrize("service", ["is-tiffany-detection", "is-tiffany-keypoints-detection"])
+def test_backend_copies_are_identical(service):
+    # Each service is built from its own src/, so Backend.py is copied; the copies must not diverge
+    other = os.path.join(SERVICE_DIR, "..", service, "src", "classes", "Backend.py")
+    if not os.path.exists(other):
+        pytest.skip(f"{service} is not checked out next to this service")
+    with open(BACKEND_PATH) as ours, open(other) as theirs:
+        assert ours.read() == theirs.read()
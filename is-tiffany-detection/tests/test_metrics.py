@@ -0,0 +1,46 @@
+from importlib.util import module_from_spec, spec_from_file_location
+import pytest
+import os
+
+SERVICE_DIR = os.path.join(os.path.dirname(__file__), "..")
+METRICS_PATH = os.path.join(SERVICE_DIR, "src", "classes", "Metrics.py")
+
+
+@pytest.fixture
+def metrics():
+    pytest.importorskip("google.protobuf")
+    spec = spec_from_file_location("Metrics", METRICS_PATH)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Metrics()
+
+
+def test_child_labels_its_series(metrics):
+    camera = metrics.child(camera=1)
+    camera.inc("frames_total")
+    camera.inc("frames_total", 2)
+    camera.set("queue_depth", 3)
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {'frames_total{camera="1"}': 3.0}
+    assert snapshot["gauges"] == {'queue_depth{camera="1"}': 3.0}
+
+
+def test_histogram_quantiles(metrics):
+    for _ in range(90):
+        metrics.observe("stage_seconds", 0.004, stage="infer")
+    for _ in range(10):
+        metrics.observe("stage_seconds", 0.2, stage="infer")
+    summary = metrics.snapshot()["histograms"]['stage_seconds{stage="infer"}']
+    assert summary["count"] == 100
+    assert 2.5 <= summary["p50_ms"] <= 5.0
+    assert 100.0 <= summary["p99_ms"] <= 250.0
+
+
+@pytest.mark.parametrize("service", ["is-tiffany-detection", "is-tiffany-keypoints-detection", "is-tiffany-pose"])
+def test_metrics_copies_are_identical(service):
+    # Each service is built from its own src/, so Metrics.py is copied; the copies must not diverge
+    other = os.path.join(SERVICE_DIR, "..", service, "src", "classes", "Metrics.py")
+    if not os.path.exists(other):
+        pytest.skip(f"{service} is not checked out next to this service")
+    with open(METRICS_PATH) as ours, open(other) as theirs:
+        assert ours.read() == theirs.read()
@@ -0,0 +1,149 @@
+from collections.abc import Sequence
+import threading
+
+class AdaptiveResolution:
+    """Chooses the inference image size from a ladder according to the measured latency.
+
+    When inference takes longer than the frame budget, frames pile up and most
+    of them are dropped by `consume_last`, so the published detections are
+    accurate but old. This controller steps the image size down the ladder
+    while the smoothed latency is above the budget, and back up once the
+    latency expected at the next larger size (scaled by the squared size ratio)
+    fits comfortably in the budget again.
+
+    Both directions require several consecutive frames (`down_after` and
+    `up_after`, the latter much larger) before stepping, and the latency
+    estimate restarts after each step, so the size does not oscillate.
+
+    Attributes:
+        ladder (list[int]): Supported image sizes, from largest to smallest.
+        budget (float): Target inference time per frame, in seconds.
+        level (int): Index of the current size in the ladder.
+        steps_down (int): Number of times the size was reduced.
+        steps_up (int): Number of times the size was increased.
+    """
+
+    def __init__(
+        self,
+        ladder: Sequence[int],
+        budget: float,
+        down_after: int = 5,
+        up_after: int = 50,
+        headroom: float = 0.8,
+        smoothing: float = 0.2
+    ) -> None:
+        """Initializes the controller at the largest size of the ladder.
+
+        Args:
+            ladder (Sequence[int]): Image sizes the model supports, in any order.
+            budget (float): Target inference time per frame, in seconds.
+            down_after (int): Consecutive frames over budget before stepping down.
+            up_after (int): Consecutive frames with room left before stepping up.
+            headroom (float): Fraction of the budget the expected latency at the next
+                larger size must stay under to step up.
+            smoothing (float): Weight of the newest sample in the latency estimate.
+
+        Raises:
+            ValueError: If the ladder is empty or the budget is not positive.
+        """
+        if not ladder:
+            raise ValueError("The resolution ladder must contain at least one size")
+        if budget <= 0:
+            raise ValueError(f"Invalid latency budget {budget}, expected a positive number of seconds")
+        self.ladder = sorted(set(ladder), reverse=True)
+        self.budget = budget
+        self.down_after = down_after
+        self.up_after = up_after
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.level = 0
+        self.steps_down = 0
+        self.steps_up = 0
+        self._latency: float | None = None
+        self._over = 0
+        self._under = 0
+        self.lock = threading.Lock()
+
+    @property
+    def imgsz(self) -> int:
+        """int: The current inference image size."""
+        return self.ladder[self.level]
+
+    def update(self, seconds: float) -> int:
+        """Records the inference time of a frame and steps the image size if needed.
+
+        Args:
+            seconds (float): Inference time of the last frame, at the current size.
+
+        Returns:
+            int: The image size to use for the next frame.
+        """
+        with self.lock:
+            if self._latency is None:
+                self._latency = seconds
+            else:
+                self._latency = self.smoothing * seconds + (1.0 - self.smoothing) * self._latency
+
+            if self._latency > self.budget:
+                self._over, self._under = self._over + 1, 0
+            elif self.level > 0 and self.expected_latency(self.level - 1) < self.headroom * self.budget:
+                self._over, self._under = 0, self._under + 1
+            else:
+                self._over = self._under = 0
+
+            if self._over >= self.down_after and self.level < len(self.ladder) - 1:
+                self.level += 1
+                self.steps_down += 1
+                self._restart()
+            elif self._under >= self.up_after:
+                self.level -= 1
+                self.steps_up += 1
+                self._restart()
+            return self.ladder[self.level]
+
+    def expected_latency(self, level: int) -> float:
+        """Estimates the inference time at another level of the ladder.
+
+        Args:
+            level (int): Index of the size in the ladder.
+
+        Returns:
+            float: The current latency scaled by the ratio of pixel counts.
+        """
+        return self._latency * (self.ladder[level] / self.ladder[self.level]) ** 2
+
+    def _restart(self) -> None:
+        self._latency = None
+        self._over = self._under = 0
+
+    def reset(self) -> None:
+        """Returns to the largest size and forgets the latency estimate."""
+        with self.lock:
+            self.level = 0
+            self._restart()
+
+    def stats(self) -> dict[str, float]:
+        """Retrieves the current size, latency estimate and number of steps.
+
+        Returns:
+            dict[str, float]: The image size, smoothed latency in milliseconds and step counts.
+        """
+        with self.lock:
+            return {
+                "imgsz": self.ladder[self.level],
+                "latency_ms": 1000.0 * (self._latency or 0.0),
+                "steps_down": self.steps_down,
+                "steps_up": self.steps_up,
+            }
+
+    def format(self) -> str:
+        """Formats the controller state as a single log entry.
+
+        Returns:
+            str: The image size, latency estimate against the budget and step counts.
+        """
+        stats = self.stats()
+        return (
+            f"imgsz={stats['imgsz']} ({stats['latency_ms']:.1f}/{1000.0 * self.budget:.0f} ms), "
+            f"steps down={stats['steps_down']}, up={stats['steps_up']}"
+        )
@@ -0,0 +1,63 @@
+from opencensus.trace.blank_span import BlankSpan
+from is_msgs.image_pb2 import ObjectAnnotations
+from amqp.exceptions import UnexpectedFrame
+from opencensus.trace.span import Span
+from is_wire.core import Logger, Message
+from .StreamChannel import StreamChannel
+
+class AnnotationsPublisher:
+    """Publishes every new detection on a topic, so consumers can subscribe instead of polling.
+
+    Each message carries the `ObjectAnnotations` in its body and, in its metadata,
+    a per-topic sequence number ("seq") and the capture time of the frame the
+    detection was made on ("capture_ts", in seconds), besides the tracing context.
+
+    A channel is not thread-safe, so a publisher must only be used by the thread
+    that created it.
+    """
+
+    def __init__(self, broker_uri: str, log: Logger) -> None:
+        """Initializes the publisher.
+
+        Args:
+            broker_uri (str): URI of the message broker.
+            log (Logger): Logger used to report connection problems.
+        """
+        self.broker_uri = broker_uri
+        self.log = log
+        self.channel = StreamChannel(broker_uri)
+        self.seq: dict[str, int] = {}
+
+    def publish(
+        self,
+        topic: str,
+        annotations: ObjectAnnotations,
+        span: Span | BlankSpan,
+        capture_ts: float | None = None
+    ) -> None:
+        """Publishes a detection.
+
+        Args:
+            topic (str): Topic to publish on (e.g., "Tiffany.Keypoints.1.Annotations").
+            annotations (ObjectAnnotations): The detection.
+            span (Span | BlankSpan): The tracing span of the detection.
+            capture_ts (float | None): Creation time of the camera frame, in seconds.
+        """
+        seq = self.seq.get(topic, 0) + 1
+        self.seq[topic] = seq
+        message = Message(content=annotations)
+        message.topic = topic
+        if isinstance(span, Span):
+            message.inject_tracing(span)
+        message.metadata["seq"] = seq
+        if capture_ts is not None:
+            message.metadata["capture_ts"] = capture_ts
+        try:
+            self.channel.publish(message)
+        except (ConnectionResetError, UnexpectedFrame, OSError):
+            self.log.warn("Resetting annotations channel due to connection error...")
+            self.channel = StreamChannel(self.broker_uri)
+
+    def close(self) -> None:
+        """Closes the publishing channel."""
+        self.channel.close()
@@ -0,0 +1,288 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from abc import ABC, abstractmethod
+import numpy as np
+import ast
+import cv2
+
+
+class BackendBoxes:
+    """Bounding boxes of one image, mirroring the fields of `ultralytics` `Boxes` used by `Detector`.
+
+    Attributes:
+        xyxy (np.ndarray): Boxes as [x1, y1, x2, y2] in original image coordinates, shape (N, 4).
+        conf (np.ndarray): Confidence of each box, shape (N,).
+        cls (np.ndarray): Class index of each box, shape (N,).
+    """
+
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray) -> None:
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+
+class BackendKeypoints:
+    """Keypoints of one image, mirroring the fields of `ultralytics` `Keypoints` used by `Detector`.
+
+    Attributes:
+        xy (np.ndarray): Keypoint coordinates in original image coordinates, shape (N, K, 2).
+            As in `ultralytics`, keypoints with a confidence below 0.5 are set to (0, 0).
+        conf (np.ndarray): Confidence of each keypoint, shape (N, K).
+    """
+
+    def __init__(self, xy: np.ndarray, conf: np.ndarray) -> None:
+        self.xy = xy
+        self.conf = conf
+
+
+class BackendResults:
+    """Inference results of one image, mirroring the `ultralytics` `Results` fields used by `Detector`.
+
+    Attributes:
+        boxes (BackendBoxes): Detected boxes, sorted by decreasing confidence.
+        keypoints (Optional[BackendKeypoints]): Keypoints of each box, or None for detection models.
+        orig_shape (Tuple[int, int]): (height, width) of the original image.
+    """
+
+    def __init__(self, boxes: BackendBoxes, keypoints: Optional[BackendKeypoints], orig_shape: Tuple[int, int]) -> None:
+        self.boxes = boxes
+        self.keypoints = keypoints
+        self.orig_shape = orig_shape
+
+
+class Backend(ABC):
+    """Base class for lean inference backends running exported YOLO models.
+
+    Reimplements the parts of the `ultralytics` predictor needed by `Detector`
+    (letterbox preprocessing, non-maximum suppression and box/keypoint decoding)
+    with NumPy and OpenCV only, so an exported graph can be run without the
+    per-call overhead of `YOLO.predict`. Subclasses only implement `forward`.
+
+    The `predict` method follows the signature of `YOLO.predict`, so a backend
+    can be used as a drop-in replacement of `Detector.model`.
+
+    Attributes:
+        input_shape (Optional[Tuple[int, int]]): Fixed (height, width) of the model input,
+            or None if the exported model accepts dynamic sizes.
+        batch_size (Optional[int]): Fixed batch size of the model input, or None if dynamic.
+        num_classes (int): Number of classes predicted by the model.
+        kpt_shape (Optional[Tuple[int, int]]): (number of keypoints, values per keypoint)
+            for pose models, or None for detection models.
+        end2end (bool): Whether the model outputs final detections without requiring NMS.
+        conf (float): Confidence threshold, defaults to the `ultralytics` default of 0.25.
+        iou (float): IoU threshold for NMS, defaults to the `ultralytics` default of 0.7.
+        max_det (int): Maximum number of detections kept per image.
+    """
+
+    stride = 32
+    max_nms = 30000
+    max_wh = 7680
+
+    def __init__(
+        self,
+        input_shape: Optional[Tuple[int, int]],
+        batch_size: Optional[int],
+        metadata: Dict[str, Any],
+        conf: float = 0.25,
+        iou: float = 0.7,
+        max_det: int = 300
+    ) -> None:
+        """Initializes the backend from the properties of the exported model.
+
+        Args:
+            input_shape (Optional[Tuple[int, int]]): Fixed (height, width) of the model input, or None.
+            batch_size (Optional[int]): Fixed batch size of the model input, or None.
+            metadata (Dict[str, Any]): Metadata written by the `ultralytics` exporter
+                ("names", "kpt_shape", "end2end", ...). Values may be strings.
+            conf (float): Confidence threshold.
+            iou (float): IoU threshold for NMS.
+            max_det (int): Maximum number of detections kept per image.
+        """
+        metadata = {key: self.parse_metadata_value(value) for key, value in metadata.items()}
+        self.input_shape = input_shape
+        self.batch_size = batch_size
+        self.num_classes = len(metadata.get("names", {0: "Tiffany"}))
+        kpt_shape = metadata.get("kpt_shape")
+        self.kpt_shape = tuple(kpt_shape) if kpt_shape else None
+        self.end2end = bool(metadata.get("end2end", False))
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+
+    @staticmethod
+    def parse_metadata_value(value: Any) -> Any:
+        """Parses a metadata value stored as a string by the exporter (e.g., "[2, 3]")."""
+        if not isinstance(value, str):
+            return value
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+
+    @abstractmethod
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        """Runs the exported model.
+
+        Args:
+            batch (np.ndarray): Preprocessed images, float32 NCHW in [0, 1].
+
+        Returns:
+            np.ndarray: Raw model output, shape (N, 4 + nc + extra, anchors), or
+                (N, max_det, 6 + extra) for end-to-end models.
+        """
+
+    def letterbox(
+        self, img: np.ndarray, imgsz: int, auto: bool = True
+    ) -> Tuple[np.ndarray, Tuple[float, float], Tuple[int, int]]:
+        """Resizes and pads an image exactly like the `ultralytics` `LetterBox` transform.
+
+        Models with a fixed input shape are padded to that shape; dynamic models
+        get the minimum stride-aligned rectangle, as `YOLO.predict` does for `.pt` models,
+        unless `auto` is False.
+
+        Args:
+            img (np.ndarray): BGR image.
+            imgsz (int): Inference size used when the model input shape is dynamic.
+            auto (bool): If False, dynamic models are also padded to the full
+                `imgsz` square, so images of different shapes can be stacked.
+
+        Returns:
+            Tuple[np.ndarray, Tuple[float, float], Tuple[int, int]]: The letterboxed image,
+                the (x, y) resize gains and the (left, top) padding.
+        """
+        shape = img.shape[:2]
+        new_shape = self.input_shape or (imgsz, imgsz)
+        r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+        new_unpad = round(shape[1] * r), round(shape[0] * r)
+        dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]
+        if self.input_shape is None and auto:
+            dw, dh = dw % self.stride, dh % self.stride
+        dw, dh = dw / 2, dh / 2
+
+        if (shape[1], shape[0]) != new_unpad:
+            img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
+        top, bottom = round(dh - 0.1), round(dh + 0.1)
+        left, right = round(dw - 0.1), round(dw + 0.1)
+        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        gain = (new_unpad[0] / shape[1], new_unpad[1] / shape[0])
+        return img, gain, (left, top)
+
+    @staticmethod
+    def to_blob(imgs: List[np.ndarray]) -> np.ndarray:
+        """Converts letterboxed BGR images into a float32 NCHW RGB batch in [0, 1]."""
+        batch = np.stack(imgs)[..., ::-1].transpose(0, 3, 1, 2)
+        return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+    @staticmethod
+    def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+        """Greedy non-maximum suppression.
+
+        Args:
+            boxes (np.ndarray): Boxes as [x1, y1, x2, y2], shape (N, 4).
+            scores (np.ndarray): Score of each box, shape (N,).
+            iou_threshold (float): Boxes overlapping a kept box above this IoU are discarded.
+
+        Returns:
+            np.ndarray: Indices of the kept boxes, sorted by decreasing score.
+        """
+        x1, y1, x2, y2 = boxes.T
+        areas = (x2 - x1) * (y2 - y1)
+        order = scores.argsort()[::-1]
+        keep = []
+        while order.size:
+            i = order[0]
+            keep.append(i)
+            rest = order[1:]
+            w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+            h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+            inter = w * h
+            iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+            order = rest[iou <= iou_threshold]
+        return np.array(keep, dtype=np.int64)
+
+    def postprocess(
+        self,
+        output: np.ndarray,
+        gain: Tuple[float, float],
+        pad: Tuple[int, int],
+        orig_shape: Tuple[int, int]
+    ) -> BackendResults:
+        """Filters, suppresses and rescales the raw output of one image.
+
+        Args:
+            output (np.ndarray): Raw model output of one image.
+            gain (Tuple[float, float]): (x, y) resize gains returned by `letterbox`.
+            pad (Tuple[int, int]): (left, top) padding returned by `letterbox`.
+            orig_shape (Tuple[int, int]): (height, width) of the original image.
+
+        Returns:
+            BackendResults: Boxes and keypoints in original image coordinates.
+        """
+        if self.end2end:
+            xyxy, conf, cls, extra = output[:, :4], output[:, 4], output[:, 5], output[:, 6:]
+            selected = np.flatnonzero(conf > self.conf)[:self.max_det]
+        else:
+            pred = output.T
+            xywh, scores, extra = pred[:, :4], pred[:, 4:4 + self.num_classes], pred[:, 4 + self.num_classes:]
+            cls = scores.argmax(axis=1)
+            conf = scores[np.arange(len(scores)), cls]
+            candidates = np.flatnonzero(conf > self.conf)
+            candidates = candidates[np.argsort(-conf[candidates])][:self.max_nms]
+            xyxy = np.empty_like(xywh)
+            xyxy[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+            xyxy[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+            offsets = cls[candidates, None] * self.max_wh
+            kept = self.nms(xyxy[candidates] + offsets, conf[candidates], self.iou)
+            selected = candidates[kept][:self.max_det]
+
+        height, width = orig_shape
+        boxes = xyxy[selected].astype(np.float32)
+        boxes[:, [0, 2]] = np.clip((boxes[:, [0, 2]] - pad[0]) / gain[0], 0, width)
+        boxes[:, [1, 3]] = np.clip((boxes[:, [1, 3]] - pad[1]) / gain[1], 0, height)
+        result_boxes = BackendBoxes(boxes, conf[selected].astype(np.float32), cls[selected].astype(np.float32))
+
+        keypoints = None
+        if self.kpt_shape is not None:
+            kpts = extra[selected].reshape(len(selected), *self.kpt_shape).astype(np.float32)
+            xy = kpts[..., :2].copy()
+            xy[..., 0] = np.clip((xy[..., 0] - pad[0]) / gain[0], 0, width)
+            xy[..., 1] = np.clip((xy[..., 1] - pad[1]) / gain[1], 0, height)
+            if self.kpt_shape[1] == 3:
+                kpt_conf = kpts[..., 2]
+                # As `ultralytics` `Keypoints`, keypoints below 0.5 confidence are reported at (0, 0)
+                xy[kpt_conf < 0.5] = 0
+            else:
+                kpt_conf = np.ones(xy.shape[:2], dtype=np.float32)
+            keypoints = BackendKeypoints(xy, kpt_conf)
+        return BackendResults(result_boxes, keypoints, orig_shape)
+
+    def predict(self, source: Union[np.ndarray, List[np.ndarray]], imgsz: int = 640, verbose: bool = False) -> List[BackendResults]:
+        """Runs inference on one or several images, like `YOLO.predict`.
+
+        Images are stacked into a single forward pass when the model accepts
+        the batch size; otherwise they are run one at a time. As in `YOLO.predict`,
+        images of different shapes are padded to the full `imgsz` square so they
+        can be stacked.
+
+        Args:
+            source (Union[np.ndarray, List[np.ndarray]]): BGR image or list of images.
+            imgsz (int): Inference size, ignored when the model has a fixed input shape.
+            verbose (bool): Unused, kept for compatibility with `YOLO.predict`.
+
+        Returns:
+            List[BackendResults]: One result per input image.
+        """
+        imgs = source if isinstance(source, list) else [source]
+        auto = len({img.shape for img in imgs}) == 1
+        letterboxed = [self.letterbox(img, imgsz, auto) for img in imgs]
+        same_shape = len({lb[0].shape for lb in letterboxed}) == 1
+        if same_shape and self.batch_size in (None, len(imgs)):
+            outputs = self.forward(self.to_blob([lb[0] for lb in letterboxed]))
+        else:
+            outputs = np.concatenate([self.forward(self.to_blob([lb[0]])) for lb in letterboxed])
+        return [
+            self.postprocess(output, gain, pad, img.shape[:2])
+            for output, img, (_, gain, pad) in zip(outputs, imgs, letterboxed)
+        ]
@@ -0,0 +1,210 @@
+from google.protobuf.wrappers_pb2 import FloatValue
+from is_wire.core import StatusCode, Status, Subscription
+from opencensus.trace.blank_span import BlankSpan
+from is_msgs.image_pb2 import ObjectAnnotations
+from amqp.exceptions import UnexpectedFrame
+from .StreamChannel import StreamChannel
+from .Connection import Connection
+from .AnnotationsPublisher import AnnotationsPublisher
+from .Threading import Threading
+from .Detector import Detector
+from .Metrics import Metrics
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+class BatchKeypoints:
+    """Serves several cameras from a single keypoints loop and a single model.
+
+    The keypoints model runs on tiny crops, so a single crop barely uses the
+    CPU and the per-call overhead dominates. This class subscribes to the
+    detections of every camera on one channel, gathers the latest detection of
+    each within a short window, crops the matching frames and runs one batched
+    `Detector.predict_batch` call. Each result is mapped back with its own
+    offset and stored in the per-camera `Threading` instance, which keeps
+    serving its own `Tiffany.Keypoints.{id}.*` endpoints.
+
+    Attributes:
+        cameras (dict[int, Threading]): Per-camera state and RPC handlers, keyed by camera ID.
+        detection_event (threading.Event): Set while the batched keypoints loop is running.
+        window (float): Maximum time to wait for the detections of the other cameras, in seconds.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        detector: Detector,
+        camera_ids: list[int],
+        window: float = 0.01,
+        stream_fps: float = 15.0,
+        stream_budget: float | None = None,
+        encoder_workers: int = 2,
+        metrics: Metrics | None = None,
+        frame_buffer_size: int = 30,
+        match_tolerance: float = 0.02
+    ):
+        """Initializes the batched keypoints manager.
+
+        Args:
+            connection (Connection): Manages the broker connection.
+            detector (Detector): Responsible for running predictions, shared by all cameras.
+            camera_ids (list[int]): IDs of the cameras served by this process.
+            window (float): Maximum time to wait for the detections of the other cameras
+                after the first one arrives, in seconds.
+            stream_fps (float): Maximum rate of the annotated stream of every camera. No cap when 0.
+            stream_budget (float | None): Target bytes per second of each camera's annotated stream.
+            encoder_workers (int): Number of threads encoding the annotated frames of all cameras.
+            metrics (Metrics | None): Registry shared by the batched loop and every camera.
+            frame_buffer_size (int): Number of recent frames kept per camera (see `FrameBuffer`).
+            match_tolerance (float): Maximum capture time difference between a detection and
+                the frame it crops, in seconds.
+        """
+        self.connection = connection
+        self.log = connection.log
+        self.detector = detector
+        self.window = window
+        self.detection_event = threading.Event()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.encoder_pool = ThreadPoolExecutor(max_workers=encoder_workers, thread_name_prefix="FrameEncoder")
+        self.cameras: dict[int, Threading] = {
+            camera_id: Threading(
+                connection,
+                detector,
+                camera_id,
+                batch=self,
+                stream_fps=stream_fps,
+                stream_budget=stream_budget,
+                encoder_pool=self.encoder_pool,
+                metrics=self.metrics,
+                frame_buffer_size=frame_buffer_size,
+                match_tolerance=match_tolerance
+            )
+            for camera_id in camera_ids
+        }
+
+    def subscribe_annotations(self) -> StreamChannel:
+        """Creates a channel subscribed to the detections of every served camera.
+
+        Returns:
+            StreamChannel: The channel bound to all `Tiffany.Detection.{id}.Annotations` topics.
+        """
+        channel_annotations = StreamChannel(self.connection.broker_uri)
+        subscription = Subscription(channel_annotations)
+        for camera_id in self.cameras:
+            subscription.subscribe(f"Tiffany.Detection.{camera_id}.Annotations")
+        return channel_annotations
+
+    def subscribe_cameras(self) -> dict[int, StreamChannel]:
+        """Creates one channel subscribed to the frames of each served camera.
+
+        Frames are kept on separate channels so each camera's `FrameBuffer`
+        only receives its own frames.
+
+        Returns:
+            dict[int, StreamChannel]: The channel bound to `CameraGateway.{id}.Frame`, keyed by camera ID.
+        """
+        return {camera_id: camera.subscribe_camera() for camera_id, camera in self.cameras.items()}
+
+    def detection_thread(self, minutes: FloatValue) -> None:
+        """Runs for a defined duration, inferring the crops of every camera in batches.
+
+        Designed to run as a daemon thread in the background. Each iteration
+        gathers the latest detection of each camera, crops its frame, runs a
+        single batched prediction and stores every result in the matching
+        camera's `Threading` instance.
+        """
+        from functions import get_images_from_cameras
+        self.detection_event.set()
+        for camera in self.cameras.values():
+            if camera.frame_buffer is not None:
+                camera.frame_buffer.clear()
+
+        channel_annotations = self.subscribe_annotations()
+        channel_cameras = self.subscribe_cameras()
+        frame_buffers = {camera_id: camera.frame_buffer for camera_id, camera in self.cameras.items()}
+        publisher = AnnotationsPublisher(self.connection.broker_uri, self.log)
+        exporter = self.connection.exporter
+
+        threading.current_thread().name = "BatchKeypointsThread"
+
+        duration_seconds = minutes.value * 60
+        start_time = time.time()
+        self.log.info(
+            f"Batched keypoints detection started for cameras {list(self.cameras)}. "
+            f"Duration: {duration_seconds / 60:.2f} minutes."
+        )
+        end_time = start_time + duration_seconds
+        while time.time() < end_time:
+            try:
+                frames = get_images_from_cameras(
+                    channel_annotations, channel_cameras, exporter, end_time,
+                    self.window, frame_buffers, self.metrics
+                )
+            except KeyboardInterrupt:
+                self.log.error("Shutting down...")
+                raise
+            except (ConnectionResetError, IndexError, UnexpectedFrame, TypeError):
+                continue
+            except OSError:
+                self.log.warn("Resetting server connection due to OSError...")
+                time.sleep(2.5)
+                channel_annotations = self.subscribe_annotations()
+                channel_cameras = self.subscribe_cameras()
+                continue
+
+            if not frames:
+                continue
+            camera_ids = [camera_id for camera_id in frames if camera_id in self.cameras]
+            imgs = [frames[camera_id][0] for camera_id in camera_ids]
+            start = time.perf_counter()
+            batch_results = dict(zip(camera_ids, self.detector.predict_batch(imgs)))
+            elapsed = time.perf_counter() - start
+            self.metrics.observe("stage_seconds", elapsed, stage="predict_batch")
+            self.metrics.set("batch_size", len(imgs))
+            self.detector.record_latency(elapsed)
+
+            for camera_id in camera_ids:
+                camera = self.cameras[camera_id]
+                _, tracer, span, offset, original_img, capture_ts = frames[camera_id]
+                with tracer.span(name="predict_tiffany"), camera.stage_timer.measure("results_to_dict"):
+                    result_dict = self.detector.results_to_dict(batch_results[camera_id], offset)
+
+                with tracer.span(name="pack_and_publish_detection"), camera.stage_timer.measure("publish"):
+                    camera.store_detection(result_dict, original_img, span, capture_ts, publisher)
+
+                tracer.end_span()
+        channel_annotations.close()
+        for channel_camera in channel_cameras.values():
+            channel_camera.close()
+        publisher.close()
+        self.log.info("Batched keypoints detection finished.")
+        for camera in self.cameras.values():
+            camera.set_last_detection_and_image_and_span(ObjectAnnotations(), None, BlankSpan())
+        self.detection_event.clear()
+
+    def init_detection(self, minutes: FloatValue, ctx) -> Status:
+        """Starts the detection services and the batched keypoints thread if not already running.
+
+        Exposed through the `StartDetection` endpoint of every served camera.
+
+        Args:
+            minutes (FloatValue): Desired duration of detection in minutes.
+            ctx: Service context provided by is-wire RPC.
+
+        Returns:
+            Status: `OK` if detection started, `ALREADY_EXISTS` if already running, or the
+                status of the first detection service that could not be started.
+        """
+        if not self.detection_event.is_set():
+            for camera_id, camera in self.cameras.items():
+                status = camera.start_detection_service(minutes)
+                if status.code not in (StatusCode.OK, StatusCode.ALREADY_EXISTS):
+                    self.log.warn(f"Detection service of camera {camera_id} not started: {status.why}")
+                    return Status(status.code, f"Detection service of camera {camera_id} not started: {status.why}")
+            thread = threading.Thread(target=self.detection_thread, args=(minutes,))
+            thread.daemon = True
+            thread.start()
+            return Status(StatusCode.OK, "Detection started")
+        else:
+            return Status(StatusCode.ALREADY_EXISTS, "Detection already running")
@@ -0,0 +1,92 @@
+from is_wire.core import Channel, Message, Subscription
+import socket
+import time
+
+class DetectionClient:
+    """Long-lived client of the `Tiffany.Detection.{id}.GetDetection` RPC.
+
+    A single channel and reply subscription are kept open for the whole
+    detection run instead of opening an AMQP connection per frame. Replies are
+    matched to requests by correlation ID, so late replies to abandoned
+    requests are discarded instead of being taken for the current one.
+
+    As soon as a reply is received, the next request is sent, so it is already
+    in flight while the caller crops and infers the current frame, and the
+    round trip is mostly hidden.
+
+    A channel is not thread-safe, so a client must only be used by the thread
+    that created it.
+
+    Attributes:
+        topic (str): Topic of the detection RPC.
+        timeout (float): Time after which an unanswered request is abandoned and sent again.
+        stale (int): Number of discarded replies to abandoned requests.
+    """
+
+    def __init__(self, broker_uri: str, camera_id: int, timeout: float = 1.0) -> None:
+        """Opens the channel and the reply subscription.
+
+        Args:
+            broker_uri (str): URI of the message broker.
+            camera_id (int): ID of the camera whose detections are requested.
+            timeout (float): Time after which an unanswered request is sent again, in seconds.
+        """
+        self.broker_uri = broker_uri
+        self.topic = f"Tiffany.Detection.{camera_id}.GetDetection"
+        self.timeout = timeout
+        self.stale = 0
+        self.channel = Channel(broker_uri)
+        self.subscription = Subscription(self.channel)
+        self._pending: int | None = None
+        self._sent_at = 0.0
+
+    def request(self) -> None:
+        """Sends a detection request, unless one is already in flight and not timed out."""
+        if self._pending is not None and time.time() - self._sent_at < self.timeout:
+            return
+        request = Message(reply_to=self.subscription)
+        self.channel.publish(request, topic=self.topic)
+        self._pending = request.correlation_id
+        self._sent_at = time.time()
+
+    def get(self, timeout: float | None = None) -> Message:
+        """Waits for the reply to the request in flight and sends the next request.
+
+        Args:
+            timeout (float | None): Maximum time to wait, in seconds. Defaults to `self.timeout`.
+
+        Returns:
+            Message: The reply of the detection service.
+
+        Raises:
+            socket.timeout: If no matching reply arrives within the timeout. The
+                request is sent again on the next call.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        self.request()
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise socket.timeout()
+            reply = self.channel.consume(timeout=remaining)
+            if reply.correlation_id == self._pending:
+                break
+            self.stale += 1
+        self._pending = None
+        self.request()
+        return reply
+
+    def reset(self) -> None:
+        """Reopens the channel and the subscription, e.g. after a connection error."""
+        try:
+            self.channel.close()
+        except Exception:
+            pass
+        self.channel = Channel(self.broker_uri)
+        self.subscription = Subscription(self.channel)
+        self._pending = None
+
+    def close(self) -> None:
+        """Closes the channel."""
+        self.channel.close()
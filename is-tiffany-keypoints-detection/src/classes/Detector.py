@@ -1,9 +1,14 @@
 from is_msgs.image_pb2 import ObjectAnnotation, BoundingPoly, Vertex, PointAnnotation
 from ultralytics.engine.results import Results
+from .OpenVinoBackend import OpenVinoBackend
+from .AdaptiveResolution import AdaptiveResolution
 from typing import List, Dict, Any
+from .OnnxBackend import OnnxBackend
 from ultralytics import YOLO
 import numpy as np
 
+BACKENDS = ("ultralytics", "onnxruntime", "openvino")
+
 
 class Detector:
     """Encapsulates the YOLO model for object detection.
@@ -11,19 +16,53 @@ class Detector:
     This class loads a trained YOLO model, runs inference on images,
     and provides helper methods to convert results into standardized
     formats used by the system.
+
+    Besides the default `ultralytics` backend, exported models can be run on
+    the CPU through lean ONNX Runtime or OpenVINO backends (see `Backend`),
+    which produce the same `results_to_dict` output.
+
+    With an `AdaptiveResolution` controller, the inference image size follows
+    the measured inference latency (see `record_latency`).
     """
 
-    def __init__(self, model_path: str, device: str = "cpu") -> None:
+    def __init__(
+        self,
+        model_path: str,
+        device: str = "cpu",
+        imgsz: int = 96,
+        backend: str = "ultralytics",
+        adaptive: AdaptiveResolution | None = None
+    ) -> None:
         """Initializes the YOLO object detector.
 
         Args:
             model_path (str): Path to the trained YOLO model file
-                (e.g., "yolov8n.pt").
+                (e.g., "yolov8n.pt"), or to the exported model when using
+                the "onnxruntime" or "openvino" backend.
             device (str): The device on which to load the model
-                ("cuda" or "cpu").
+                ("cuda" or "cpu"). Exported backends always run on the CPU.
+            imgsz (int): The inference image size.
+            backend (str): The inference backend, one of "ultralytics",
+                "onnxruntime" or "openvino".
+            adaptive (AdaptiveResolution | None): If given, the inference image size
+                starts at the largest size of its ladder (instead of `imgsz`) and
+                adapts to the load.
+
+        Raises:
+            ValueError: If the backend is not supported.
         """
-        self.model: YOLO = YOLO(model_path)
-        self.model.to(device)
+        if backend == "ultralytics":
+            self.model: YOLO | OnnxBackend | OpenVinoBackend = YOLO(model_path)
+            self.model.to(device)
+        elif backend == "onnxruntime":
+            self.model = OnnxBackend(model_path)
+        elif backend == "openvino":
+            self.model = OpenVinoBackend(model_path)
+        else:
+            raise ValueError(f"Invalid backend '{backend}', expected one of {BACKENDS}")
+        self.backend = backend
+        self.adaptive = adaptive
+        self.imgsz = adaptive.imgsz if adaptive is not None else imgsz
 
     def predict(self, img: np.ndarray) -> Results:
         """Runs object detection on a single image.
@@ -32,11 +71,35 @@ class Detector:
             img (np.ndarray): Input image as a NumPy array.
 
         Returns:
-            Results: A `ultralytics` results object containing detections.
+            Results: A `ultralytics` results object containing detections
+                (a `BackendResults` with the same fields for exported backends).
         """
-        results = self.model.predict(source=img, imgsz=96, verbose=False)
+        results = self.model.predict(source=img, imgsz=self.imgsz, verbose=False)
         return results[0]
 
+    def predict_batch(self, imgs: List[np.ndarray]) -> List[Results]:
+        """Runs keypoint detection on several crops in a single forward pass.
+
+        Crops of different shapes are letterboxed to the same `imgsz` square
+        so they can be stacked.
+
+        Args:
+            imgs (List[np.ndarray]): The cropped ROIs as NumPy arrays.
+
+        Returns:
+            List[Results]: One result per crop, in the same order as `imgs`.
+        """
+        return self.model.predict(source=imgs, imgsz=self.imgsz, verbose=False)
+
+    def record_latency(self, seconds: float) -> None:
+        """Reports the inference time of a crop at `imgsz`, adapting `imgsz` if enabled.
+
+        Args:
+            seconds (float): Time spent in `predict` for the last crop.
+        """
+        if self.adaptive is not None:
+            self.imgsz = self.adaptive.update(seconds)
+
     def results_to_dict(self, results: Results, offset: np.ndarray) -> Dict[str, List[dict]]:
         """Converts YOLO detection results into a standardized dictionary.
 
@@ -68,19 +131,33 @@ class Detector:
         num_results = len(results.boxes)
         if num_results > 0:
             results_dict["boxes"].append({
-                "conf": results.boxes.conf.numpy()[0],
-                "xyxy": results.boxes.xyxy.numpy()[0] + offset_4_x_1,
+                "conf": self.to_numpy(results.boxes.conf)[0],
+                "xyxy": self.to_numpy(results.boxes.xyxy)[0] + offset_4_x_1,
             })
+        # Plain detection models (see `FusedDetection`) have no keypoints
+        if num_results > 0 and results.keypoints is not None:
             results_dict["keypoints"].append({
-                "conf": results.keypoints.conf.numpy()[0][0],
-                "xy": results.keypoints.xy.numpy()[0][0] + offset,
+                "conf": self.to_numpy(results.keypoints.conf)[0][0],
+                "xy": self.to_numpy(results.keypoints.xy)[0][0] + offset,
             })
             results_dict["keypoints"].append({
-                "conf": results.keypoints.conf.numpy()[0][1],
-                "xy": results.keypoints.xy.numpy()[0][1] + offset,
+                "conf": self.to_numpy(results.keypoints.conf)[0][1],
+                "xy": self.to_numpy(results.keypoints.xy)[0][1] + offset,
             })
         return results_dict
 
+    @staticmethod
+    def to_numpy(values: np.ndarray | Any) -> np.ndarray:
+        """Converts a `torch` tensor from `ultralytics` results, or a backend array, to NumPy.
+
+        Args:
+            values (np.ndarray | torch.Tensor): Values of a results field.
+
+        Returns:
+            np.ndarray: The values as a NumPy array on the CPU.
+        """
+        return values.cpu().numpy() if hasattr(values, "cpu") else np.asarray(values)
+
     @staticmethod
     def dict_to_obj_annot(result_dict: Dict[str, Any]) -> ObjectAnnotation:
         """Converts a detection dictionary into the `ObjectAnnotation` format from `is-msgs`.
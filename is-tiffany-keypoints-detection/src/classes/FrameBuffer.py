@@ -0,0 +1,114 @@
+from is_wire.core import Channel, Message
+from collections import deque
+import threading
+import socket
+import time
+
+class FrameBuffer:
+    """Ring of the most recent camera frames, indexed by capture time.
+
+    A detection arrives some time after the frame it was computed on, when the
+    camera has usually published newer frames already. Cropping the latest frame
+    with that box often misses the robot. The buffer keeps the last `size`
+    frames, still encoded, so each detection can crop the exact frame it was
+    computed on, identified by its capture time (the `capture_ts` metadata of
+    published detections), or the nearest one within `tolerance`. Only the
+    chosen frame is decoded.
+
+    A channel is not thread-safe, so the buffer must be filled by the thread
+    that owns the camera channel.
+
+    Attributes:
+        size (int): Maximum number of buffered frames.
+        tolerance (float): Maximum difference between the capture times of the
+            detection and of the matched frame, in seconds.
+        matched (int): Number of detections matched to a buffered frame.
+        unmatched (int): Number of detections that fell back to the latest frame.
+    """
+
+    def __init__(self, size: int = 30, tolerance: float = 0.02, wait: float = 0.1) -> None:
+        """Initializes an empty buffer.
+
+        Args:
+            size (int): Maximum number of buffered frames.
+            tolerance (float): Maximum capture time difference of a match, in seconds.
+            wait (float): Maximum time to wait for the frame of a detection that is
+                newer than every buffered frame, in seconds.
+        """
+        self.size = size
+        self.tolerance = tolerance
+        self.wait = wait
+        self.frames: deque[tuple[float, Message]] = deque(maxlen=size)
+        self.matched = 0
+        self.unmatched = 0
+        self.lock = threading.Lock()
+
+    def fill(self, channel: Channel, timeout: float = 0.0) -> int:
+        """Moves the frames waiting in a channel into the buffer.
+
+        Args:
+            channel (Channel): Channel subscribed to the camera frames.
+            timeout (float): Maximum time to wait for the first frame, in seconds.
+
+        Returns:
+            int: The number of frames added.
+        """
+        added = 0
+        while True:
+            try:
+                message = channel.consume(timeout=timeout if added == 0 else 0.0)
+            except socket.timeout:
+                return added
+            with self.lock:
+                self.frames.append((message.created_at, message))
+            added += 1
+
+    def frame_for(self, channel: Channel, capture_ts: float | None, timeout: float = 1.0) -> Message | None:
+        """Fills the buffer and returns the frame a detection was computed on.
+
+        Args:
+            channel (Channel): Channel subscribed to the camera frames.
+            capture_ts (float | None): Capture time of the detection's frame, in seconds.
+                The latest frame is returned if None.
+            timeout (float): Maximum time to wait for a frame when the buffer is empty.
+
+        Returns:
+            Message | None: The frame captured closest to `capture_ts` within the
+                tolerance, otherwise the latest frame, or None if no frame arrived.
+        """
+        self.fill(channel, timeout=0.0 if self.frames else timeout)
+        if capture_ts is not None and self.frames and self.frames[-1][0] < capture_ts - self.tolerance:
+            # The frame of the detection has not been received yet
+            deadline = time.time() + self.wait
+            while time.time() < deadline and self.frames[-1][0] < capture_ts - self.tolerance:
+                if not self.fill(channel, timeout=max(deadline - time.time(), 0.0)):
+                    break
+        with self.lock:
+            if not self.frames:
+                return None
+            if capture_ts is not None:
+                timestamp, message = min(self.frames, key=lambda frame: abs(frame[0] - capture_ts))
+                if abs(timestamp - capture_ts) <= self.tolerance:
+                    self.matched += 1
+                    return message
+            self.unmatched += 1
+            return self.frames[-1][1]
+
+    def clear(self) -> None:
+        """Drops every buffered frame."""
+        with self.lock:
+            self.frames.clear()
+
+    def stats(self) -> dict[str, float]:
+        """Retrieves the match counters.
+
+        Returns:
+            dict[str, float]: The number of matched and unmatched detections and the match ratio.
+        """
+        with self.lock:
+            total = self.matched + self.unmatched
+            return {
+                "matched": self.matched,
+                "unmatched": self.unmatched,
+                "match_ratio": self.matched / total if total else 0.0,
+            }
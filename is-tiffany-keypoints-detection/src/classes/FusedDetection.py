@@ -0,0 +1,161 @@
+from is_msgs.image_pb2 import ObjectAnnotations, Resolution
+from opencensus.trace.blank_span import BlankSpan
+from opencensus.trace.span import Span
+from .AnnotationsPublisher import AnnotationsPublisher
+from .Connection import Connection
+from .Detector import Detector
+import numpy as np
+import threading
+import cv2
+
+class FusedDetection:
+    """Runs the robot detection model inside the keypoints service.
+
+    In fused mode a single process owns both models of a camera: each frame
+    is decoded once, the detection model finds the robot on the full frame and
+    the box is cropped from the frame already in memory for the keypoints
+    model. This removes the detection service hop (its RPC or topic, the
+    second camera subscription and the second decode).
+
+    The boxes are still stored for the `Tiffany.Detection.{id}.GetDetection`
+    RPC and published on `Tiffany.Detection.{id}.Annotations`, so consumers of
+    the detection service keep working. The frame of each box is kept too, for
+    the detection stream (`Threading.init_detection_stream`).
+
+    The publisher channel is not thread-safe, so `detect` must only be called
+    by the thread that fetches the frames.
+
+    Attributes:
+        detector (Detector): The detection model, run on full frames.
+        topic (str): Topic on which the boxes are published.
+        stream_event (threading.Event): Set while the detection stream is running.
+    """
+
+    def __init__(self, connection: Connection, detector: Detector) -> None:
+        """Initializes the fused detection stage.
+
+        Args:
+            connection (Connection): An object that manages the broker connection.
+            detector (Detector): The robot detection model (e.g. loaded from the
+                detection service's model file, with its inference size).
+        """
+        self.connection = connection
+        self.log = connection.log
+        self.detector = detector
+        self.topic = f"Tiffany.Detection.{connection.camera_id}.Annotations"
+        self.publisher: AnnotationsPublisher | None = None
+        self._last_detection = ObjectAnnotations()
+        self._last_image: np.ndarray | None = None
+        self._last_span: Span | BlankSpan = BlankSpan()
+        self.stream_event = threading.Event()
+        self.lock = threading.Lock()
+        # Notified, under `lock`, whenever a new box and frame are stored
+        self.new_detection = threading.Condition(self.lock)
+        self._version = 0
+
+    def detect(
+        self,
+        image: np.ndarray,
+        span: Span | BlankSpan,
+        capture_ts: float | None = None
+    ) -> dict:
+        """Detects the robot on a full frame, then stores and publishes the box.
+
+        Args:
+            image (np.ndarray): The decoded frame.
+            span (Span | BlankSpan): The tracing span of the frame.
+            capture_ts (float | None): Capture time of the frame, in seconds.
+
+        Returns:
+            dict: The detection data, as generated by `Detector.results_to_dict`,
+                with the best box (if any) in frame coordinates.
+        """
+        results = self.detector.predict(image)
+        result_dict = self.detector.results_to_dict(results, np.zeros(2))
+        if len(result_dict["boxes"]):
+            obj = ObjectAnnotations(
+                objects=[self.detector.dict_to_obj_annot(result_dict)],
+                resolution=Resolution(height=image.shape[0], width=image.shape[1]),
+                frame_id=self.connection.camera_id
+            )
+            self.set_last_detection(obj, image, span)
+            if self.publisher is None:
+                self.publisher = AnnotationsPublisher(self.connection.broker_uri, self.log)
+            self.publisher.publish(self.topic, obj, span, capture_ts)
+        return result_dict
+
+    def set_last_detection(
+        self, detection: ObjectAnnotations, image: np.ndarray | None, span: Span | BlankSpan
+    ) -> None:
+        """Stores the last box with its frame and span, and wakes up the detection stream.
+
+        Args:
+            detection (ObjectAnnotations): The detected box.
+            image (np.ndarray | None): The frame the box was detected on.
+            span (Span | BlankSpan): The tracing span of the frame.
+        """
+        with self.lock:
+            self._last_detection = detection
+            self._last_image = image
+            self._last_span = span
+            self._version += 1
+            self.new_detection.notify_all()
+
+    def wait_for_detection(
+        self, version: int, timeout: float | None = None
+    ) -> tuple[int, ObjectAnnotations, np.ndarray | None, Span | BlankSpan] | None:
+        """Blocks until a box newer than `version` is stored.
+
+        Args:
+            version (int): Version of the last box already handled (0 for none).
+            timeout (float | None): Maximum time to wait, in seconds. Waits forever if None.
+
+        Returns:
+            tuple[int, ObjectAnnotations, np.ndarray | None, Span | BlankSpan] | None: The
+                version, box, frame and span of the latest stored box, or None if nothing
+                new was stored within the timeout.
+        """
+        with self.lock:
+            if not self.new_detection.wait_for(lambda: self._version != version, timeout):
+                return None
+            return self._version, self._last_detection, self._last_image, self._last_span
+
+    @staticmethod
+    def draw_detection(img: np.ndarray, det: ObjectAnnotations) -> np.ndarray:
+        """Draws the box and score of a detection on a copy of a frame, as the detection service does.
+
+        Args:
+            img (np.ndarray): The frame on which the box was detected.
+            det (ObjectAnnotations): The detection to draw, with at least one object.
+
+        Returns:
+            np.ndarray: The annotated copy of the frame.
+        """
+        img_to_draw = img.copy()
+        box = det.objects[0].region.vertices
+        bb1 = (int(box[0].x), int(box[0].y))
+        bb2 = (int(box[1].x), int(box[1].y))
+        cv2.rectangle(img_to_draw, bb1, bb2, (255, 255, 0), 2)
+        cv2.putText(
+            img_to_draw, f"Score: {det.objects[0].score:.2f}", (10, 30),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2
+        )
+        return img_to_draw
+
+    def get_last_detection(self, *args) -> ObjectAnnotations:
+        """Retrieves the last detected box.
+
+        Exposed as the `Tiffany.Detection.{id}.GetDetection` RPC method.
+
+        Returns:
+            ObjectAnnotations: The last box, with an empty list of keypoints.
+        """
+        with self.lock:
+            return self._last_detection
+
+    def reset(self) -> None:
+        """Clears the last box and closes the publisher, at the end of a detection run."""
+        self.set_last_detection(ObjectAnnotations(), None, BlankSpan())
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
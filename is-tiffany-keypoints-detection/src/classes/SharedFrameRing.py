@@ -0,0 +1,225 @@
+import numpy as np
+import mmap
+import os
+
+MAGIC = 0x54464652  # "TFFR"
+
+# File header: geometry of the ring and sequence number of the last written frame
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("slots", "<u4"),
+    ("height", "<u4"),
+    ("width", "<u4"),
+    ("channels", "<u4"),
+    ("head", "<u8"),
+])
+
+# One record per slot: sequence number (0 while being written), capture time and frame size
+SLOT_DTYPE = np.dtype([
+    ("seq", "<u8"),
+    ("capture_ts", "<f8"),
+    ("height", "<u4"),
+    ("width", "<u4"),
+])
+
+def ring_path(directory: str, camera_id: int) -> str:
+    """Builds the path of the shared frame ring of a camera.
+
+    Args:
+        directory (str): Directory holding the rings, e.g. "/dev/shm" or a volume
+            shared by the co-located services.
+        camera_id (int): ID of the camera.
+
+    Returns:
+        str: The path of the ring file.
+    """
+    return os.path.join(directory, f"tiffany_frames_{camera_id}")
+
+
+class SharedFrameRing:
+    """Fixed-slot ring of decoded frames in shared memory, with one writer and many readers.
+
+    The detection service decodes each camera frame once and writes it here.
+    Co-located services (e.g. keypoints) then read it as a NumPy view of the
+    memory-mapped file, without subscribing to the camera topic or decoding it
+    again.
+
+    Frames are numbered by a sequence number starting at 1. Frame `seq` is
+    stored in slot `seq % slots`. The writer zeroes the slot's sequence number,
+    copies the pixels, then publishes the new number, so readers can use
+    `valid` to check that a view was not overwritten while they used it.
+
+    Attributes:
+        path (str): Path of the memory-mapped file.
+        inode (int): Inode of the mapped file, to detect that the writer recreated the ring.
+        slots (int): Number of frames kept.
+        shape (tuple[int, int, int]): Largest (height, width, channels) frame a slot can hold.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        create: bool = False,
+        slots: int = 8,
+        shape: tuple[int, int, int] = (720, 1280, 3)
+    ) -> None:
+        """Creates or opens a ring.
+
+        Args:
+            path (str): Path of the memory-mapped file.
+            create (bool): If True, (re)creates the file as the writer of the ring.
+                Otherwise an existing ring is opened for reading.
+            slots (int): Number of frames kept, when creating.
+            shape (tuple[int, int, int]): Largest frame a slot can hold, when creating.
+
+        Raises:
+            FileNotFoundError: If the ring is opened for reading and does not exist yet.
+            ValueError: If the file is not a frame ring.
+        """
+        self.path = path
+        if create:
+            slot_bytes = int(np.prod(shape))
+            size = HEADER_DTYPE.itemsize + slots * SLOT_DTYPE.itemsize + slots * slot_bytes
+            # Replace rather than truncate, so readers of a previous ring never see it shrink under them
+            with open(f"{path}.tmp", "wb") as f:
+                f.truncate(size)
+            os.replace(f"{path}.tmp", path)
+        with open(path, "r+b" if create else "rb") as f:
+            access = mmap.ACCESS_WRITE if create else mmap.ACCESS_READ
+            self._mmap = mmap.mmap(f.fileno(), 0, access=access)
+            self.inode = os.fstat(f.fileno()).st_ino
+
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self._mmap)
+        if create:
+            self.header["slots"] = slots
+            self.header["height"], self.header["width"], self.header["channels"] = shape
+            self.header["head"] = 0
+            self.header["magic"] = MAGIC
+        elif self.header["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a shared frame ring")
+
+        self.slots = int(self.header["slots"])
+        self.shape = (int(self.header["height"]), int(self.header["width"]), int(self.header["channels"]))
+        self.meta = np.ndarray((self.slots,), dtype=SLOT_DTYPE, buffer=self._mmap, offset=HEADER_DTYPE.itemsize)
+        self.data = np.ndarray(
+            (self.slots, int(np.prod(self.shape))),
+            dtype=np.uint8,
+            buffer=self._mmap,
+            offset=HEADER_DTYPE.itemsize + self.slots * SLOT_DTYPE.itemsize
+        )
+
+    @property
+    def head(self) -> int:
+        """int: Sequence number of the last written frame, 0 if none."""
+        return int(self.header["head"])
+
+    def write(self, frame: np.ndarray, capture_ts: float) -> int | None:
+        """Copies a decoded frame into the next slot.
+
+        Args:
+            frame (np.ndarray): The BGR frame.
+            capture_ts (float): Capture time of the frame, in seconds.
+
+        Returns:
+            int | None: The sequence number of the frame, or None if it is larger than a slot.
+        """
+        height, width = frame.shape[:2]
+        if frame.size > self.data.shape[1] or frame.ndim != 3 or frame.shape[2] != self.shape[2]:
+            return None
+        seq = self.head + 1
+        slot = seq % self.slots
+        meta = self.meta[slot]
+        meta["seq"] = 0
+        self.data[slot, :frame.size] = frame.reshape(-1)
+        meta["capture_ts"], meta["height"], meta["width"] = capture_ts, height, width
+        meta["seq"] = seq
+        self.header["head"] = seq
+        return seq
+
+    def read(self, seq: int) -> np.ndarray | None:
+        """Returns a frame as a view of the shared memory, without copying it.
+
+        The view is overwritten `slots` frames later. Check `valid(seq)` after
+        using it, or copy the needed part first.
+
+        Args:
+            seq (int): Sequence number of the frame.
+
+        Returns:
+            np.ndarray | None: The (height, width, channels) view, or None if the
+                frame is not in the ring anymore (or yet).
+        """
+        meta = self.meta[seq % self.slots]
+        if seq <= 0 or meta["seq"] != seq:
+            return None
+        height, width = int(meta["height"]), int(meta["width"])
+        view = self.data[seq % self.slots, :height * width * self.shape[2]].reshape(height, width, self.shape[2])
+        return view if self.valid(seq) else None
+
+    def valid(self, seq: int) -> bool:
+        """Checks whether a frame is still in its slot.
+
+        Args:
+            seq (int): Sequence number of the frame.
+
+        Returns:
+            bool: True if the slot still holds this frame.
+        """
+        return seq > 0 and int(self.meta[seq % self.slots]["seq"]) == seq
+
+    def latest(self) -> tuple[int, float, np.ndarray] | None:
+        """Returns the last written frame.
+
+        Returns:
+            tuple[int, float, np.ndarray] | None: The sequence number, capture time and
+                view of the frame, or None if the ring is empty.
+        """
+        seq = self.head
+        capture_ts = float(self.meta[seq % self.slots]["capture_ts"])
+        view = self.read(seq)
+        return (seq, capture_ts, view) if view is not None else None
+
+    def find(self, capture_ts: float, tolerance: float) -> tuple[int, float, np.ndarray] | None:
+        """Looks up the frame captured closest to a given time.
+
+        Args:
+            capture_ts (float): Capture time to look for, in seconds.
+            tolerance (float): Maximum difference between the capture times, in seconds.
+
+        Returns:
+            tuple[int, float, np.ndarray] | None: The sequence number, capture time and
+                view of the frame, or None if no frame in the ring is within the tolerance.
+        """
+        meta = self.meta.copy()
+        candidates = np.flatnonzero(meta["seq"] > 0)
+        if candidates.size == 0:
+            return None
+        best = candidates[np.argmin(np.abs(meta["capture_ts"][candidates] - capture_ts))]
+        if abs(meta["capture_ts"][best] - capture_ts) > tolerance:
+            return None
+        seq = int(meta["seq"][best])
+        view = self.read(seq)
+        return (seq, float(meta["capture_ts"][best]), view) if view is not None else None
+
+    def replaced(self) -> bool:
+        """Checks whether the file at `path` is no longer the mapped one.
+
+        A restarted writer recreates the ring as a new file, while readers keep
+        the map of the old, unlinked one, whose frames no longer change.
+
+        Returns:
+            bool: True if the file was recreated or removed since it was opened.
+        """
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return True
+
+    def close(self) -> None:
+        """Unmaps the ring. The file is left in place for the other processes."""
+        del self.header, self.meta, self.data
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views returned by `read` are still in use; the map is released with them
+            pass
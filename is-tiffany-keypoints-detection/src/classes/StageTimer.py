@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from .Metrics import Metrics
+import threading
+import time
+
+class StageTimer:
+    """Thread-safe accumulator of per-stage processing times.
+
+    Each stage of the detection pipeline records how long it took for every
+    frame, allowing to find out which stage is the bottleneck.
+
+    When a `Metrics` registry is given, every sample is also recorded in its
+    `stage_seconds` histogram, labelled with the stage name.
+
+    Attributes:
+        stages (Dict[str, Dict[str, float]]): Accumulated statistics per stage name,
+            with the number of samples, the total, the last and the maximum time in seconds.
+    """
+
+    def __init__(self, metrics: Metrics | None = None) -> None:
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.metrics = metrics
+        self.lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Records the time spent by one frame in a stage.
+
+        Args:
+            stage (str): Name of the stage (e.g., "decode", "infer", "publish").
+            seconds (float): Elapsed time in seconds.
+        """
+        with self.lock:
+            stats = self.stages.setdefault(stage, {"count": 0, "total": 0.0, "last": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["last"] = seconds
+            stats["max"] = max(stats["max"], seconds)
+        if self.metrics is not None:
+            self.metrics.observe("stage_seconds", seconds, stage=stage)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """Context manager that records the time spent inside the block.
+
+        Args:
+            stage (str): Name of the stage being measured.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def summary(self, reset: bool = False) -> Dict[str, Dict[str, float]]:
+        """Returns the mean, last and maximum time of every stage, in milliseconds.
+
+        Args:
+            reset (bool): If True, clears the accumulated statistics afterwards.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Statistics per stage name.
+        """
+        with self.lock:
+            summary = {
+                stage: {
+                    "count": stats["count"],
+                    "mean_ms": 1000.0 * stats["total"] / stats["count"],
+                    "last_ms": 1000.0 * stats["last"],
+                    "max_ms": 1000.0 * stats["max"],
+                }
+                for stage, stats in self.stages.items() if stats["count"]
+            }
+            if reset:
+                self.stages = {}
+            return summary
+
+    def format(self, reset: bool = False) -> str:
+        """Formats the stage summary as a single log line.
+
+        Args:
+            reset (bool): If True, clears the accumulated statistics afterwards.
+
+        Returns:
+            str: One "stage=mean/max ms (n)" entry per stage.
+        """
+        return ", ".join(
+            f"{stage}={stats['mean_ms']:.1f}/{stats['max_ms']:.1f} ms ({stats['count']})"
+            for stage, stats in self.summary(reset).items()
+        )
@@ -1,7 +1,8 @@
 from is_wire.core import Channel
 from is_wire.core import Message
-from typing import Tuple, Union
+from typing import Dict, Optional, Tuple, Union
 import socket
+import time
 
 class StreamChannel(Channel):
     """Specialized class to consume only the latest message from a channel.
@@ -21,7 +22,11 @@ class StreamChannel(Channel):
         """
         super().__init__(uri=uri, exchange=exchange)
 
-    def consume_last(self, return_dropped: bool = False) -> Union[Message, Tuple[Message, int]]:
+    def consume_last(
+        self,
+        return_dropped: bool = False,
+        timeout: Optional[float] = None
+    ) -> Union[Message, Tuple[Message, int]]:
         """Consumes the latest available message from the channel, discarding previous ones.
 
         This method first waits for a message and then quickly consumes
@@ -31,6 +36,8 @@ class StreamChannel(Channel):
         Args:
             return_dropped (bool): If True, also returns the number of messages
                                 that were dropped. Defaults to False.
+            timeout (Optional[float]): Maximum time to wait for the first message,
+                                in seconds. Blocks forever if None (default).
 
         Returns:
             msg (Message | Tuple[Message, int]]): The latest available message.
@@ -43,10 +50,59 @@ class StreamChannel(Channel):
                             of the initial consume call.
         """
         dropped = 0
-        msg = super().consume()
+        msg = super().consume(timeout=timeout)
         while True:
             try:
                 msg = super().consume(timeout=0.0)
                 dropped += 1
             except socket.timeout:
                 return (msg, dropped) if return_dropped else msg
+
+    def consume_last_by_topic(
+        self,
+        return_dropped: bool = False,
+        timeout: Optional[float] = None,
+        window: float = 0.0,
+        topics: Optional[int] = None
+    ) -> Union[Dict[str, Message], Tuple[Dict[str, Message], int]]:
+        """Consumes the latest message of each topic, discarding previous ones.
+
+        Behaves like `consume_last`, but keeps one message per topic instead of a
+        single message overall. After the first message, it keeps waiting up to
+        `window` seconds for the other topics (e.g. the detections of the other
+        cameras), so they can be processed together.
+
+        Args:
+            return_dropped (bool): If True, also returns the number of messages
+                                that were dropped. Defaults to False.
+            timeout (Optional[float]): Maximum time to wait for the first message,
+                                in seconds. Blocks forever if None (default).
+            window (float): Maximum time to wait for more topics after the first
+                                message, in seconds.
+            topics (Optional[int]): Number of subscribed topics. Stops waiting as
+                                soon as every topic has a message.
+
+        Returns:
+            msgs (Dict[str, Message] | Tuple[Dict[str, Message], int]): The latest
+                                                    message of each topic, keyed by topic.
+                                                    If `return_dropped` is True,
+                                                    returns a tuple containing the
+                                                    messages and the number of dropped messages.
+
+        Raises:
+            socket.timeout: If no message is received within the timeout period
+                            of the initial consume call.
+        """
+        dropped = 0
+        msg = super().consume(timeout=timeout)
+        msgs = {msg.topic: msg}
+        deadline = time.time() + window
+        while True:
+            complete = topics is not None and len(msgs) >= topics
+            try:
+                msg = super().consume(timeout=0.0 if complete else max(deadline - time.time(), 0.0))
+                if msg.topic in msgs:
+                    dropped += 1
+                msgs[msg.topic] = msg
+            except socket.timeout:
+                return (msgs, dropped) if return_dropped else msgs
@@ -2,16 +2,34 @@ from is_wire.core import Message, StatusCode, Status, Subscription, Channel
 from is_msgs.image_pb2 import ObjectAnnotations, Resolution
 from google.protobuf.wrappers_pb2 import FloatValue
 from opencensus.trace.blank_span import BlankSpan
+from opencensus.trace import execution_context
 from amqp.exceptions import UnexpectedFrame
 from .StreamChannel import StreamChannel
+from .DetectionClient import DetectionClient
+from .FrameBuffer import FrameBuffer
+from .FusedDetection import FusedDetection
+from .SharedFrameRing import SharedFrameRing
 from opencensus.trace.span import Span
+from .AnnotationsPublisher import AnnotationsPublisher
+from concurrent.futures import ThreadPoolExecutor
+from concurrent import futures
+from .FrameEncoder import FrameEncoder
+from .LatestQueue import LatestQueue
+from .StageTimer import StageTimer
+from .Metrics import Metrics
 from .Connection import Connection
 from .Detector import Detector
+from collections import deque
+from typing import TYPE_CHECKING
 import numpy as np
 import threading
 import socket
 import time
 import cv2
+import os
+
+if TYPE_CHECKING:
+    from .BatchKeypoints import BatchKeypoints
 
 
 class Threading:
@@ -19,28 +37,106 @@ class Threading:
 
     This class encapsulates the logic to run two main threads:
     1. A continuous detection thread that consumes images and runs the model.
+       In pipelined mode it is split into decode, inference and publish stages
+       running in separate threads.
     2. An on-demand streaming thread that annotates images with detections
        and publishes them for a specified duration.
 
     A lock is used to ensure thread-safe access to the last detection data.
     """
 
-    def __init__(self, connection: Connection, detector: Detector):
+    def __init__(
+        self,
+        connection: Connection,
+        detector: Detector,
+        camera_id: int | None = None,
+        batch: "BatchKeypoints | None" = None,
+        pipelined: bool = False,
+        subscribe_detections: bool = True,
+        stream_fps: float = 15.0,
+        stream_budget: float | None = None,
+        encoder_pool: ThreadPoolExecutor | None = None,
+        metrics: Metrics | None = None,
+        frame_buffer_size: int = 30,
+        match_tolerance: float = 0.02,
+        frame_ring_path: str | None = None,
+        fused: FusedDetection | None = None,
+        frame_ring_timeout: float = 2.0
+    ):
         """Initializes the threading manager.
 
         Args:
             connection (Connection): An object that manages the broker connection.
             detector (Detector): An object responsible for running predictions.
+            camera_id (int | None): ID of the camera handled by this instance.
+                Defaults to the camera ID of the connection.
+            batch (BatchKeypoints | None): Shared batched keypoints loop. When given,
+                detection requests are forwarded to it instead of starting a
+                per-camera detection thread.
+            pipelined (bool): If True, runs detection as overlapping decode, inference
+                and publish stages instead of a single sequential loop.
+            subscribe_detections (bool): If True, subscribes to the detections published on
+                `Tiffany.Detection.{id}.Annotations`; otherwise polls the `GetDetection` RPC.
+            stream_fps (float): Maximum rate at which annotated frames are streamed. No cap when 0.
+            stream_budget (float | None): Target bytes per second of the annotated stream.
+                The JPEG quality, then the resolution, are lowered to meet it (see `FrameEncoder`).
+            encoder_pool (ThreadPoolExecutor | None): Pool on which annotated frames are encoded.
+                A pool of two threads is created if None.
+            metrics (Metrics | None): Registry in which the stage latencies, frame counters
+                and encoder statistics are recorded, labelled with the camera ID. A private
+                registry is created if None.
+            frame_buffer_size (int): Number of recent camera frames kept so that each detection
+                crops the frame it was computed on (see `FrameBuffer`). Disabled when 0, in
+                which case the latest frame is cropped.
+            match_tolerance (float): Maximum capture time difference between a detection and
+                the frame it crops, in seconds.
+            frame_ring_path (str | None): Path of the shared frame ring written by a co-located
+                detection service (see `SharedFrameRing`). When it can be opened, frames are read
+                from it instead of subscribing to the camera and decoding them. Ignored in fused
+                mode, which detects on the camera frames itself.
+            fused (FusedDetection | None): If given, the robot is detected in this process on
+                each camera frame (fused mode) instead of using the detection service.
+            frame_ring_timeout (float): Time, in seconds, after which a shared frame ring that
+                stopped advancing is left for the camera topic (see `refresh_frame_ring`).
         """
         self.connection = connection
         self.log = connection.log
         self.detector = detector
+        self.camera_id = connection.camera_id if camera_id is None else camera_id
+        self.batch = batch
+        self.pipelined = pipelined
+        self.subscribe_detections = subscribe_detections
+        self.stream_fps = stream_fps
+        self.encoder = FrameEncoder(budget=stream_budget, executor=encoder_pool)
+        # The detection stream of fused mode adapts to its own budget, on the same pool
+        self.detection_encoder = FrameEncoder(
+            budget=stream_budget, executor=self.encoder.executor
+        ) if fused is not None else None
+        self.metrics = (metrics if metrics is not None else Metrics()).child(camera=self.camera_id)
+        self.metrics.add_collector(self.collect_metrics)
+        self.stage_timer = StageTimer(self.metrics)
+        self._frame_times = deque(maxlen=30)
+        self.frame_buffer = FrameBuffer(frame_buffer_size, match_tolerance) if frame_buffer_size > 0 else None
+        self.match_tolerance = match_tolerance
+        self.frame_ring_path = frame_ring_path
+        self.frame_ring: SharedFrameRing | None = None
+        self.frame_ring_timeout = frame_ring_timeout
+        # Last head seen in the ring and when it last advanced; inode and head of a ring left as stale
+        self._ring_head = 0
+        self._ring_advanced = 0.0
+        self._ring_next_check = 0.0
+        self._stale_ring: tuple[int, int] | None = None
+        self.fused = fused
+        self._last_timings_log = time.time()
         self._last_detection = ObjectAnnotations()
         self._last_span: Span | BlankSpan = BlankSpan()
         self._last_image: np.ndarray | None = None
         self.stream_event = threading.Event()
-        self.detection_event = threading.Event()
+        self.detection_event = batch.detection_event if batch is not None else threading.Event()
         self.lock = threading.Lock()
+        # Notified, under `lock`, whenever a new detection and image are stored
+        self.new_detection = threading.Condition(self.lock)
+        self._version = 0
 
     def detection_thread(self, minutes: FloatValue) -> None:
         """Runs for a defined duration to fetch images and perform detection.
@@ -50,19 +146,26 @@ class Threading:
         the most recent results. Also handles connection errors, attempting
         to reset the connection when needed.
         """
-        from functions import get_images_from_camera
         self.detection_event.set()
 
-        channel_camera = StreamChannel(self.connection.broker_uri)
-        Subscription(channel_camera).subscribe(f"CameraGateway.{self.connection.camera_id}.Frame")
+        self.open_frame_ring()
+        channel_camera = self.subscribe_camera()
+        channel_annotations = self.subscribe_annotations()
+        detection_client = self.create_detection_client()
+        if self.frame_buffer is not None:
+            self.frame_buffer.clear()
+        publisher = AnnotationsPublisher(self.connection.broker_uri, self.log)
         duration_seconds = minutes.value * 60
         threading.current_thread().name = "DetectionThread"
         start_time = time.time()
         self.log.info(f"Detection started. Duration: {duration_seconds / 60:.2f} minutes.")
         end_time = start_time + duration_seconds
         while time.time() < end_time:
+            channel_camera = self.refresh_frame_ring(channel_camera)
             try:
-                img, tracer, span, offset, original_img = get_images_from_camera(channel_camera, self.connection, end_time)
+                img, tracer, span, offset, original_img, capture_ts = self.next_crop(
+                    channel_camera, channel_annotations, detection_client, end_time
+                )
 
             except KeyboardInterrupt:
                 self.log.error("Shutting down...")
@@ -75,29 +178,415 @@ class Threading:
             except OSError:
                 self.log.warn("Restarting server connection due to OSError...")
                 time.sleep(2.5)
-                channel_camera = StreamChannel(self.connection.broker_uri)
-                Subscription(channel_camera).subscribe(f"CameraGateway.{self.connection.camera_id}.Frame")
+                channel_camera = self.subscribe_camera()
+                channel_annotations = self.subscribe_annotations()
+                if detection_client is not None:
+                    detection_client.reset()
                 continue
 
-            with tracer.span(name="predict_tiffany"):
-                results = self.detector.predict(img)
-                result_dict = self.detector.results_to_dict(results, offset)
+            with tracer.span(name="predict_tiffany"), self.stage_timer.measure("infer"):
+                result_dict = self.run_detector(img, offset)
 
-            with tracer.span(name="pack_and_publish_detection"):
-                if len(result_dict["boxes"]):
-                    obj = ObjectAnnotations(
-                        objects=[self.detector.dict_to_obj_annot(result_dict)],
-                        resolution=Resolution(height=720, width=1280),
-                        frame_id=self.connection.camera_id
-                    )
-                    self.set_last_detection_and_image_and_span(obj, original_img, span)
+            with tracer.span(name="pack_and_publish_detection"), self.stage_timer.measure("publish"):
+                self.store_detection(result_dict, original_img, span, capture_ts, publisher)
 
             tracer.end_span()
-        
+            self.log_stage_timings()
+
+        if channel_camera is not None:
+            channel_camera.close()
+        if channel_annotations is not None:
+            channel_annotations.close()
+        if detection_client is not None:
+            detection_client.close()
+        if self.fused is not None:
+            self.fused.reset()
+        publisher.close()
         self.log.info("Detection finished.")
         self.set_last_detection_and_image_and_span(ObjectAnnotations(), None, BlankSpan())
         self.detection_event.clear()
 
+    def subscribe_camera(self) -> StreamChannel | None:
+        """Creates a channel subscribed to the frames of the service's camera.
+
+        Returns:
+            StreamChannel | None: The channel bound to the `CameraGateway.{id}.Frame` topic,
+                or None when frames are read from the shared frame ring.
+        """
+        if self.frame_ring is not None:
+            return None
+        channel_camera = StreamChannel(self.connection.broker_uri)
+        Subscription(channel_camera).subscribe(f"CameraGateway.{self.camera_id}.Frame")
+        return channel_camera
+
+    def subscribe_annotations(self) -> StreamChannel | None:
+        """Creates a channel subscribed to the detections published by the detection service.
+
+        Returns:
+            StreamChannel | None: The channel bound to the `Tiffany.Detection.{id}.Annotations`
+                topic, or None when detections are requested through RPC or made in fused mode.
+        """
+        if not self.subscribe_detections or self.fused is not None:
+            return None
+        channel_annotations = StreamChannel(self.connection.broker_uri)
+        Subscription(channel_annotations).subscribe(f"Tiffany.Detection.{self.camera_id}.Annotations")
+        return channel_annotations
+
+    def open_frame_ring(self) -> None:
+        """Opens the shared frame ring, if configured, when a detection run starts.
+
+        The ring is created by the detection service, which may start later or be
+        restarted, so it is (re)opened at every run. If it cannot be opened, frames
+        are consumed from the camera topic instead.
+        """
+        if self.frame_ring is not None:
+            self.frame_ring.close()
+            self.frame_ring = None
+        if self.frame_ring_path is None or self.fused is not None:
+            return
+        try:
+            self.frame_ring = SharedFrameRing(self.frame_ring_path)
+        except (FileNotFoundError, ValueError) as e:
+            self.log.warn(f"Shared frame ring unavailable ({e}), subscribing to the camera instead.")
+            return
+        self._ring_head = self.frame_ring.head
+        self._ring_advanced = time.time()
+
+    def refresh_frame_ring(self, channel_camera: StreamChannel | None) -> StreamChannel | None:
+        """Checks, about once per second, that the shared frame ring is still being written.
+
+        A restarted detection service recreates the ring as a new file, so a ring
+        whose file was replaced is reopened. A ring that has not advanced for
+        `frame_ring_timeout` seconds (e.g. left behind by a stopped detection
+        service) is closed, and frames are consumed from the camera topic until
+        a new ring appears.
+
+        Args:
+            channel_camera (StreamChannel | None): The current camera channel of the caller.
+
+        Returns:
+            StreamChannel | None: The camera channel to use from now on, None while
+                frames are read from the ring.
+        """
+        now = time.time()
+        if self.frame_ring_path is None or self.fused is not None or now < self._ring_next_check:
+            return channel_camera
+        self._ring_next_check = now + 1.0
+
+        if self.frame_ring is None:
+            # Rejoin the ring once it is recreated or written again, but not while it stays stale
+            if not os.path.exists(self.frame_ring_path):
+                return channel_camera
+            self.open_frame_ring()
+            if self.frame_ring is None:
+                return channel_camera
+            if (self.frame_ring.inode, self.frame_ring.head) == self._stale_ring:
+                self.frame_ring.close()
+                self.frame_ring = None
+                return channel_camera
+            self._stale_ring = None
+            self.log.info("Shared frame ring available again, reading frames from it.")
+            if channel_camera is not None:
+                channel_camera.close()
+            return None
+
+        head = self.frame_ring.head
+        if head != self._ring_head:
+            self._ring_head, self._ring_advanced = head, now
+            return channel_camera
+        if self.frame_ring.replaced():
+            self.log.info("Shared frame ring was recreated, reopening it.")
+            self.open_frame_ring()
+        elif now - self._ring_advanced >= self.frame_ring_timeout:
+            self.log.warn(
+                f"Shared frame ring has not advanced for {now - self._ring_advanced:.1f} s, "
+                "subscribing to the camera instead."
+            )
+            self._stale_ring = (self.frame_ring.inode, head)
+            self.frame_ring.close()
+            self.frame_ring = None
+        if self.frame_ring is None and channel_camera is None:
+            return self.subscribe_camera()
+        return channel_camera
+
+    def create_detection_client(self) -> DetectionClient | None:
+        """Creates the client requesting detections from the detection service.
+
+        Returns:
+            DetectionClient | None: A client of the `Tiffany.Detection.{id}.GetDetection` RPC,
+                or None when the published detections are subscribed to instead, or in fused mode.
+        """
+        if self.subscribe_detections or self.fused is not None:
+            return None
+        return DetectionClient(self.connection.broker_uri, self.camera_id)
+
+    def next_crop(
+        self,
+        channel_camera: StreamChannel | None,
+        channel_annotations: StreamChannel | None,
+        detection_client: DetectionClient | None,
+        end_time: float
+    ) -> tuple | None:
+        """Fetches the next detected robot crop, from the detection service or, in fused mode, in process.
+
+        Args:
+            channel_camera (StreamChannel | None): Channel subscribed to the camera frames.
+            channel_annotations (StreamChannel | None): Channel subscribed to the published detections.
+            detection_client (DetectionClient | None): Client of the `GetDetection` RPC.
+            end_time (float): The time at which to stop waiting for a detection.
+
+        Returns:
+            tuple | None: The tuple returned by `get_images_from_camera`, or None if no
+                crop was obtained before `end_time`.
+        """
+        from functions import get_images_from_camera, detect_and_crop
+        if self.fused is not None:
+            return detect_and_crop(
+                channel_camera, self.connection, end_time, self.fused, self.stage_timer, self.metrics
+            )
+        return get_images_from_camera(
+            channel_camera, self.connection, end_time, self.stage_timer,
+            channel_annotations, self.metrics, detection_client, self.frame_buffer,
+            self.frame_ring, self.match_tolerance
+        )
+
+    def pipelined_detection_thread(self, minutes: FloatValue) -> None:
+        """Runs for a defined duration, detecting with overlapping pipeline stages.
+
+        Produces the same results as `detection_thread`, but fetching and cropping,
+        inference, and packing run in separate threads joined by latest-only queues.
+        While crop N is being inferred, crop N+1 is already being fetched and
+        decoded; when inference falls behind, stale crops are dropped instead of queued.
+
+        Args:
+            minutes (FloatValue): Duration of detection in minutes.
+        """
+        self.detection_event.set()
+        threading.current_thread().name = "DetectionThread"
+
+        duration_seconds = minutes.value * 60
+        end_time = time.time() + duration_seconds
+        self.log.info(f"Pipelined detection started. Duration: {duration_seconds / 60:.2f} minutes.")
+
+        self.open_frame_ring()
+        decoded = LatestQueue(maxsize=1)
+        # Set when publishing ends, so the decode stage stops even if a later stage failed
+        stop = threading.Event()
+        inferred = LatestQueue(maxsize=1)
+        stages = [
+            threading.Thread(target=self.decode_stage, args=(decoded, end_time, stop), name="DecodeStage"),
+            threading.Thread(target=self.infer_stage, args=(decoded, inferred), name="InferStage"),
+        ]
+        for stage in stages:
+            stage.daemon = True
+            stage.start()
+        try:
+            self.publish_stage(inferred)
+        except Exception as e:
+            self.log.error(f"Publish stage failed: {e!r}")
+        # Unblock the other stages, whichever one ended the pipeline
+        stop.set()
+        decoded.close()
+        for stage in stages:
+            stage.join()
+
+        self.log.info(f"Pipelined detection finished. Dropped crops: decode={decoded.dropped}, infer={inferred.dropped}.")
+        self.metrics.inc("frames_dropped_total", decoded.dropped, stage="decode")
+        self.metrics.inc("frames_dropped_total", inferred.dropped, stage="infer")
+        self.set_last_detection_and_image_and_span(ObjectAnnotations(), None, BlankSpan())
+        self.detection_event.clear()
+
+    def decode_stage(self, decoded: LatestQueue, end_time: float, stop: threading.Event) -> None:
+        """Pipeline stage that fetches detections and crops decoded frames until `end_time`.
+
+        Args:
+            decoded (LatestQueue): Output queue of the tuples returned by
+                `get_images_from_camera`. Closed when the stage finishes.
+            end_time (float): The time at which the stage stops.
+            stop (threading.Event): Stops the stage early when set, e.g. when a later stage failed.
+        """
+        try:
+            channel_camera = self.subscribe_camera()
+            channel_annotations = self.subscribe_annotations()
+            detection_client = self.create_detection_client()
+            if self.frame_buffer is not None:
+                self.frame_buffer.clear()
+            while time.time() < end_time and not stop.is_set():
+                channel_camera = self.refresh_frame_ring(channel_camera)
+                try:
+                    frame = self.next_crop(channel_camera, channel_annotations, detection_client, end_time)
+                except (ConnectionResetError, IndexError, UnexpectedFrame, TypeError):
+                    continue
+                except OSError:
+                    self.log.warn("Restarting server connection due to OSError...")
+                    time.sleep(2.5)
+                    channel_camera = self.subscribe_camera()
+                    channel_annotations = self.subscribe_annotations()
+                    if detection_client is not None:
+                        detection_client.reset()
+                    continue
+                if frame is not None:
+                    decoded.put(frame)
+            if channel_camera is not None:
+                channel_camera.close()
+            if channel_annotations is not None:
+                channel_annotations.close()
+            if detection_client is not None:
+                detection_client.close()
+            if self.fused is not None:
+                self.fused.reset()
+        except Exception as e:
+            self.log.error(f"Decode stage failed: {e!r}")
+        finally:
+            decoded.close()
+
+    def infer_stage(self, decoded: LatestQueue, inferred: LatestQueue) -> None:
+        """Pipeline stage that runs the detector on the cropped ROIs.
+
+        Args:
+            decoded (LatestQueue): Input queue of the tuples returned by `get_images_from_camera`.
+            inferred (LatestQueue): Output queue of (result_dict, original_img, tracer, span,
+                capture_ts) tuples. Closed when the input queue is exhausted.
+        """
+        try:
+            while True:
+                frame = decoded.get()
+                if frame is None:
+                    break
+                img, tracer, span, offset, original_img, capture_ts = frame
+                execution_context.set_current_span(span)
+                with tracer.span(name="predict_tiffany"), self.stage_timer.measure("infer"):
+                    result_dict = self.run_detector(img, offset)
+                inferred.put((result_dict, original_img, tracer, span, capture_ts))
+        except Exception as e:
+            self.log.error(f"Inference stage failed: {e!r}")
+        finally:
+            inferred.close()
+
+    def publish_stage(self, inferred: LatestQueue) -> None:
+        """Pipeline stage that packs and stores inference results.
+
+        Args:
+            inferred (LatestQueue): Input queue of (result_dict, original_img, tracer, span,
+                capture_ts) tuples.
+        """
+        publisher = AnnotationsPublisher(self.connection.broker_uri, self.log)
+        try:
+            while True:
+                item = inferred.get()
+                if item is None:
+                    break
+                result_dict, original_img, tracer, span, capture_ts = item
+                execution_context.set_current_span(span)
+                with tracer.span(name="pack_and_publish_detection"), self.stage_timer.measure("publish"):
+                    self.store_detection(result_dict, original_img, span, capture_ts, publisher)
+                tracer.end_span()
+                self.log_stage_timings()
+        finally:
+            publisher.close()
+
+    def store_detection(
+        self,
+        result_dict: dict,
+        image: np.ndarray,
+        span: Span | BlankSpan,
+        capture_ts: float | None = None,
+        publisher: AnnotationsPublisher | None = None
+    ) -> None:
+        """Packs a detection dictionary and stores it as the latest detection.
+
+        Crops without detections are ignored, keeping the previous result, but
+        every crop is counted in the metrics.
+        When a publisher is given, the keypoints are also published on the
+        `Tiffany.Keypoints.{id}.Annotations` topic.
+
+        Args:
+            result_dict (dict): Detection data, as generated by `Detector.results_to_dict`.
+            image (np.ndarray): The full image the ROI was cropped from.
+            span (Span | BlankSpan): The tracing span associated with the detection.
+            capture_ts (float | None): Capture time of the camera frame, in seconds.
+            publisher (AnnotationsPublisher | None): Publisher owned by the calling thread.
+        """
+        self._frame_times.append(time.time())
+        self.metrics.inc("frames_total")
+        if len(result_dict["boxes"]):
+            self.metrics.inc("detections_total")
+            obj = ObjectAnnotations(
+                objects=[self.detector.dict_to_obj_annot(result_dict)],
+                resolution=Resolution(height=720, width=1280),
+                frame_id=self.camera_id
+            )
+            self.set_last_detection_and_image_and_span(obj, image, span)
+            if publisher is not None:
+                publisher.publish(f"Tiffany.Keypoints.{self.camera_id}.Annotations", obj, span, capture_ts)
+
+    def run_detector(self, img: np.ndarray, offset: np.ndarray) -> dict:
+        """Runs `Detector.predict` and `Detector.results_to_dict`, timing each one as a stage.
+
+        Inference times are reported to the detector, which adapts its image size
+        to them when an `AdaptiveResolution` controller is set.
+
+        Args:
+            img (np.ndarray): The cropped ROI.
+            offset (np.ndarray): Coordinates (x1, y1) of the ROI in the original image.
+
+        Returns:
+            dict: Detection data in original image coordinates.
+        """
+        start = time.perf_counter()
+        results = self.detector.predict(img)
+        elapsed = time.perf_counter() - start
+        self.stage_timer.record("predict", elapsed)
+        self.detector.record_latency(elapsed)
+        with self.stage_timer.measure("results_to_dict"):
+            return self.detector.results_to_dict(results, offset)
+
+    def collect_metrics(self) -> None:
+        """Refreshes the gauges read on demand: frame rate, image size, encoder and frame buffer."""
+        now = time.time()
+        times = list(self._frame_times)
+        if len(times) > 1 and now - times[-1] < 2.0:
+            self.metrics.set("fps", (len(times) - 1) / max(times[-1] - times[0], 1e-6))
+        else:
+            self.metrics.set("fps", 0.0)
+        self.metrics.set("detection_running", float(self.detection_event.is_set()))
+        self.metrics.set("stream_running", float(self.stream_event.is_set()))
+        if self.fused is not None:
+            self.metrics.set("stream_running", float(self.fused.stream_event.is_set()), stream="detection")
+        self.metrics.set("imgsz", self.detector.imgsz)
+        if self.detector.adaptive is not None:
+            stats = self.detector.adaptive.stats()
+            self.metrics.set("adaptive_latency_ms", stats["latency_ms"])
+            self.metrics.set("adaptive_steps", stats["steps_down"], direction="down")
+            self.metrics.set("adaptive_steps", stats["steps_up"], direction="up")
+        for name, value in self.encoder.stats().items():
+            self.metrics.set(f"encoder_{name}", value)
+        if self.frame_buffer is not None:
+            for name, value in self.frame_buffer.stats().items():
+                self.metrics.set(f"frame_buffer_{name}", value)
+
+    def get_stage_timings(self) -> dict:
+        """Retrieves the per-stage timing statistics accumulated since the last log.
+
+        Returns:
+            dict: Count, mean, last and maximum time in milliseconds for each
+                  stage ("decode", "infer" and "publish").
+        """
+        return self.stage_timer.summary()
+
+    def log_stage_timings(self, interval: float = 10.0) -> None:
+        """Logs and resets the per-stage timings if `interval` seconds have passed.
+
+        Args:
+            interval (float): Minimum time between two logs, in seconds.
+        """
+        if time.time() - self._last_timings_log < interval:
+            return
+        self._last_timings_log = time.time()
+        self.log.info(f"Stage timings (mean/max): {self.stage_timer.format(reset=True)}")
+        if self.detector.adaptive is not None:
+            self.log.info(f"Adaptive resolution: {self.detector.adaptive.format()}")
+
     def set_last_detection_and_image_and_span(
         self, detection: ObjectAnnotations, image: np.ndarray, span: Span | BlankSpan
     ) -> None:
@@ -112,6 +601,8 @@ class Threading:
             self._last_detection = detection
             self._last_image = image
             self._last_span = span
+            self._version += 1
+            self.new_detection.notify_all()
 
     def get_last_detection(self, *args) -> ObjectAnnotations:
         """Safely retrieves the latest detection result.
@@ -131,6 +622,25 @@ class Threading:
         with self.lock:
             return self._last_image
             
+    def wait_for_detection(
+        self, version: int, timeout: float | None = None
+    ) -> tuple[int, ObjectAnnotations, np.ndarray | None, Span | BlankSpan] | None:
+        """Blocks until a detection newer than `version` is stored.
+
+        Args:
+            version (int): Version of the last detection already handled (0 for none).
+            timeout (float | None): Maximum time to wait, in seconds. Waits forever if None.
+
+        Returns:
+            tuple[int, ObjectAnnotations, np.ndarray | None, Span | BlankSpan] | None: The
+                version, detection, image and span of the latest stored detection, or
+                None if nothing new was stored within the timeout.
+        """
+        with self.lock:
+            if not self.new_detection.wait_for(lambda: self._version != version, timeout):
+                return None
+            return self._version, self._last_detection, self._last_image, self._last_span
+
     def get_last_span(self) -> Span | BlankSpan:
         """Safely retrieves the last tracing span.
 
@@ -140,56 +650,96 @@ class Threading:
         with self.lock:
             return self._last_span
 
-    def stream_detection_thread(self, minutes: FloatValue) -> None:
+    @staticmethod
+    def draw_detection(img: np.ndarray, det: ObjectAnnotations) -> np.ndarray:
+        """Draws the bounding box, keypoints and scores of a detection on a copy of an image.
+
+        Args:
+            img (np.ndarray): The image on which detection was performed.
+            det (ObjectAnnotations): The detection to draw, with at least one object.
+
+        Returns:
+            np.ndarray: The annotated copy of the image.
+        """
+        img_to_draw = img.copy()
+        kp = det.objects[0].keypoints
+
+        kp1 = [kp[0].position.x, kp[0].position.y]
+        kp2 = [kp[1].position.x, kp[1].position.y]
+        box = det.objects[0].region.vertices
+        bb1 = (int(box[0].x), int(box[0].y))
+        bb2 = (int(box[1].x), int(box[1].y))
+
+        cv2.rectangle(img_to_draw, bb1, bb2, (255, 255, 0), 2)
+        cv2.circle(img_to_draw, (int(kp1[0]), int(kp1[1])), 3, (0, 255, 0), -1)
+        cv2.circle(img_to_draw, (int(kp2[0]), int(kp2[1])), 3, (0, 0, 255), -1)
+        cv2.putText(img_to_draw, f"{kp[0].score:.2f} | {(kp[0].score - 0.99)*100}", (20, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        cv2.putText(img_to_draw, f"{kp[1].score:.2f} | {(kp[0].score - 0.99)*100}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+        cv2.putText(img_to_draw, f"{det.objects[0].score:.2f}", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 2)
+        return img_to_draw
+
+    def stream_detection_thread(self, minutes: FloatValue, fused: bool = False) -> None:
         """Draws detections on images and streams them for a defined duration.
 
-        Runs in a separate thread. Continuously fetches the latest detection,
-        draws bounding boxes and keypoints on a copy of the image, and publishes
-        it to a topic. Terminates after the specified duration.
+        Runs in a separate thread. Waits for a new detection to be stored and
+        hands it to the encoder pool, which draws bounding boxes and keypoints
+        on a copy of the image and encodes it, so several frames can be encoded
+        at once. Encoded frames are published to a topic in order, at most
+        `stream_fps` times per second. Detections stored in between are skipped.
+        Terminates after the specified duration.
 
         Args:
             minutes (FloatValue): Duration in minutes for streaming.
+            fused (bool): If True, streams the boxes of the fused detection model instead,
+                on the detection service's `Tiffany.{id}.Frame` topic.
         """
-        from functions import to_image
-        self.stream_event.set()
+        if fused:
+            event, encoder, source = self.fused.stream_event, self.detection_encoder, self.fused
+            draw, topic, labels = self.fused.draw_detection, f"Tiffany.{self.camera_id}.Frame", {"stream": "detection"}
+        else:
+            event, encoder, source = self.stream_event, self.encoder, self
+            draw, topic, labels = self.draw_detection, f"Tiffany.Keypoints.{self.camera_id}.Frame", {}
+        event.set()
         init_time = time.time()
-        threading.current_thread().name = "StreamThread"
+        threading.current_thread().name = "DetectionStreamThread" if fused else "StreamThread"
         duration_seconds = minutes.value * 60
         self.log.info(f"Streaming started. Duration: {duration_seconds / 60:.2f} minutes.")
         channel = Channel(self.connection.broker_uri)
-        
-        while time.time() - init_time < duration_seconds:
-            det = self.get_last_detection()
-            img = self.get_last_image()
-            span = self.get_last_span()
-
-            if img is None:
-                continue
-            
-            img_to_draw = img.copy()
-
-            if det.objects:
-                kp = det.objects[0].keypoints
-
-                kp1 = [kp[0].position.x, kp[0].position.y]
-                kp2 = [kp[1].position.x, kp[1].position.y]
-                box = det.objects[0].region.vertices
-                bb1 = (int(box[0].x), int(box[0].y))
-                bb2 = (int(box[1].x), int(box[1].y))
-
-                cv2.rectangle(img_to_draw, bb1, bb2, (255, 255, 0), 2)
-                cv2.circle(img, (int(kp1[0]), int(kp1[1])), 3, (0, 255, 0), -1)
-                cv2.circle(img, (int(kp2[0]), int(kp2[1])), 3, (0, 0, 255), -1)
-                cv2.putText(img, f"{kp[0].score:.2f} | {(kp[0].score - 0.99)*100}", (20, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                cv2.putText(img, f"{kp[1].score:.2f} | {(kp[0].score - 0.99)*100}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-                cv2.putText(img, f"{det.objects[0].score:.2f}", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 2)
-                
+        end_time = init_time + duration_seconds
+        min_interval = 1.0 / self.stream_fps if self.stream_fps > 0 else 0.0
+        version = 0
+        last_publish = 0.0
+        pending = deque()
+
+        while time.time() < end_time or pending:
+            now = time.time()
+            # Cap the stream rate; newer detections keep replacing the pending one meanwhile
+            next_time = min(last_publish + min_interval, end_time)
+            if now < next_time:
+                if pending:
+                    futures.wait([pending[0][0]], timeout=next_time - now)
+                else:
+                    time.sleep(next_time - now)
+            elif now < end_time:
+                # Only block briefly while encoded frames are waiting to be published
+                timeout = 0.01 if pending else min(1.0, end_time - now)
+                latest = source.wait_for_detection(version, timeout=timeout)
+                if latest is not None:
+                    version, det, img, span = latest
+                    if img is not None and det.objects:
+                        last_publish = time.time()
+                        pending.append((encoder.submit(draw, img, det), span))
+
+            # Publish encoded frames in order; wait for the oldest when too many are in flight
+            while pending and (pending[0][0].done() or len(pending) > 2 or time.time() >= end_time):
+                future, span = pending.popleft()
                 try:
                     msg = Message()
                     msg.inject_tracing(span)
-                    msg.topic = f"Tiffany.Keypoints.{self.connection.camera_id}.Frame"
-                    msg.pack(to_image(img_to_draw))
+                    msg.topic = topic
+                    msg.pack(future.result())
                     channel.publish(msg)
+                    self.metrics.inc("stream_frames_total", **labels)
                 except (UnexpectedFrame, ConnectionResetError, OSError):
                     self.log.warn("Restarting publishing connection...")
                     time.sleep(2.5)
@@ -199,8 +749,12 @@ class Threading:
                     self.log.error(f"Unexpected error while publishing: {e}")
                     continue
         
-        self.log.info("Streaming finished.")
-        self.stream_event.clear()
+        stats = encoder.stats()
+        self.log.info(
+            f"Streaming finished. Encoder quality={stats['quality']:.2f}, scale={stats['scale']:.2f}, "
+            f"{stats['bytes_per_second'] / 1000:.0f} kB/s."
+        )
+        event.clear()
 
     def init_stream(self, minutes: FloatValue, ctx) -> Status:
         """Starts the detection streaming thread if not already running.
@@ -213,11 +767,14 @@ class Threading:
             ctx: Service context provided by is-wire RPC.
 
         Returns:
-            Status: `OK` if the stream started, or `ALREADY_EXISTS` if one is already running.
+            Status: `OK` if the stream started, `ALREADY_EXISTS` if one is already running, or
+                the status of `init_detection` if detection was not running and could not start.
         """
         if not self.stream_event.is_set():
             if not self.detection_event.is_set():
-                self.init_detection(FloatValue(value=minutes.value + 1), ctx)
+                status = self.init_detection(FloatValue(value=minutes.value + 1), ctx)
+                if status.code != StatusCode.OK and status.code != StatusCode.ALREADY_EXISTS:
+                    return status
                 time.sleep(1.0)
             thread = threading.Thread(target=self.stream_detection_thread, args=(minutes,))
             thread.daemon = True
@@ -225,34 +782,84 @@ class Threading:
             return Status(StatusCode.OK, "Stream started")
         else:
             return Status(StatusCode.ALREADY_EXISTS, "Stream already running")
+
+    def init_detection_stream(self, minutes: FloatValue, ctx) -> Status:
+        """Starts the stream of the fused detection boxes if not already running.
+
+        Exposed as the `Tiffany.Detection.{id}.StartStream` RPC method in fused mode,
+        in place of the detection service's stream: the boxes are drawn as the
+        detection service draws them and published on `Tiffany.{id}.Frame`.
+
+        Args:
+            minutes (FloatValue): Desired duration of the stream in minutes.
+            ctx: Service context provided by is-wire RPC.
+
+        Returns:
+            Status: `OK` if the stream started, `ALREADY_EXISTS` if one is already running, or
+                `FAILED_PRECONDITION` if the service is not in fused mode.
+        """
+        if self.fused is None:
+            return Status(StatusCode.FAILED_PRECONDITION, "Not in fused mode")
+        if not self.fused.stream_event.is_set():
+            if not self.detection_event.is_set():
+                self.init_detection(FloatValue(value=minutes.value + 1), ctx)
+                time.sleep(1.0)
+            thread = threading.Thread(target=self.stream_detection_thread, args=(minutes, True))
+            thread.daemon = True
+            thread.start()
+            return Status(StatusCode.OK, "Stream started")
+        else:
+            return Status(StatusCode.ALREADY_EXISTS, "Stream already running")
     
+    def start_detection_service(self, minutes: FloatValue) -> Status:
+        """Asks the detection service of the camera to run a bit longer than this service.
+
+        Args:
+            minutes (FloatValue): Duration of detection in minutes.
+
+        Returns:
+            Status: The status replied by the detection service, or `DEADLINE_EXCEEDED`
+                if it did not answer.
+        """
+        channel = Channel(self.connection.broker_uri)
+        subscription = Subscription(channel)
+        request = Message(content=FloatValue(value=minutes.value + 1), reply_to=subscription)
+        channel.publish(request, topic=f"Tiffany.Detection.{self.camera_id}.StartDetection")
+        try:
+            reply = channel.consume(timeout=5.0)
+        except socket.timeout:
+            return Status(StatusCode.DEADLINE_EXCEEDED, 'No response from detection service')
+        finally:
+            channel.close()
+        return reply.status
+
     def init_detection(self, minutes: FloatValue, ctx) -> Status:
         """Starts the detection thread if not already running.
 
         Exposed as an RPC method. Checks if the detection thread is active using
         an event flag, and starts a new `detection_thread` if none is running.
+        The detection service is started first, except in fused mode, where this
+        service detects the robot itself (and serves its `StartDetection` topic).
 
         Args:
             minutes (FloatValue): Desired duration of detection in minutes.
             ctx: Service context provided by is-wire RPC.
 
         Returns:
-            Status: `OK` if detection started, or `ALREADY_EXISTS` if already running.
+            Status: `OK` if detection started, `ALREADY_EXISTS` if already running, or the
+                status of the detection service if it could not be started.
         """
+        if self.batch is not None:
+            return self.batch.init_detection(minutes, ctx)
         if not self.detection_event.is_set():
-            channel = Channel(self.connection.broker_uri)
-            subscription = Subscription(channel)
-            request = Message(content=FloatValue(value=minutes.value + 1), reply_to=subscription)
-            channel.publish(request, topic=f"Tiffany.Detection.{self.connection.camera_id}.StartDetection")
-            try:
-                reply = channel.consume(timeout=5.0)
-            except socket.timeout:
-                return Status(StatusCode.DEADLINE_EXCEEDED, 'No response from detection service')
-            if reply.status.code == StatusCode.OK or reply.status.code == StatusCode.ALREADY_EXISTS:
-                thread = threading.Thread(target=self.detection_thread, args=(minutes,))
-                thread.daemon = True
-                thread.start()
-            channel.close()
+            if self.fused is None:
+                status = self.start_detection_service(minutes)
+                if status.code != StatusCode.OK and status.code != StatusCode.ALREADY_EXISTS:
+                    return status
+            target = self.pipelined_detection_thread if self.pipelined else self.detection_thread
+            thread = threading.Thread(target=target, args=(minutes,))
+            thread.daemon = True
+            thread.start()
             return Status(StatusCode.OK, "Detection started")
         else:
             return Status(StatusCode.ALREADY_EXISTS, "Detection already running")
\ No newline at end of file
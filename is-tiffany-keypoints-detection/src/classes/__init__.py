@@ -1,4 +1,18 @@
+from .Backend import Backend, BackendResults
+from .OnnxBackend import OnnxBackend
+from .OpenVinoBackend import OpenVinoBackend
+from .AdaptiveResolution import AdaptiveResolution
 from .Detector import Detector
 from .Connection import Connection
 from .StreamChannel import StreamChannel
-from .Threading import Threading
\ No newline at end of file
+from .DetectionClient import DetectionClient
+from .FrameBuffer import FrameBuffer
+from .FusedDetection import FusedDetection
+from .SharedFrameRing import SharedFrameRing, ring_path
+from .AnnotationsPublisher import AnnotationsPublisher
+from .FrameEncoder import FrameEncoder
+from .LatestQueue import LatestQueue
+from .Metrics import Metrics
+from .StageTimer import StageTimer
+from .Threading import Threading
+from .BatchKeypoints import BatchKeypoints
@@ -1,3 +1,5 @@
 from .get_images_from_camera import get_images_from_camera
-from .to_np import to_np
+from .get_images_from_cameras import get_images_from_cameras
+from .detect_and_crop import detect_and_crop
+from .to_np import to_np, decode_factor, jpeg_size
 from .to_image import to_image
\ No newline at end of file
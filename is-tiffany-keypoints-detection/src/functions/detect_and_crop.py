@@ -0,0 +1,80 @@
+from is_wire.core import Tracer
+from is_msgs.image_pb2 import Image
+from opencensus.trace.blank_span import BlankSpan
+from classes import Connection, StreamChannel, StageTimer, Metrics, FusedDetection
+from contextlib import nullcontext
+from typing import Tuple
+from .get_images_from_camera import CONFIDENCE
+from .to_np import to_np
+import numpy as np
+import socket
+import time
+
+def detect_and_crop(
+    channel_camera: StreamChannel,
+    connection: Connection,
+    end_time: float,
+    fused: FusedDetection,
+    stage_timer: StageTimer | None = None,
+    metrics: Metrics | None = None
+) -> Tuple[np.ndarray, Tracer, BlankSpan, np.ndarray, np.ndarray, float] | None:
+    '''
+    Obtains the cropped image (ROI) by detecting the robot in the process (fused mode).
+
+    The latest camera frame is decoded once, the robot is detected on it by
+    `fused`, and the box is cropped from the decoded frame, without going
+    through the detection service.
+
+    Args:
+        channel_camera (StreamChannel): StreamChannel object for consuming camera frames.
+        connection (Connection): Connection object containing the exporter and camera ID.
+        end_time (float): The time at which to stop waiting for a detection.
+        fused (FusedDetection): The in-process detection stage.
+        stage_timer (StageTimer | None): If given, records the decode and detection times.
+        metrics (Metrics | None): If given, counts the frames dropped by `consume_last`
+            in "frames_dropped_total" and sets "queue_depth".
+
+    Returns:
+        Tuple[np.ndarray, Tracer, BlankSpan, np.ndarray, np.ndarray, float] | None: The same
+            tuple as `get_images_from_camera`: the crop, tracer, span, ROI offset, full frame
+            and capture time, or None if no crop was accepted before `end_time`.
+    '''
+    exporter = connection.exporter
+
+    while time.time() < end_time:
+        try:
+            message, dropped = channel_camera.consume_last(return_dropped=True, timeout=1.0)
+        except socket.timeout:
+            continue
+        if isinstance(message, bool):
+            continue
+        if metrics is not None:
+            metrics.inc("frames_dropped_total", dropped, stage="consume")
+            metrics.set("queue_depth", dropped)
+        tracer: Tracer = Tracer(
+            exporter=exporter,
+            span_context=message.extract_tracing()
+        )
+        span: BlankSpan = tracer.start_span(name="tiffany_keypoints_detection")
+
+        with tracer.span(name="get_and_unpack_image_from_camera"), \
+                stage_timer.measure("decode") if stage_timer is not None else nullcontext():
+            original_img = to_np(message.unpack(Image))
+        if original_img.size == 0:
+            tracer.end_span()
+            continue
+
+        with tracer.span(name="predict_box"), \
+                stage_timer.measure("detect") if stage_timer is not None else nullcontext():
+            result_dict = fused.detect(original_img, span, message.created_at)
+
+        if result_dict["boxes"]:
+            box = result_dict["boxes"][0]
+            x1, y1, x2, y2 = (int(v) for v in box["xyxy"])
+            x1, y1 = max(x1, 0), max(y1, 0)
+            if box["conf"] >= CONFIDENCE and (x2 - x1) * (y2 - y1) >= 3500:
+                crop = original_img[y1:y2, x1:x2]
+                return crop, tracer, span, np.array([x1, y1]), original_img, message.created_at
+        # The frame was detected on (and its box published) but yields no crop; close its span
+        tracer.end_span()
+    return None
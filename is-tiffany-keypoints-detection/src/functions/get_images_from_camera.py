@@ -1,7 +1,8 @@
-from is_wire.core import Tracer, Message, Subscription, Channel
+from is_wire.core import Tracer
 from is_msgs.image_pb2 import Image, ObjectAnnotations
 from opencensus.trace.blank_span import BlankSpan
-from classes import Connection, StreamChannel
+from classes import Connection, StreamChannel, StageTimer, Metrics, DetectionClient, FrameBuffer, SharedFrameRing
+from contextlib import nullcontext
 from typing import Tuple
 from .to_np import to_np
 import numpy as np
@@ -10,15 +11,50 @@ import os
 
 CONFIDENCE = float(os.environ.get("confidence", 0.5))
 
-def get_images_from_camera(channel_camera: StreamChannel, connection: Connection, end_time: float) -> Tuple[np.ndarray, Tracer, BlankSpan]:
+def get_images_from_camera(
+    channel_camera: StreamChannel | None,
+    connection: Connection,
+    end_time: float,
+    stage_timer: StageTimer | None = None,
+    channel_annotations: StreamChannel | None = None,
+    metrics: Metrics | None = None,
+    detection_client: DetectionClient | None = None,
+    frame_buffer: FrameBuffer | None = None,
+    frame_ring: SharedFrameRing | None = None,
+    match_tolerance: float = 0.02
+) -> Tuple[np.ndarray, Tracer, BlankSpan, np.ndarray, np.ndarray, float] | None:
     '''
     Obtains the cropped image (ROI) from the camera detection.
 
     Args:
-        channel_camera (StreamChannel): StreamChannel object for consuming camera frames.
+        channel_camera (StreamChannel | None): StreamChannel object for consuming camera frames.
+            Unused (and may be None) when `frame_ring` is given.
         connection (Connection): Connection object containing the channels and the exporter.
         end_time (float): The time at which the function should stop trying to get images.
-    
+        stage_timer (StageTimer | None): If given, records the unpack, decode and crop time
+            under the "decode" stage.
+        channel_annotations (StreamChannel | None): Channel subscribed to the
+            `Tiffany.Detection.{id}.Annotations` topic. If given, the latest published
+            detection is used; otherwise the detection is requested through the
+            `GetDetection` RPC.
+        metrics (Metrics | None): If given, counts the frames and detections dropped by
+            `consume_last` in "frames_dropped_total" and sets "queue_depth" to the number
+            of camera frames that were waiting in the queue.
+        detection_client (DetectionClient | None): Long-lived client used to request the
+            detection when `channel_annotations` is None, keeping the next request in
+            flight while the returned crop is processed. A client is opened for this
+            call only if None.
+        frame_buffer (FrameBuffer | None): If given, camera frames are kept in this buffer and
+            each detection crops the frame it was computed on (matched by the `capture_ts`
+            metadata of published detections), or the latest frame when there is no match.
+            Otherwise the latest frame is always cropped.
+        frame_ring (SharedFrameRing | None): Ring of frames decoded by a co-located detection
+            service. If given, the frame of each detection is read from it instead of
+            being consumed from the camera topic and decoded. When the frame is not in the
+            ring, None is returned, so the caller can check that the ring is still written.
+        match_tolerance (float): Maximum capture time difference between a detection and
+            the frame read from `frame_ring`, in seconds.
+
     Returns:
         Tuple containing:
             - crop (np.ndarray): Cropped region of interest (ROI) image from the camera.
@@ -26,18 +62,24 @@ def get_images_from_camera(channel_camera: StreamChannel, connection: Connection
             - span (BlankSpan): Active trace span for the operation.
             - roi_offset (np.ndarray): Coordinates (x1, y1) of the top-left corner of the ROI in the original image.
             - original_img (np.ndarray): Full original image from the camera.
+            - capture_ts (float): Creation time of the camera frame, in seconds.
+        None if no crop was obtained before `end_time`, or the frame was missing from `frame_ring`.
     '''
-    channel_detection = Channel(connection.broker_uri)
     exporter = connection.exporter
     camera_id = connection.camera_id
 
-    subscription = Subscription(channel_detection)
-    request = Message(reply_to=subscription)
+    owns_client = channel_annotations is None and detection_client is None
+    if owns_client:
+        detection_client = DetectionClient(connection.broker_uri, camera_id)
 
     while time.time() < end_time:
         try:
-            channel_detection.publish(request, topic=f"Tiffany.Detection.{camera_id}.GetDetection")
-            reply = channel_detection.consume(timeout = 1.0)
+            if channel_annotations is not None:
+                reply, dropped = channel_annotations.consume_last(return_dropped=True, timeout=1.0)
+                if metrics is not None:
+                    metrics.inc("frames_dropped_total", dropped, stage="annotations")
+            else:
+                reply = detection_client.get(timeout=1.0)
             det = reply.unpack(ObjectAnnotations)
         except:
             continue
@@ -57,14 +99,46 @@ def get_images_from_camera(channel_camera: StreamChannel, connection: Connection
             )
             span: BlankSpan = tracer.start_span(name="tiffany_keypoints_detection")
 
+            if frame_ring is not None:
+                with tracer.span(name="get_shared_frame"), stage_timer.measure("decode") if stage_timer is not None else nullcontext():
+                    capture_ts = reply.metadata.get("capture_ts")
+                    shared = frame_ring.latest() if capture_ts is None else frame_ring.find(capture_ts, match_tolerance)
+                    if shared is not None:
+                        seq, frame_ts, original_img = shared
+                        # The frame is stored with the detection for the stream, so it must not stay a view of the slot
+                        original_img = original_img.copy()
+                        crop = original_img[y1:y2, x1:x2]
+                # The writer may have reused the slot while the frame was being copied
+                if shared is None or not frame_ring.valid(seq):
+                    if metrics is not None:
+                        metrics.inc("frame_ring_misses_total")
+                    tracer.end_span()
+                    if owns_client:
+                        detection_client.close()
+                    return None
+                if owns_client:
+                    detection_client.close()
+                return crop, tracer, span, np.array([x1, y1]), original_img, frame_ts
+
             with tracer.span(name="get_and_unpack_image_from_camera"):
                 while time.time() < end_time:
-                    image = channel_camera.consume_last()
-                    if not isinstance(image, bool):
-                        img = image.unpack(Image)
-                        original_img = to_np(img)
-                        
-                        crop = original_img[y1:y2, x1:x2]
-                        roi_offset = np.array([x1, y1])
-                        channel_detection.close()
-                        return crop, tracer, span, roi_offset, original_img
\ No newline at end of file
+                    if frame_buffer is not None:
+                        image = frame_buffer.frame_for(channel_camera, reply.metadata.get("capture_ts"))
+                    else:
+                        image, dropped = channel_camera.consume_last(return_dropped=True)
+                        if metrics is not None:
+                            metrics.inc("frames_dropped_total", dropped, stage="consume")
+                            metrics.set("queue_depth", dropped)
+                    if image is not None and not isinstance(image, bool):
+                        with stage_timer.measure("decode") if stage_timer is not None else nullcontext():
+                            img = image.unpack(Image)
+                            original_img = to_np(img)
+
+                            crop = original_img[y1:y2, x1:x2]
+                            roi_offset = np.array([x1, y1])
+                        if owns_client:
+                            detection_client.close()
+                        return crop, tracer, span, roi_offset, original_img, image.created_at
+    if owns_client:
+        detection_client.close()
+    return None
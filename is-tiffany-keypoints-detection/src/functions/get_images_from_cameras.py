@@ -0,0 +1,94 @@
+from opencensus.ext.zipkin.trace_exporter import ZipkinExporter
+from opencensus.trace.blank_span import BlankSpan
+from is_msgs.image_pb2 import Image, ObjectAnnotations
+from is_wire.core import Tracer
+from classes import StreamChannel, Metrics, FrameBuffer
+from typing import Dict, Tuple
+from .get_images_from_camera import CONFIDENCE
+from .to_np import to_np
+import numpy as np
+import socket
+import time
+
+def get_images_from_cameras(
+    channel_annotations: StreamChannel,
+    channel_cameras: Dict[int, StreamChannel],
+    exporter: ZipkinExporter,
+    end_time: float,
+    window: float = 0.01,
+    frame_buffers: Dict[int, FrameBuffer | None] | None = None,
+    metrics: Metrics | None = None
+) -> Dict[int, Tuple[np.ndarray, Tracer, BlankSpan, np.ndarray, np.ndarray, float]]:
+    '''
+    Obtains the cropped images (ROIs) of the latest detection of every camera.
+
+    `channel_annotations` is expected to be subscribed to the
+    `Tiffany.Detection.{id}.Annotations` topic of every camera. After the first
+    detection arrives, the detections of the other cameras are gathered for up
+    to `window` seconds, so their crops can be inferred in one batch.
+
+    Args:
+        channel_annotations (StreamChannel): Channel subscribed to the detections of every camera.
+        channel_cameras (Dict[int, StreamChannel]): Channel subscribed to the frames of each camera,
+            keyed by camera ID.
+        exporter (ZipkinExporter): The Zipkin exporter used to create the tracers.
+        end_time (float): The time at which to stop waiting for detections.
+        window (float): Maximum time to wait for the detections of the other cameras, in seconds.
+        frame_buffers (Dict[int, FrameBuffer | None] | None): Frame buffer of each camera. When a
+            camera has one, the frame each detection was computed on is cropped (see `FrameBuffer`);
+            otherwise the latest frame is cropped.
+        metrics (Metrics | None): If given, counts the detections dropped while gathering in
+            "frames_dropped_total".
+
+    Returns:
+        Dict[int, Tuple[np.ndarray, Tracer, BlankSpan, np.ndarray, np.ndarray, float]]: For each
+            camera ID with a usable detection, the same tuple as `get_images_from_camera`: the
+            crop, tracer, span, ROI offset, full frame and capture time.
+    '''
+    frame_buffers = frame_buffers or {}
+    while time.time() < end_time:
+        try:
+            replies, dropped = channel_annotations.consume_last_by_topic(
+                return_dropped=True, timeout=1.0, window=window, topics=len(channel_cameras)
+            )
+        except socket.timeout:
+            continue
+        if metrics is not None:
+            metrics.inc("frames_dropped_total", dropped, stage="annotations")
+
+        frames = {}
+        for topic, reply in replies.items():
+            camera_id = int(topic.split(".")[2])
+            if camera_id not in channel_cameras:
+                continue
+            det = reply.unpack(ObjectAnnotations)
+            if not det.objects or det.objects[0].score < CONFIDENCE:
+                continue
+            box = det.objects[0].region.vertices
+            x1, y1 = int(box[0].x), int(box[0].y)
+            x2, y2 = int(box[1].x), int(box[1].y)
+            if (x2 - x1) * (y2 - y1) < 3500:
+                continue
+            tracer: Tracer = Tracer(
+                exporter=exporter,
+                span_context=reply.extract_tracing()
+            )
+            span: BlankSpan = tracer.start_span(name="tiffany_keypoints_detection")
+
+            with tracer.span(name="get_and_unpack_image_from_camera"):
+                frame_buffer = frame_buffers.get(camera_id)
+                if frame_buffer is not None:
+                    image = frame_buffer.frame_for(channel_cameras[camera_id], reply.metadata.get("capture_ts"))
+                else:
+                    try:
+                        image = channel_cameras[camera_id].consume_last(timeout=1.0)
+                    except socket.timeout:
+                        image = None
+                if image is None or isinstance(image, bool):
+                    continue
+                original_img = to_np(image.unpack(Image))
+                crop = original_img[y1:y2, x1:x2]
+            frames[camera_id] = (crop, tracer, span, np.array([x1, y1]), original_img, image.created_at)
+        if frames:
+            return frames
+    return {}
@@ -1,18 +1,87 @@
 from is_msgs.image_pb2 import Image
-from typing import Union
+from typing import Optional, Tuple, Union
 import numpy as np
 import cv2
 
-def to_np(input_image: Union[np.ndarray, Image]) -> np.ndarray:
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+def jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Reads the width and height of a JPEG image from its frame header.
+
+    Only the markers preceding the first start-of-frame segment are scanned,
+    so the image itself is not decoded.
+
+    Args:
+        data (bytes): The encoded image.
+
+    Returns:
+        Optional[Tuple[int, int]]: The (width, height) of the image, or None if
+            the data is not a JPEG or the header could not be parsed.
+    """
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        # SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+def decode_factor(input_image: Union[np.ndarray, Image], target_size: Optional[int] = None) -> int:
+    """Computes the largest JPEG reduction factor that still covers a target size.
+
+    JPEG images can be decoded directly at 1/2, 1/4 or 1/8 of their resolution,
+    which is much cheaper than a full decode followed by a resize.
+
+    Args:
+        input_image (Union[np.ndarray, Image]): The input image.
+        target_size (Optional[int]): Minimum length, in pixels, of the longest side
+            of the decoded image (e.g., the inference `imgsz`). None means full resolution.
+
+    Returns:
+        int: The reduction factor (1, 2, 4 or 8). Always 1 for NumPy arrays,
+            non-JPEG images or when no target size is given.
+    """
+    if target_size is None or not isinstance(input_image, Image):
+        return 1
+    size = jpeg_size(input_image.data)
+    if size is None:
+        return 1
+    for factor in (8, 4, 2):
+        if max(size) // factor >= target_size:
+            return factor
+    return 1
+
+def to_np(input_image: Union[np.ndarray, Image], target_size: Optional[int] = None) -> np.ndarray:
     """Converts an image to an OpenCV-compatible NumPy array.
 
     This utility function ensures that the input image, whether already a
     NumPy array or a Protobuf `Image` message, is returned as a decoded
     NumPy array ready for OpenCV processing.
 
+    When a `target_size` is given, JPEG images are decoded at a reduced
+    resolution (see `decode_factor`) whose longest side is still at least
+    `target_size` pixels.
+
     Args:
         input_image (Union[np.ndarray, Image]): The input image, which can be
             either a Protobuf `Image` or a NumPy array.
+        target_size (Optional[int]): Minimum length of the longest side of the
+            decoded image. Defaults to None (full resolution).
 
     Returns:
         np.ndarray: The image in NumPy format (BGR). Returns the input array
@@ -21,15 +90,16 @@ def to_np(input_image: Union[np.ndarray, Image]) -> np.ndarray:
     """
     if isinstance(input_image, np.ndarray):
         return input_image
-        
+
     if isinstance(input_image, Image):
         buffer = np.frombuffer(input_image.data, dtype=np.uint8)
-        output_image = cv2.imdecode(buffer, flags=cv2.IMREAD_COLOR)
+        flags = REDUCED_DECODE_FLAGS[decode_factor(input_image, target_size)]
+        output_image = cv2.imdecode(buffer, flags=flags)
         if output_image is None:
             return np.array([], dtype=np.uint8)
         # Convert grayscale to BGR if necessary
         if len(output_image.shape) == 2:
             output_image = cv2.cvtColor(output_image, cv2.COLOR_GRAY2BGR)
         return output_image
-        
+
     return np.array([], dtype=np.uint8)
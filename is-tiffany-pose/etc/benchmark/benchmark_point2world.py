@@ -0,0 +1,219 @@
+from collections.abc import Callable
+import numpy as np
+import argparse
+import platform
+import glob
+import json
+import time
+import sys
+import os
+import cv2
+
+# Make the service modules importable when running from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+from classes import CameraModel
+from functions import point2world, triangulate, select_cameras, undistortPoints
+
+
+def benchmark(name: str, fn: Callable, inputs: list, warmup: int, repeat: int) -> dict[str, float]:
+    """Times a function over a list of inputs and summarizes the latencies.
+
+    Args:
+        name (str): Name of the path being measured, used in the printed summary.
+        fn (Callable): Function called with each input.
+        inputs (list): Inputs, cycled until `warmup + repeat` calls were made.
+        warmup (int): Number of untimed calls made first.
+        repeat (int): Number of timed calls.
+
+    Returns:
+        dict[str, float]: Number of samples, mean, p50, p95 and p99 latency in
+            microseconds, and the corresponding rate in poses per second.
+    """
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+    latencies = np.empty(repeat)
+    for i in range(repeat):
+        value = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(value)
+        latencies[i] = time.perf_counter() - start
+    latencies *= 1e6
+    stats = {
+        "samples": repeat,
+        "mean_us": float(latencies.mean()),
+        "p50_us": float(np.percentile(latencies, 50)),
+        "p95_us": float(np.percentile(latencies, 95)),
+        "p99_us": float(np.percentile(latencies, 99)),
+        "poses_per_second": float(1e6 / latencies.mean()),
+    }
+    print(
+        f"{name:<24} p50={stats['p50_us']:9.1f} us  p95={stats['p95_us']:9.1f} us  "
+        f"p99={stats['p99_us']:9.1f} us  rate={stats['poses_per_second']:9.1f}/s"
+    )
+    return stats
+
+
+def reference_point2world(parameters: dict, points: dict, truncate: bool = True) -> np.ndarray:
+    """Reconstructs one point with the original per-point formulation of `point2world`.
+
+    Kept here, independent of `triangulate`, as the baseline and the reference
+    the optimized paths are checked against: one unknown depth per camera and
+    one SVD per point, with the calibration recomputed on every call.
+
+    Args:
+        parameters (dict): Calibration parameters of each camera.
+        points (dict): Distorted pixel coordinates of the point in each camera, shape (2,).
+        truncate (bool): If True, the undistorted pixels are truncated to integers,
+            as the original implementation did.
+
+    Returns:
+        np.ndarray: World coordinates of the point, shape (3,).
+    """
+    mtxA = []
+    for cam_id in points.keys():
+        mtxP, unds = undistortPoints(parameters[cam_id], points[cam_id])
+        unds = unds[0]
+        if truncate:
+            u = np.array([[int(unds[0]), int(unds[1]), 1]]).T
+        else:
+            u = np.array([[unds[0], unds[1], 1]]).T
+        zeros = np.zeros((3, 1))
+        mtx = np.array(mtxP)
+        for i in points.keys():
+            if i == cam_id:
+                mtx = np.hstack((mtx, -u))
+            else:
+                mtx = np.hstack((mtx, zeros))
+        if len(mtxA) == 0:
+            mtxA = mtx
+        else:
+            mtxA = np.vstack((mtxA, mtx))
+
+    _, _, V_transpose = np.linalg.svd(mtxA)
+    mtxV = V_transpose[-1]
+    mtxV = mtxV / mtxV[3]
+    return mtxV[:3]
+
+
+def synthetic_keypoints(cameras: dict, count: int, seed: int = 0) -> list[dict[int, np.ndarray]]:
+    """Projects random world points near the origin into every camera.
+
+    Args:
+        cameras (dict): Camera model of each camera, keyed by camera ID.
+        count (int): Number of (center, front) keypoint pairs to generate.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        list[dict[int, np.ndarray]]: For each pair, the (2, 2) distorted pixel
+            coordinates of the center and front keypoints in each camera.
+    """
+    rng = np.random.default_rng(seed)
+    samples = []
+    for _ in range(count):
+        center = np.array([rng.uniform(-1, 1), rng.uniform(-1, 1), 0.0])
+        front = center + np.array([0.1, 0.0, 0.0])
+        world = np.stack([center, front])
+        pixels = {}
+        for cam_id, camera in cameras.items():
+            rvec, _ = cv2.Rodrigues(camera.Rt[:, :3])
+            projected, _ = cv2.projectPoints(world, rvec, camera.Rt[:, 3], camera.K, camera.dist)
+            pixels[cam_id] = projected.reshape(-1, 2)
+        samples.append(pixels)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the keypoints-to-world conversion of the pose service.")
+    parser.add_argument("--calibrations", default="src/calibrations", help="Directory with the calib_rt*.npz files")
+    parser.add_argument("--cameras", type=int, default=0, help="Number of cameras, repeating the calibrations (0 uses each once)")
+    parser.add_argument("--samples", type=int, default=100, help="Number of synthetic keypoint pairs")
+    parser.add_argument("--warmup", type=int, default=100, help="Untimed iterations per path")
+    parser.add_argument("--repeat", type=int, default=2000, help="Timed iterations per path")
+    parser.add_argument("--max-cameras", type=int, default=4, help="Cameras kept by the best-K selection path")
+    parser.add_argument("--output", default=None, help="JSON file where the results are written")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.calibrations, "calib_rt*.npz")))
+    if not paths:
+        sys.exit(f"No calibration files found in {args.calibrations}")
+    parameters = {}
+    for path in paths:
+        with np.load(path) as calibration:
+            parameters[int(os.path.basename(path)[len("calib_rt"):-len(".npz")])] = dict(calibration)
+    # Extra cameras reuse the calibrations in turn, to measure how the cost grows with the camera count
+    calibrations = list(parameters.values())
+    for cam_id in range(len(calibrations) + 1, args.cameras + 1):
+        parameters[max(parameters) + 1] = calibrations[(cam_id - 1) % len(calibrations)]
+    cameras = {cam_id: CameraModel.from_parameters(params) for cam_id, params in parameters.items()}
+    projections = np.stack([camera.P for camera in cameras.values()])
+    ray_matrices = np.stack([camera.ray_matrix for camera in cameras.values()])
+    samples = synthetic_keypoints(cameras, args.samples)
+
+    def per_call(pixels: dict[int, np.ndarray], truncate: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        # Original implementation: calibration recomputed and one SVD for every point of every camera
+        center = reference_point2world(parameters, {cam_id: p[0] for cam_id, p in pixels.items()}, truncate)
+        front = reference_point2world(parameters, {cam_id: p[1] for cam_id, p in pixels.items()}, truncate)
+        return center, front
+
+    def precomputed(pixels: dict[int, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        # Camera models: both keypoints of a camera are undistorted in one call
+        undistorted = {cam_id: cameras[cam_id].undistort(p) for cam_id, p in pixels.items()}
+        center = point2world(cameras, {cam_id: u[0] for cam_id, u in undistorted.items()}, True)
+        front = point2world(cameras, {cam_id: u[1] for cam_id, u in undistorted.items()}, True)
+        return center, front
+
+    def batched(pixels: dict[int, np.ndarray]) -> np.ndarray:
+        # Camera models and a single triangulation of both keypoints, as in the pose thread
+        points = np.stack([cameras[cam_id].undistort(p) for cam_id, p in pixels.items()], axis=1)
+        return triangulate(projections, points)
+
+    def best_k(pixels: dict[int, np.ndarray]) -> np.ndarray:
+        # As in the pose thread: only the best `--max-cameras` views go into the triangulation
+        points = np.stack([cameras[cam_id].undistort(p) for cam_id, p in pixels.items()], axis=1)
+        if points.shape[1] <= args.max_cameras:
+            return triangulate(projections, points)
+        rays = np.einsum("kij,kj->ki", ray_matrices, np.column_stack([points[0], np.ones(points.shape[1])]))
+        rays /= np.linalg.norm(rays, axis=1, keepdims=True)
+        used = select_cameras(rays, np.ones(len(rays)), np.zeros(len(rays)), args.max_cameras, 0.03)
+        return triangulate(projections[used], points[:, used])
+
+    # The optimized paths must match the original formulation on the same (untruncated) pixels
+    error = max(
+        float(np.abs(np.subtract(per_call(s, truncate=False), path(s))).max())
+        for s in samples for path in (precomputed, batched, best_k)
+    )
+    # Difference caused by the integer truncation of the original implementation, for reference
+    truncation_error = max(float(np.abs(np.subtract(per_call(s), batched(s))).max()) for s in samples)
+    paths_stats = {
+        "per_call_calibration": benchmark("per-call calibration", per_call, samples, args.warmup, args.repeat),
+        "camera_model": benchmark("CameraModel", precomputed, samples, args.warmup, args.repeat),
+        "triangulate": benchmark("CameraModel+triangulate", batched, samples, args.warmup, args.repeat),
+        "best_k": benchmark(f"best-{args.max_cameras} selection", best_k, samples, args.warmup, args.repeat),
+    }
+    speedup = paths_stats["per_call_calibration"]["mean_us"] / paths_stats["triangulate"]["mean_us"]
+    print(f"Speedup: {speedup:.2f}x, max difference: {error:.2e} m (truncated original: {truncation_error:.2e} m)")
+
+    report = {
+        "service": "is-tiffany-pose",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": platform.node(),
+        "config": {
+            "cameras": sorted(cameras),
+            "samples": args.samples,
+            "max_cameras": args.max_cameras,
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+        },
+        "paths": paths_stats,
+        "speedup": speedup,
+        "max_difference": error,
+        "truncation_difference": truncation_error,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import numpy as np
+import argparse
+import time
+import sys
+import os
+
+# Make the service modules importable when running from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+from classes.CameraModel import CameraModel
+from functions.reconstruct import load_keypoints, reconstruct_trajectory
+
+# Reconstructs Tiffany's trajectory offline from the logs written by record_keypoints.py
+parser = argparse.ArgumentParser(description="Reconstruct Tiffany's trajectory from recorded keypoints logs.")
+parser.add_argument("recording", help="Directory with the keypoints_{id}.csv logs")
+parser.add_argument("--output", default="trajectory.npz", help="Compressed .npz file with the t, x, y, z, yaw and cameras columns")
+parser.add_argument("--cameras", default="1,2,3,4", help="Comma-separated camera IDs")
+parser.add_argument("--calibrations", default=os.path.join(os.path.dirname(__file__), "..", "..", "src", "calibrations"),
+                    help="Directory with the calib_rt{id}.npz files")
+parser.add_argument("--tolerance-ms", type=float, default=30.0, help="Maximum capture time difference between the cameras of one sample")
+parser.add_argument("--confidence", type=float, default=0.997, help="Minimum keypoint score, as in the live service")
+parser.add_argument("--chunk", type=int, default=65536, help="Number of samples triangulated per call")
+args = parser.parse_args()
+
+camera_ids = [int(i) for i in args.cameras.split(",")]
+start = time.perf_counter()
+cameras = {cam_id: CameraModel.load(os.path.join(args.calibrations, f"calib_rt{cam_id}.npz")) for cam_id in camera_ids}
+logs = {}
+for cam_id in camera_ids:
+    path = os.path.join(args.recording, f"keypoints_{cam_id}.csv")
+    if os.path.exists(path):
+        logs[cam_id] = load_keypoints(path)
+        print(f"Camera {cam_id}: {len(logs[cam_id])} samples")
+    else:
+        print(f"Camera {cam_id}: no log found at {path}")
+loaded = time.perf_counter()
+
+trajectory = reconstruct_trajectory(cameras, logs, args.tolerance_ms / 1000, args.confidence, args.chunk)
+np.savez_compressed(args.output, **trajectory)
+elapsed = time.perf_counter() - start
+print(
+    f"{trajectory['t'].size} poses written to {args.output} "
+    f"(loading {loaded - start:.2f} s, total {elapsed:.2f} s)"
+)
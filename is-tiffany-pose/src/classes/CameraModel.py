@@ -0,0 +1,95 @@
+import numpy as np
+import cv2
+
+
+class CameraModel:
+    """
+    Calibration of a single camera, with the matrices derived from it computed once.
+
+    The calibration never changes while the service runs, so the optimal new
+    camera matrix (`newK`), its region-of-interest offset and the projection
+    matrix (`P = newK @ Rt`) are computed when the model is built instead of
+    on every undistortion.
+
+    Attributes:
+        K (np.ndarray): Camera intrinsic matrix (3x3).
+        dist (np.ndarray): Distortion coefficients.
+        Rt (np.ndarray): Rotation-translation matrix from world to camera (3x4).
+        newK (np.ndarray): Intrinsic matrix of the undistorted image (3x3).
+        P (np.ndarray): Projection matrix of the undistorted image (3x4).
+        center (np.ndarray): Position of the camera in world coordinates, shape (3,).
+        ray_matrix (np.ndarray): Maps undistorted homogeneous pixels to world ray directions (3x3).
+        resolution (tuple[int, int]): Image (width, height) the calibration applies to.
+    """
+
+    def __init__(
+        self,
+        K: np.ndarray,
+        dist: np.ndarray,
+        Rt: np.ndarray,
+        resolution: tuple[int, int] = (1280, 720)
+    ):
+        """
+        Builds the model and precomputes the undistorted intrinsic and projection matrices.
+
+        Args:
+            K (np.ndarray): Camera intrinsic matrix (3x3).
+            dist (np.ndarray): Distortion coefficients.
+            Rt (np.ndarray): Rotation-translation matrix from world to camera (3x4).
+            resolution (tuple[int, int]): Image (width, height) the calibration applies to.
+        """
+        self.K = np.asarray(K, dtype=np.float64)
+        self.dist = np.asarray(dist, dtype=np.float64)
+        self.Rt = np.asarray(Rt, dtype=np.float64)
+        self.resolution = resolution
+
+        newK, roi = cv2.getOptimalNewCameraMatrix(self.K, self.dist, resolution, 1, resolution)
+        x, y, _, _ = roi
+        newK[0, 2] -= x
+        newK[1, 2] -= y
+        self.newK = newK
+        self.P = newK @ self.Rt
+        self.center = -self.Rt[:, :3].T @ self.Rt[:, 3]
+        self.ray_matrix = self.Rt[:, :3].T @ np.linalg.inv(newK)
+
+    @classmethod
+    def from_parameters(cls, parameters: dict, resolution: tuple[int, int] = (1280, 720)) -> "CameraModel":
+        """
+        Builds a model from a calibration dictionary.
+
+        Args:
+            parameters (dict): Calibration data with the 'mtx', 'dist' and 'rt' entries.
+            resolution (tuple[int, int]): Image (width, height) the calibration applies to.
+
+        Returns:
+            CameraModel: The camera model.
+        """
+        return cls(parameters['mtx'], parameters['dist'], parameters['rt'], resolution)
+
+    @classmethod
+    def load(cls, path: str, resolution: tuple[int, int] = (1280, 720)) -> "CameraModel":
+        """
+        Builds a model from a calibration file (e.g. `calibrations/calib_rt1.npz`).
+
+        Args:
+            path (str): Path of the `.npz` file with the 'mtx', 'dist' and 'rt' arrays.
+            resolution (tuple[int, int]): Image (width, height) the calibration applies to.
+
+        Returns:
+            CameraModel: The camera model.
+        """
+        with np.load(path) as calibration:
+            return cls.from_parameters(dict(calibration), resolution)
+
+    def undistort(self, points: np.ndarray) -> np.ndarray:
+        """
+        Undistorts several image points in a single `cv2.undistortPoints` call.
+
+        Args:
+            points (np.ndarray): Image points, shape (2,), (N, 2) or (1, N, 2).
+
+        Returns:
+            np.ndarray: Undistorted points in the pixel coordinates of `newK`, shape (N, 2).
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 1, 2)
+        return cv2.undistortPoints(points, self.K, self.dist, None, self.newK).reshape(-1, 2)
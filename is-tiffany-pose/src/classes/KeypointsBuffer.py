@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class KeypointsBuffer:
+    """
+    Ring buffer of the recent keypoints of one camera, indexed by capture time.
+
+    Keeping a short history, instead of only the last keypoints, lets the
+    pose thread fuse the observations of every camera at the same instant:
+    `sample` returns the keypoints of the camera at a target time, picked or
+    interpolated from the observations within a sync window around it.
+    Storage is preallocated and overwritten in place, so appending never
+    allocates. The buffer is not thread-safe; callers hold their own lock.
+
+    Attributes:
+        size (int): Maximum number of observations kept.
+        times (np.ndarray): Capture time of each slot, in seconds, shape (size,).
+        points (np.ndarray): Undistorted center (0) and front (1) keypoints of each slot, shape (size, 2, 2).
+        scores (np.ndarray): Confidence of each slot (lowest score of its keypoints), shape (size,).
+        count (int): Number of slots in use.
+    """
+
+    def __init__(self, size: int = 30):
+        """
+        Preallocates the buffer.
+
+        Args:
+            size (int): Maximum number of observations kept; the oldest is overwritten when full.
+        """
+        self.size = size
+        self.times = np.full(size, -np.inf)
+        self.points = np.zeros((size, 2, 2))
+        self.scores = np.zeros(size)
+        self.count = 0
+        self._next = 0
+
+    def append(self, capture_ts: float, points: np.ndarray, score: float = 1.0) -> None:
+        """
+        Stores an observation, overwriting the oldest one when the buffer is full.
+
+        Args:
+            capture_ts (float): Capture time of the frame the keypoints come from, in seconds.
+            points (np.ndarray): Undistorted center and front keypoints, shape (2, 2).
+            score (float): Confidence of the observation, e.g. the lowest score of its keypoints.
+        """
+        self.times[self._next] = capture_ts
+        self.points[self._next] = points
+        self.scores[self._next] = score
+        self._next = (self._next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def clear(self) -> None:
+        """Discards every observation."""
+        self.times[:] = -np.inf
+        self.count = 0
+        self._next = 0
+
+    def latest(self) -> float | None:
+        """
+        Returns the capture time of the newest observation.
+
+        Returns:
+            float | None: The newest capture time, in seconds, or None if the buffer is empty.
+        """
+        return float(self.times.max()) if self.count else None
+
+    def sample(self, target_ts: float, window: float, out: np.ndarray) -> tuple[float, float] | None:
+        """
+        Writes the keypoints of the camera at `target_ts` into `out`.
+
+        If the buffer holds observations both before and after the target
+        within `window`, the closest pair is linearly interpolated; otherwise
+        the closest observation within `window` is used as is.
+
+        Args:
+            target_ts (float): Time at which the keypoints are wanted, in seconds.
+            window (float): Maximum distance between the target and the observations used, in seconds.
+            out (np.ndarray): Array receiving the center and front keypoints, shape (2, 2).
+
+        Returns:
+            tuple[float, float] | None: The confidence of the observations used (the lowest one
+                when interpolating) and their distance to the target, in seconds, or None if no
+                observation lies within the window and `out` was not written.
+        """
+        offsets = self.times - target_ts
+        before = np.where((offsets <= 0) & (offsets >= -window), offsets, -np.inf).argmax()
+        after = np.where((offsets >= 0) & (offsets <= window), offsets, np.inf).argmin()
+        has_before = -window <= offsets[before] <= 0
+        has_after = 0 <= offsets[after] <= window
+        if has_before and has_after and offsets[after] > offsets[before]:
+            weight = -offsets[before] / (offsets[after] - offsets[before])
+            np.add(self.points[before] * (1 - weight), self.points[after] * weight, out=out)
+            return float(min(self.scores[before], self.scores[after])), float(min(-offsets[before], offsets[after]))
+        if has_before or has_after:
+            closest = before if not has_after or (has_before and -offsets[before] <= offsets[after]) else after
+            out[:] = self.points[closest]
+            return float(self.scores[closest]), float(abs(offsets[closest]))
+        return None
@@ -0,0 +1,270 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from google.protobuf.struct_pb2 import Struct
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+import threading
+import bisect
+import time
+
+# Upper bounds, in seconds, of the latency histogram buckets (the last bucket is +Inf)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and latency histograms.
+
+    Metrics are identified by a name and a set of labels (e.g. the camera ID).
+    `child` returns a view of the same registry that adds fixed labels to
+    everything it records, so each camera can record its own series without
+    passing its ID around. Values that are cheaper to read on demand (e.g. the
+    motion gate counters or the pose rate) are refreshed by collectors right
+    before a snapshot.
+
+    Each service is built from its own `src/`, so this file is copied in all of
+    them; the copies are kept identical (see `tests/test_metrics.py`).
+
+    The registry is exposed through the `GetStats` RPC (`get_stats`) and,
+    optionally, as a Prometheus text endpoint (`serve`).
+
+    Attributes:
+        namespace (str): Prefix of the metric names in the Prometheus output.
+        labels (Dict[str, str]): Labels added to every series recorded through this view.
+    """
+
+    def __init__(self, namespace: str = "tiffany", buckets: Tuple[float, ...] = BUCKETS) -> None:
+        """Initializes an empty registry.
+
+        Args:
+            namespace (str): Prefix of the metric names in the Prometheus output.
+            buckets (Tuple[float, ...]): Upper bounds of the histogram buckets, in seconds.
+        """
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.labels: Dict[str, str] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self.collectors: List[Callable[[], None]] = []
+        self.lock = threading.Lock()
+
+    def child(self, **labels) -> "Metrics":
+        """Creates a view of this registry that adds `labels` to every recorded series.
+
+        Args:
+            **labels: Label names and values, e.g. `camera=1`.
+
+        Returns:
+            Metrics: A registry sharing the series of this one.
+        """
+        view = object.__new__(Metrics)
+        view.__dict__.update(self.__dict__)
+        view.labels = {**self.labels, **{name: str(value) for name, value in labels.items()}}
+        return view
+
+    def _key(self, labels: Dict[str, object]) -> LabelKey:
+        merged = {**self.labels, **{name: str(value) for name, value in labels.items()}}
+        return tuple(sorted(merged.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        """Increments a counter.
+
+        Args:
+            name (str): Name of the counter, e.g. "frames_total".
+            value (float): Amount to add.
+            **labels: Extra labels of the series.
+        """
+        key = self._key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """Sets a gauge.
+
+        Args:
+            name (str): Name of the gauge, e.g. "queue_depth".
+            value (float): Current value.
+            **labels: Extra labels of the series.
+        """
+        key = self._key(labels)
+        with self.lock:
+            self.gauges.setdefault(name, {})[key] = float(value)
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Records a latency sample in a histogram.
+
+        Args:
+            name (str): Name of the histogram, e.g. "stage_seconds".
+            seconds (float): The measured latency.
+            **labels: Extra labels of the series.
+        """
+        key = self._key(labels)
+        with self.lock:
+            # Per-bucket counts, followed by the +Inf bucket, the sample count and sum
+            series = self.histograms.setdefault(name, {})
+            values = series.setdefault(key, [0.0] * (len(self.buckets) + 3))
+            values[bisect.bisect_left(self.buckets, seconds)] += 1
+            values[-2] += 1
+            values[-1] += seconds
+
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        """Context manager that records the time spent inside the block in a histogram.
+
+        Args:
+            name (str): Name of the histogram.
+            **labels: Extra labels of the series.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Registers a function that refreshes gauges or counters before each snapshot.
+
+        Args:
+            collector (Callable[[], None]): Function called by `snapshot`.
+        """
+        with self.lock:
+            self.collectors.append(collector)
+
+    def quantile(self, values: List[float], q: float) -> float:
+        """Estimates a quantile of a histogram series by interpolating inside its bucket.
+
+        Args:
+            values (List[float]): The series, as stored by `observe`.
+            q (float): The quantile, from 0.0 to 1.0.
+
+        Returns:
+            float: The estimated quantile in seconds (the highest bound if it falls in +Inf).
+        """
+        if not values[-2]:
+            return 0.0
+        rank = q * values[-2]
+        cumulative = 0.0
+        for i, count in enumerate(values[:len(self.buckets)]):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """Runs the collectors and copies every series.
+
+        Returns:
+            Dict[str, Dict[str, object]]: The "counters", "gauges" and "histograms",
+                keyed by series name (`name{label="value",...}`). Histograms are
+                summarized by count, mean and estimated p50/p95/p99 in milliseconds.
+        """
+        for collector in list(self.collectors):
+            collector()
+        with self.lock:
+            histograms = {}
+            for name, series in self.histograms.items():
+                for key, values in series.items():
+                    count = values[-2]
+                    histograms[self.series_name(name, key)] = {
+                        "count": count,
+                        "mean_ms": 1000.0 * values[-1] / count if count else 0.0,
+                        "p50_ms": 1000.0 * self.quantile(values, 0.50),
+                        "p95_ms": 1000.0 * self.quantile(values, 0.95),
+                        "p99_ms": 1000.0 * self.quantile(values, 0.99),
+                    }
+            return {
+                "counters": {self.series_name(n, k): v for n, s in self.counters.items() for k, v in s.items()},
+                "gauges": {self.series_name(n, k): v for n, s in self.gauges.items() for k, v in s.items()},
+                "histograms": histograms,
+            }
+
+    @staticmethod
+    def series_name(name: str, key: LabelKey, extra: str = "") -> str:
+        """Formats a series name with its labels, as in the Prometheus text format.
+
+        Args:
+            name (str): Name of the metric.
+            key (LabelKey): Sorted (label, value) pairs.
+            extra (str): Already formatted label appended last (e.g. `le="0.5"`).
+
+        Returns:
+            str: The series name, e.g. `frames_total{camera="1"}`.
+        """
+        labels = [f'{label}="{value}"' for label, value in key] + ([extra] if extra else [])
+        return f"{name}{{{','.join(labels)}}}" if labels else name
+
+    def get_stats(self, *args) -> Struct:
+        """Retrieves a snapshot of every metric.
+
+        Exposed as the `GetStats` RPC method.
+
+        Returns:
+            Struct: The snapshot returned by `snapshot`.
+        """
+        stats = Struct()
+        stats.update(self.snapshot())
+        return stats
+
+    def to_prometheus(self) -> str:
+        """Formats every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: One line per series, counters and gauges first, then the
+                cumulative buckets, sum and count of every histogram.
+        """
+        for collector in list(self.collectors):
+            collector()
+        lines = []
+        with self.lock:
+            for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+                for name, series in sorted(metrics.items()):
+                    full_name = f"{self.namespace}_{name}"
+                    lines.append(f"# TYPE {full_name} {kind}")
+                    lines.extend(f"{self.series_name(full_name, k)} {v}" for k, v in series.items())
+            for name, series in sorted(self.histograms.items()):
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, values in series.items():
+                    cumulative = 0.0
+                    for bound, count in zip(self.buckets + (float("inf"),), values[:-2]):
+                        cumulative += count
+                        le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                        lines.append(f"{self.series_name(full_name + '_bucket', key, le)} {cumulative}")
+                    lines.append(f"{self.series_name(full_name + '_sum', key)} {values[-1]}")
+                    lines.append(f"{self.series_name(full_name + '_count', key)} {values[-2]}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Serves the Prometheus text format on `http://host:port/metrics` from a daemon thread.
+
+        Args:
+            port (int): Port to listen on.
+            host (str): Address to bind to.
+
+        Returns:
+            ThreadingHTTPServer: The running server.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=server.serve_forever, name="MetricsServer")
+        thread.daemon = True
+        thread.start()
+        return server
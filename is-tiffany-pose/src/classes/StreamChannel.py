@@ -1,6 +1,6 @@
 from is_wire.core import Channel
 from is_wire.core import Message
-from typing import Tuple, Union
+from typing import Optional, Tuple, Union
 import socket
 
 class StreamChannel(Channel):
@@ -21,7 +21,11 @@ class StreamChannel(Channel):
         """
         super().__init__(uri=uri, exchange=exchange)
 
-    def consume_last(self, return_dropped: bool = False) -> Union[Message, Tuple[Message, int]]:
+    def consume_last(
+        self,
+        return_dropped: bool = False,
+        timeout: Optional[float] = None
+    ) -> Union[Message, Tuple[Message, int]]:
         """Consumes the latest available message from the channel, discarding previous ones.
 
         This method first waits for a message and then quickly consumes
@@ -31,6 +35,8 @@ class StreamChannel(Channel):
         Args:
             return_dropped (bool): If True, also returns the number of messages
                                 that were dropped. Defaults to False.
+            timeout (Optional[float]): Maximum time to wait for the first message,
+                                in seconds. Blocks forever if None (default).
 
         Returns:
             msg (Message | Tuple[Message, int]]): The latest available message.
@@ -43,7 +49,7 @@ class StreamChannel(Channel):
                             of the initial consume call.
         """
         dropped = 0
-        msg = super().consume()
+        msg = super().consume(timeout=timeout)
         while True:
             try:
                 msg = super().consume(timeout=0.0)
@@ -1,12 +1,17 @@
 from is_wire.core import Message, StatusCode, Status, Subscription, Channel
 from is_msgs.common_pb2 import Pose, Position, Orientation
 from google.protobuf.wrappers_pb2 import FloatValue
+from google.protobuf.message import DecodeError
 from is_msgs.image_pb2 import ObjectAnnotations
-from functions import point2world, angle
+from functions import triangulate, select_cameras, angle
 from .AngleHistory import AngleHistory
+from .KeypointsBuffer import KeypointsBuffer
+from .Metrics import Metrics
 from .Connection import Connection
+from collections import deque
 import numpy as np
 import threading
+import socket
 import time
 import os
 
@@ -24,74 +29,215 @@ class Threading:
     A lock is used to ensure thread-safe access to the latest detection data.
     """
 
-    def __init__(self, connection: Connection, parameters: dict):
+    def __init__(
+        self,
+        connection: Connection,
+        parameters: dict,
+        subscribe_keypoints: bool = True,
+        metrics: Metrics | None = None,
+        max_pose_rate: float = 30.0,
+        sync_window: float = 0.03,
+        buffer_size: int = 30,
+        request_timeout: float = 1.0,
+        max_cameras: int = 4
+    ):
         """
         Initializes the thread manager.
 
         Args:
             connection (Connection): Object managing the broker connection.
-            parameters (dict): Camera calibration parameters.
-            log (Logger): Logger instance for recording messages.
+            parameters (dict[int, CameraModel]): Calibrated model of each camera, keyed by camera ID.
+            subscribe_keypoints (bool): If True, subscribes to the keypoints published on
+                `Tiffany.Keypoints.{id}.Annotations`; otherwise polls the `GetDetection` RPC.
+            metrics (Metrics | None): Registry in which the keypoint counters and the pose
+                latency are recorded. A private registry is created if None.
+            max_pose_rate (float): Maximum number of poses computed per second. Keypoints
+                arriving faster are coalesced into the next pose. Unlimited when 0.
+            sync_window (float): Maximum distance, in seconds, between the capture time of the
+                keypoints fused into one pose and the time of the pose.
+            buffer_size (int): Number of recent keypoints kept per camera (see `KeypointsBuffer`).
+            request_timeout (float): Time after which a `GetDetection` request without reply
+                is abandoned and sent again, in seconds.
+            max_cameras (int): Maximum number of cameras triangulated per pose, chosen by
+                `select_cameras`. Every camera with keypoints is used when 0.
         """
         self.angle = AngleHistory(max_history=10, max_age_seconds=10)
         self.connection = connection
         self.log = connection.log
         self.parameters = parameters
-        self._last_keypoints = {}
+        # Cameras are numbered in a fixed order, so a missing camera only clears its mask entry
+        self.camera_index = {cam_id: i for i, cam_id in enumerate(parameters.keys())}
+        self.camera_ids = list(parameters.keys())
+        self.projections = np.stack([camera.P for camera in parameters.values()])
+        self.ray_matrices = np.stack([camera.ray_matrix for camera in parameters.values()])
+        self.subscribe_keypoints = subscribe_keypoints
+        self.max_pose_rate = max_pose_rate
+        self.sync_window = sync_window
+        self.request_timeout = request_timeout
+        self.max_cameras = max_cameras
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.add_collector(self.collect_metrics)
+        self._pose_times = deque(maxlen=30)
+        # Recent undistorted keypoints of each camera, by capture time
+        self._keypoints = {cam_id: KeypointsBuffer(buffer_size) for cam_id in parameters.keys()}
         self._last_pose = Pose()
         self.keypoints_event = {cam_id: threading.Event() for cam_id in parameters.keys()}
         self.pose_event = threading.Event()
+        # Set while the keypoints thread runs; each camera is acquired until its deadline
+        self.consumer_event = threading.Event()
+        self._deadlines = {}
         self.lock = threading.Lock()
+        # Notified, under `lock`, whenever the keypoints of a camera are stored or cleared
+        self.new_keypoints = threading.Condition(self.lock)
+        self._version = 0
 
-    def get_keypoints_by_camera(self, minutes: FloatValue, camera_id: int) -> None:
+    def connect_keypoints(self) -> tuple[Channel, Subscription, dict[str, int]]:
         """
-        Continuously fetches keypoints from a specific camera for a defined duration.
+        Creates the single channel on which the keypoints of every camera are received.
 
-        Args:
-            minutes (FloatValue): Duration in minutes to fetch keypoints.
-            camera_id (int): ID of the camera to fetch keypoints from.
+        Returns:
+            tuple[Channel, Subscription, dict[str, int]]: The channel, its subscription (the
+                `reply_to` of the `GetDetection` requests) and the camera ID of each
+                subscribed `Tiffany.Keypoints.{id}.Annotations` topic.
         """
-        self.keypoints_event[camera_id].set()
-
-        duration_seconds = minutes.value * 60
-        threading.current_thread().name = f"Keypoints.{camera_id}.Thread"
-        start_time = time.time()
-        self.log.info(f"Starting keypoints acquisition. Duration: {duration_seconds / 60:.2f} minutes.")
-        
         channel = Channel(self.connection.broker_uri)
         subscription = Subscription(channel)
-        
-        while time.time() - start_time < duration_seconds:
-            request = Message(reply_to=subscription)
+        topics = {}
+        if self.subscribe_keypoints:
+            for cam_id in self.parameters.keys():
+                topics[f"Tiffany.Keypoints.{cam_id}.Annotations"] = cam_id
+                subscription.subscribe(f"Tiffany.Keypoints.{cam_id}.Annotations")
+        return channel, subscription, topics
+
+    def expire_cameras(self, now: float) -> tuple[list[int], float | None]:
+        """
+        Stops the acquisition of the cameras whose deadline has passed.
+
+        Clears `consumer_event`, under `lock`, once no camera is left, so that
+        `start_detections` starts a new keypoints thread for later requests.
+
+        Args:
+            now (float): Current time, in seconds.
+
+        Returns:
+            tuple[list[int], float | None]: IDs of the cameras still being acquired and
+                the earliest of their deadlines, or None if no camera is left.
+        """
+        with self.lock:
+            expired = [cam_id for cam_id, deadline in self._deadlines.items() if deadline <= now]
+            for cam_id in expired:
+                del self._deadlines[cam_id]
+            if not self._deadlines:
+                self.consumer_event.clear()
+            active, next_deadline = list(self._deadlines), min(self._deadlines.values(), default=None)
+        for cam_id in expired:
+            self.set_last_keypoints(None, cam_id)
+            self.keypoints_event[cam_id].clear()
+            self.log.info(f"Keypoints acquisition of camera {cam_id} finished.")
+        return active, next_deadline
+
+    def store_keypoints(self, message: Message, camera_id: int) -> None:
+        """
+        Stores the keypoints of a message if both are confident enough.
+
+        Args:
+            message (Message): Published keypoints or `GetDetection` reply.
+            camera_id (int): Camera ID that provided the keypoints.
+        """
+        kp = message.unpack(ObjectAnnotations)
+        if kp.objects and kp.objects[0].keypoints[0].score > CONFIDENCE and kp.objects[0].keypoints[1].score > CONFIDENCE:
+            # Published keypoints carry the capture time of their frame; RPC replies do not
+            capture_ts = float(message.metadata.get("capture_ts", time.time()))
+            self.set_last_keypoints(kp, camera_id, capture_ts)
+            self.metrics.inc("keypoints_total", camera=camera_id)
+        else:
+            self.metrics.inc("keypoints_rejected_total", camera=camera_id)
+
+    def get_keypoints(self) -> None:
+        """
+        Fetches the keypoints of every started camera from a single thread and channel.
+
+        The keypoints of all cameras are multiplexed on one channel: either
+        subscribed to every `Tiffany.Keypoints.{id}.Annotations` topic, or, when
+        polling, with one `GetDetection` request in flight per camera, matched to
+        its reply by correlation ID and abandoned after `request_timeout`. Each
+        camera is acquired until its own deadline, set by `start_detections`, so
+        the number of threads does not grow with the number of cameras.
+        """
+        threading.current_thread().name = "KeypointsThread"
+        self.log.info("Starting keypoints acquisition.")
+        channel, subscription, topics = self.connect_keypoints()
+        # Camera ID and deadline of each GetDetection request awaiting its reply, by correlation ID
+        pending = {}
+
+        while True:
+            now = time.time()
+            active, next_deadline = self.expire_cameras(now)
+            if not active:
+                break
+            if not self.subscribe_keypoints:
+                pending = {cid: request for cid, request in pending.items() if request[1] > now}
+                in_flight = {cam_id for cam_id, _ in pending.values()}
+                for cam_id in active:
+                    if cam_id not in in_flight:
+                        request = Message(reply_to=subscription)
+                        channel.publish(request, topic=f"Tiffany.Keypoints.{cam_id}.GetDetection")
+                        pending[request.correlation_id] = (cam_id, now + self.request_timeout)
+                next_deadline = min([next_deadline] + [deadline for _, deadline in pending.values()])
+
             try:
-                channel.publish(request, topic=f"Tiffany.Keypoints.{camera_id}.GetDetection")
-                reply = channel.consume(timeout=1.0)
-                if reply and reply.status.code == StatusCode.OK:
-                    kp = reply.unpack(ObjectAnnotations)
-                    if kp.objects and kp.objects[0].keypoints[0].score > CONFIDENCE and kp.objects[0].keypoints[1].score > CONFIDENCE:
-                        self._last_keypoints[camera_id] = (kp, time.time())
-            except:
+                message = channel.consume(timeout=min(max(next_deadline - now, 0.0), 1.0))
+            except socket.timeout:
+                continue
+            except OSError:
+                self.log.warn("Resetting server connection due to OSError...")
+                time.sleep(2.5)
+                channel, subscription, topics = self.connect_keypoints()
+                pending = {}
                 continue
-        
+
+            if self.subscribe_keypoints:
+                cam_id = topics.get(message.topic)
+            else:
+                cam_id, _ = pending.pop(message.correlation_id, (None, None))
+                if message.status.code != StatusCode.OK:
+                    cam_id = None
+            if cam_id in active:
+                try:
+                    self.store_keypoints(message, cam_id)
+                except (DecodeError, IndexError):
+                    self.metrics.inc("keypoints_rejected_total", camera=cam_id)
+
         channel.close()
-        self.log.info("Thread finished.")
-        self.set_last_keypoints(None, camera_id)
-        self.keypoints_event[camera_id].clear()
+        self.log.info("Keypoints acquisition finished.")
 
-    def set_last_keypoints(self, keypoints: ObjectAnnotations, camera_id: int) -> None:
+    def set_last_keypoints(self, keypoints: ObjectAnnotations, camera_id: int, capture_ts: float | None = None) -> None:
         """
-        Updates the last keypoints safely for a specific camera.
+        Stores the keypoints of a camera safely and wakes up the pose thread.
+
+        Both keypoints are undistorted once, here, and kept in the camera's
+        `KeypointsBuffer` under the capture time of their frame.
 
         Args:
-            keypoints (ObjectAnnotations): Last keypoints result.
+            keypoints (ObjectAnnotations): Last keypoints result, or None to discard
+                every keypoints stored for the camera.
             camera_id (int): Camera ID that provided the keypoints.
+            capture_ts (float | None): Capture time of the frame, in seconds. The current
+                time is used if None.
         """
+        if keypoints is not None:
+            center, front = keypoints.objects[0].keypoints[0], keypoints.objects[0].keypoints[1]
+            points = self.parameters[camera_id].undistort(
+                np.array([[center.position.x, center.position.y], [front.position.x, front.position.y]])
+            )
+            score = min(center.score, front.score)
         with self.lock:
             if keypoints is None:
-                if camera_id in self._last_keypoints:
-                    del self._last_keypoints[camera_id]
+                self._keypoints[camera_id].clear()
             else:
-                self._last_keypoints[camera_id] = (keypoints, time.time())
+                self._keypoints[camera_id].append(time.time() if capture_ts is None else capture_ts, points, score)
+            self._version += 1
+            self.new_keypoints.notify_all()
 
     def set_last_pose(self, pose: Pose) -> None:
         """
@@ -115,16 +261,82 @@ class Threading:
 
     def get_last_keypoints(self) -> dict:
         """
-        Retrieves the last keypoints results safely.
+        Retrieves the capture time of the newest keypoints of each camera safely.
+
+        Returns:
+            dict[int, float]: Newest capture time, in seconds, of each camera with stored keypoints.
+        """
+        with self.lock:
+            return {cam_id: buffer.latest() for cam_id, buffer in self._keypoints.items() if buffer.count}
+
+    def wait_for_keypoints(self, version: int, timeout: float | None = None) -> int | None:
+        """Blocks until keypoints newer than `version` are stored.
+
+        Args:
+            version (int): Version of the last keypoints already handled (0 for none).
+            timeout (float | None): Maximum time to wait, in seconds. Waits forever if None.
+
+        Returns:
+            int | None: The current version, or None if nothing new was stored within the timeout.
+        """
+        with self.lock:
+            if not self.new_keypoints.wait_for(lambda: self._version != version, timeout):
+                return None
+            return self._version
+
+    def fuse_keypoints(
+        self,
+        points: np.ndarray,
+        mask: np.ndarray,
+        confidence: np.ndarray | None = None,
+        offsets: np.ndarray | None = None
+    ) -> float | None:
+        """Gathers the keypoints of every camera at the newest capture time.
+
+        The target time is the capture time of the newest keypoints of any
+        camera. Each camera contributes its keypoints at that time, picked or
+        interpolated from its observations within `sync_window` (see
+        `KeypointsBuffer.sample`), so a pose never mixes instants further apart
+        than the window.
+
+        Args:
+            points (np.ndarray): Array receiving the undistorted center (0) and front (1)
+                keypoints of each camera, shape (2, K, 2).
+            mask (np.ndarray): Array receiving whether each camera has keypoints at the
+                target time, shape (2, K).
+            confidence (np.ndarray | None): Array receiving the confidence of the keypoints
+                of each camera, shape (K,).
+            offsets (np.ndarray | None): Array receiving the distance between the capture time
+                of the keypoints of each camera and the target time, in seconds, shape (K,).
 
         Returns:
-            Dict[int, ObjectAnnotations]: Last stored keypoints for each camera.
+            float | None: The target time, in seconds, or None if no keypoints are stored.
         """
+        mask[:] = False
         with self.lock:
-            return self._last_keypoints
+            latest = [buffer.latest() for buffer in self._keypoints.values() if buffer.count]
+            if not latest:
+                return None
+            target_ts = max(latest)
+            for cam_id, buffer in self._keypoints.items():
+                i = self.camera_index[cam_id]
+                quality = buffer.sample(target_ts, self.sync_window, points[:, i]) if buffer.count else None
+                if quality is not None:
+                    mask[:, i] = True
+                    if confidence is not None:
+                        confidence[i] = quality[0]
+                    if offsets is not None:
+                        offsets[i] = quality[1]
+        return target_ts
 
     def define_pose(self, minutes: FloatValue) -> None:
-        """Continuously calculates and updates Tiffany's pose using keypoints from multiple cameras.
+        """Calculates and updates Tiffany's pose whenever new keypoints arrive from the cameras.
+
+        The thread sleeps until a camera stores new keypoints instead of polling.
+        At most `max_pose_rate` poses are computed per second: keypoints arriving
+        in between are coalesced. Each pose fuses the keypoints of every camera
+        at the newest capture time, within `sync_window` (see `fuse_keypoints`),
+        and triangulates those of the best `max_cameras` cameras (see `select_cameras`).
 
         Args:
             minutes (FloatValue): Duration to compute the pose in minutes.
@@ -133,31 +345,53 @@ class Threading:
         duration_seconds = minutes.value * 60
         threading.current_thread().name = "PoseThread"
         start_time = time.time()
+        end_time = start_time + duration_seconds
         self.log.info(f"Starting pose calculation for {duration_seconds / 60:.2f} minutes.")
+        min_interval = 1.0 / self.max_pose_rate if self.max_pose_rate > 0 else 0.0
         last_pose_time = 0.0
-        while time.time() - start_time < duration_seconds:
+        last_fusion = 0.0
+        version = 0
+        # Undistorted center (0) and front (1) keypoints of each camera, and which ones are within the sync window
+        points = np.zeros((2, len(self.camera_index), 2))
+        mask = np.zeros((2, len(self.camera_index)), dtype=bool)
+        # Confidence of the keypoints of each camera and their distance to the pose time
+        confidence = np.zeros(len(self.camera_index))
+        offsets = np.zeros(len(self.camera_index))
+        while time.time() < end_time:
             if time.time() - last_pose_time > 5.0:
                 self.set_last_pose(Pose())
-            keypoints = self.get_last_keypoints()
-            if len(keypoints) < 2:
-                continue  # Need at least two cameras
-
-            # Extract center and front points from recent keypoints
-            kp_center = {cam_id: (kp.objects[0].keypoints[0].position.x,
-                                kp.objects[0].keypoints[0].position.y)
-                        for cam_id, (kp, ts) in keypoints.items()
-                        if time.time() - ts < 5.0}
-            kp_front = {cam_id: (kp.objects[0].keypoints[1].position.x,
-                                kp.objects[0].keypoints[1].position.y)
-                        for cam_id, (kp, ts) in keypoints.items()
-                        if time.time() - ts < 5.0}
-
-            if len(kp_center) < 2 or len(kp_front) < 2:
+            # Wake up at least every second to expire the pose and check the end time
+            update = self.wait_for_keypoints(version, timeout=min(1.0, max(end_time - time.time(), 0.0)))
+            if update is None:
                 continue
+            wait = last_fusion + min_interval - time.time()
+            if wait > 0:
+                # Coalesce the keypoints arriving until the next pose is due
+                time.sleep(wait)
+                update = self.wait_for_keypoints(version, timeout=0.0) or update
+            version = update
+            last_fusion = time.time()
 
-            # Convert image points to world coordinates
-            Xw_center = np.round(point2world(self.parameters, kp_center), 3)
-            Xw_front = np.round(point2world(self.parameters, kp_front), 3)
+            # Gather the keypoints of every camera at the same instant (already undistorted
+            # when stored), keep the best cameras, then triangulate the center and front points together
+            with self.metrics.time("stage_seconds", stage="point2world"):
+                target_ts = self.fuse_keypoints(points, mask, confidence, offsets)
+                visible = np.flatnonzero(mask[0])
+                if target_ts is None or visible.size < 2:
+                    continue  # Need at least two cameras
+                used = visible
+                if self.max_cameras and visible.size > self.max_cameras:
+                    # Rays through the center keypoint, in world coordinates
+                    pixels = np.column_stack([points[0, visible], np.ones(visible.size)])
+                    rays = np.einsum("kij,kj->ki", self.ray_matrices[visible], pixels)
+                    rays /= np.linalg.norm(rays, axis=1, keepdims=True)
+                    used = visible[select_cameras(rays, confidence[visible], offsets[visible], self.max_cameras, self.sync_window)]
+                Xw_center, Xw_front = np.round(triangulate(self.projections[used], points[:, used]), 3)
+            self.metrics.set("cameras_in_view", int(visible.size))
+            self.metrics.set("cameras_used", int(used.size))
+            for i in used:
+                self.metrics.inc("camera_used_total", camera=self.camera_ids[i])
+            self.metrics.set("pose_delay_seconds", last_fusion - target_ts)
 
             # Compute vector and angle
             vTiffany = Xw_front[:2] - Xw_center[:2]
@@ -170,15 +404,28 @@ class Threading:
             )
             self.set_last_pose(pose)
             last_pose_time = time.time()
+            self._pose_times.append(last_pose_time)
+            self.metrics.inc("poses_total")
 
         self.log.info("Pose calculation finished.")
         self.set_last_pose(Pose())
         self.pose_event.clear()
 
 
+    def collect_metrics(self) -> None:
+        """Refreshes the gauges read on demand: pose rate and running threads."""
+        times = list(self._pose_times)
+        if len(times) > 1 and time.time() - times[-1] < 2.0:
+            self.metrics.set("fps", (len(times) - 1) / max(times[-1] - times[0], 1e-6))
+        else:
+            self.metrics.set("fps", 0.0)
+        self.metrics.set("pose_running", float(self.pose_event.is_set()))
+        for cam_id, event in self.keypoints_event.items():
+            self.metrics.set("keypoints_running", float(event.is_set()), camera=cam_id)
+
     def start_detections(self, minutes: FloatValue, ctx) -> Status:
         """
-        Starts the detection thread if not already running.
+        Starts the keypoints and pose threads if not already running.
 
         Args:
             minutes (FloatValue): Duration of detection in minutes.
@@ -191,23 +438,36 @@ class Threading:
         """
         if any(event.is_set() for event in self.keypoints_event.values()) or self.pose_event.is_set():
             return Status(StatusCode.ALREADY_EXISTS, 'Detection already in progress')
-        for cam_id in self.parameters.keys():
-            channel = Channel(self.connection.broker_uri)
-            subscription = Subscription(channel)
-            request = Message(content=FloatValue(value=minutes.value + 1), reply_to=subscription)
-            try:
+        status = Status(StatusCode.OK, 'Detections started successfully')
+        channel = Channel(self.connection.broker_uri)
+        subscription = Subscription(channel)
+        try:
+            for cam_id in self.parameters.keys():
+                request = Message(content=FloatValue(value=minutes.value + 1), reply_to=subscription)
                 channel.publish(request, topic=f"Tiffany.Keypoints.{cam_id}.StartDetection")
                 reply = channel.consume(timeout=5.0)
-                time.sleep(0.5)
                 if reply.status.code in [StatusCode.OK, StatusCode.ALREADY_EXISTS]:
-                    if not self.keypoints_event[cam_id].is_set():
-                        thread = threading.Thread(target=self.get_keypoints_by_camera, args=(minutes, cam_id))
-                        thread.daemon = True
-                        thread.start()
-            except:
-                return Status(StatusCode.DEADLINE_EXCEEDED, 'No response from detection service')
+                    with self.lock:
+                        self._deadlines[cam_id] = time.time() + minutes.value * 60
+                        self.keypoints_event[cam_id].set()
+        except socket.timeout:
+            status = Status(StatusCode.DEADLINE_EXCEEDED, 'No response from detection service')
+        finally:
+            channel.close()
+        time.sleep(0.5)
+        # Cameras started before a failure are still acquired, as a single thread serves them all
+        with self.lock:
+            start_consumer = bool(self._deadlines) and not self.consumer_event.is_set()
+            if start_consumer:
+                self.consumer_event.set()
+        if start_consumer:
+            consumer_thread = threading.Thread(target=self.get_keypoints)
+            consumer_thread.daemon = True
+            consumer_thread.start()
+        if status.code != StatusCode.OK:
+            return status
         if not self.pose_event.is_set():
             pose_thread = threading.Thread(target=self.define_pose, args=(minutes,))
             pose_thread.daemon = True
             pose_thread.start()
-        return Status(StatusCode.OK, 'Detections started successfully')
\ No newline at end of file
+        return status
\ No newline at end of file
@@ -1,4 +1,7 @@
 from .Connection import Connection
+from .Metrics import Metrics
 from .StreamChannel import StreamChannel
 from .AngleHistory import AngleHistory
+from .CameraModel import CameraModel
+from .KeypointsBuffer import KeypointsBuffer
 from .Threading import Threading
\ No newline at end of file
@@ -1,2 +1,5 @@
 from .undistortion import undistortPoints, point2world
+from .triangulate import triangulate
+from .select_cameras import select_cameras
+from .reconstruct import load_keypoints, align_keypoints, reconstruct_trajectory
 from .angle import angle
\ No newline at end of file
@@ -0,0 +1,155 @@
+from .triangulate import triangulate
+import numpy as np
+
+# Columns of a recorded keypoints log (see etc/tools/record_keypoints.py)
+KEYPOINTS_COLUMNS = (
+    "capture_ts", "received_at",
+    "center_x", "center_y", "center_score",
+    "front_x", "front_y", "front_score",
+)
+
+def load_keypoints(path: str) -> np.ndarray:
+    """
+    Loads a recorded keypoints log of one camera.
+
+    Args:
+        path (str): Path of the CSV log, with a header and the `KEYPOINTS_COLUMNS` columns.
+
+    Returns:
+        np.ndarray: One row per sample, sorted by capture time, shape (N, 8).
+    """
+    log = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    if log.size == 0:
+        return np.empty((0, len(KEYPOINTS_COLUMNS)))
+    return log[np.argsort(log[:, 0], kind="stable")]
+
+
+def nearest(times: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Finds, for each target time, the index of the closest time of a sorted array.
+
+    Args:
+        times (np.ndarray): Sorted times, shape (N,), with N >= 1.
+        targets (np.ndarray): Times to look up, shape (T,).
+
+    Returns:
+        np.ndarray: Index in `times` of the closest time to each target, shape (T,).
+    """
+    after = np.clip(np.searchsorted(times, targets), 0, len(times) - 1)
+    before = np.maximum(after - 1, 0)
+    return np.where(np.abs(times[before] - targets) <= np.abs(times[after] - targets), before, after)
+
+
+def align_keypoints(
+    logs: dict[int, np.ndarray],
+    camera_ids: list[int],
+    tolerance: float = 0.03,
+    confidence: float = 0.997
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Aligns the keypoints of several cameras on a common timeline.
+
+    The timeline starts with the capture times of the camera with the most
+    samples, and the samples of the other cameras more than `tolerance` away
+    from every instant are added as new instants. Each camera then contributes,
+    to each instant, its sample closest in time, if it is within `tolerance`
+    and both keypoints are above `confidence`.
+
+    Args:
+        logs (dict[int, np.ndarray]): Keypoints log of each camera, as returned by `load_keypoints`.
+        camera_ids (list[int]): Cameras to align, in the order of the output arrays.
+        tolerance (float): Maximum time difference between the samples of one instant, in seconds.
+        confidence (float): Minimum score of both keypoints for a sample to be used.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]:
+            - Time of each instant (mean capture time of its usable samples), shape (T,).
+            - Distorted pixel coordinates of the center (0) and front (1) keypoints of
+              each camera at each instant, shape (T, K, 2, 2).
+            - Whether each camera has a usable sample at each instant, shape (T, K).
+    """
+    recorded = sorted(
+        (cam_id for cam_id in camera_ids if cam_id in logs and len(logs[cam_id])),
+        key=lambda cam_id: len(logs[cam_id]), reverse=True
+    )
+    targets = np.empty(0)
+    for cam_id in recorded:
+        times = logs[cam_id][:, 0]
+        if targets.size:
+            times = times[np.abs(targets[nearest(targets, times)] - times) > tolerance]
+        targets = np.sort(np.concatenate([targets, times]))
+
+    points = np.zeros((targets.size, len(camera_ids), 2, 2))
+    mask = np.zeros((targets.size, len(camera_ids)), dtype=bool)
+    capture_times = np.zeros(targets.size)
+    for k, cam_id in enumerate(camera_ids):
+        if cam_id not in recorded:
+            continue
+        samples = logs[cam_id][nearest(logs[cam_id][:, 0], targets)]
+        points[:, k, 0] = samples[:, 2:4]
+        points[:, k, 1] = samples[:, 5:7]
+        mask[:, k] = (
+            (np.abs(samples[:, 0] - targets) <= tolerance)
+            & (samples[:, 4] > confidence)
+            & (samples[:, 7] > confidence)
+        )
+        capture_times += np.where(mask[:, k], samples[:, 0], 0.0)
+    used = mask.sum(axis=1)
+    times = np.where(used > 0, capture_times / np.maximum(used, 1), targets)
+    return times, points, mask
+
+
+def reconstruct_trajectory(
+    cameras: dict,
+    logs: dict[int, np.ndarray],
+    tolerance: float = 0.03,
+    confidence: float = 0.997,
+    chunk_size: int = 65536
+) -> dict[str, np.ndarray]:
+    """
+    Reconstructs Tiffany's trajectory from recorded keypoints, without the live pose thread.
+
+    The cameras are aligned in time (see `align_keypoints`), the keypoints of
+    each camera are undistorted in one call, and the center and front points
+    of all instants are triangulated in vectorized chunks.
+
+    Args:
+        cameras (dict): Camera model (`CameraModel`) of each camera, keyed by camera ID.
+        logs (dict[int, np.ndarray]): Keypoints log of each camera, as returned by `load_keypoints`.
+        tolerance (float): Maximum time difference between the samples of one instant, in seconds.
+        confidence (float): Minimum score of both keypoints for a sample to be used.
+        chunk_size (int): Number of instants triangulated per call.
+
+    Returns:
+        dict[str, np.ndarray]: One array per column, for the instants seen by at least two cameras:
+            - "t": Time of the instant, in seconds.
+            - "x", "y", "z": Position of the center point, in world coordinates.
+            - "yaw": Orientation from the center to the front point, in degrees from 0 to 360.
+            - "cameras": Number of cameras used.
+    """
+    camera_ids = sorted(cameras)
+    targets, points, mask = align_keypoints(logs, camera_ids, tolerance, confidence)
+    for k, cam_id in enumerate(camera_ids):
+        if points.shape[0]:
+            points[:, k] = cameras[cam_id].undistort(points[:, k].reshape(-1, 2)).reshape(-1, 2, 2)
+
+    keep = mask.sum(axis=1) >= 2
+    targets, points, mask = targets[keep], points[keep], mask[keep]
+    projections = np.stack([cameras[cam_id].P for cam_id in camera_ids])
+    world = np.empty((targets.size, 2, 3))
+    for start in range(0, targets.size, chunk_size):
+        stop = min(start + chunk_size, targets.size)
+        # Center and front points of every instant of the chunk, as (instant, keypoint) pairs
+        chunk_points = points[start:stop].transpose(0, 2, 1, 3).reshape(-1, len(camera_ids), 2)
+        chunk_mask = np.repeat(mask[start:stop], 2, axis=0)
+        world[start:stop] = triangulate(projections, chunk_points, chunk_mask).reshape(-1, 2, 3)
+
+    direction = world[:, 1, :2] - world[:, 0, :2]
+    return {
+        "t": targets,
+        "x": world[:, 0, 0],
+        "y": world[:, 0, 1],
+        "z": world[:, 0, 2],
+        "yaw": np.degrees(np.arctan2(direction[:, 1], direction[:, 0])) % 360.0,
+        "cameras": mask.sum(axis=1),
+    }
@@ -0,0 +1,54 @@
+import numpy as np
+
+def select_cameras(
+    rays: np.ndarray,
+    confidence: np.ndarray,
+    offsets: np.ndarray,
+    max_cameras: int,
+    window: float
+) -> np.ndarray:
+    """
+    Selects the best cameras to triangulate a point from.
+
+    Each camera is scored by the confidence of its keypoints times their
+    freshness (1 when captured at the target time, falling linearly to 0 at
+    `window`). The best scored camera is selected first; each following one
+    maximizes its score times the sine of the smallest angle between its ray
+    and the rays of the cameras already selected, so near-parallel views,
+    which add little depth information, are left out in favour of wider
+    baselines. Only the first `max_cameras` are kept, which bounds the size
+    of the triangulation whatever the number of cameras.
+
+    Args:
+        rays (np.ndarray): Unit world direction of the ray of each candidate camera through
+            the point, shape (N, 3) (see `CameraModel.ray_matrix`).
+        confidence (np.ndarray): Confidence of the keypoints of each camera, shape (N,).
+        offsets (np.ndarray): Distance between the capture time of the keypoints of each camera
+            and the target time, in seconds, shape (N,).
+        max_cameras (int): Maximum number of cameras selected. Every camera is kept when 0.
+        window (float): Sync window the offsets lie within, in seconds.
+
+    Returns:
+        np.ndarray: Indices of the selected cameras in `rays`, best first.
+    """
+    n_cameras = len(rays)
+    if max_cameras <= 0 or n_cameras <= max_cameras:
+        return np.arange(n_cameras)
+    freshness = np.maximum(1.0 - np.asarray(offsets) / window, 0.0) if window > 0 else 1.0
+    score = np.asarray(confidence, dtype=np.float64) * freshness
+    # Sine of the angle between the rays of every pair of cameras, from their cosines
+    sines = np.sqrt(np.maximum(1.0 - (rays @ rays.T) ** 2, 0.0))
+
+    selected = np.empty(max_cameras, dtype=int)
+    selected[0] = np.argmax(score)
+    # Smallest sine to the selected cameras, and the cameras that can still be picked
+    geometry = sines[selected[0]].copy()
+    available = np.ones(n_cameras, dtype=bool)
+    available[selected[0]] = False
+    for n in range(1, max_cameras):
+        # Selected cameras are excluded even when every remaining score is 0
+        best = np.argmax(np.where(available, score * geometry, -np.inf))
+        selected[n] = best
+        np.minimum(geometry, sines[best], out=geometry)
+        available[best] = False
+    return selected
@@ -0,0 +1,43 @@
+import numpy as np
+
+def triangulate(projections: np.ndarray, points: np.ndarray, mask: np.ndarray | None = None) -> np.ndarray:
+    """
+    Triangulates several points seen by several cameras in one batched DLT solve.
+
+    For every point, each camera contributes the two rows `u * P[2] - P[0]`
+    and `v * P[2] - P[1]` of a homogeneous linear system, built for all points
+    and cameras at once into a preallocated (M, 2K, 4) array. The systems are
+    solved together by a stacked SVD. Cameras that do not see a point are
+    masked out by zeroing their rows, so the shapes never change when cameras
+    drop out, and the cost grows linearly with the number of cameras.
+
+    Args:
+        projections (np.ndarray): Projection matrix of each camera, shape (K, 3, 4).
+        points (np.ndarray): Undistorted pixel coordinates of each point in each camera,
+            shape (M, K, 2), or (K, 2) for a single point. Coordinates are used as floats.
+        mask (np.ndarray | None): Boolean visibility of each point in each camera, shape
+            (M, K) or (K,). Every camera is used if None.
+
+    Returns:
+        np.ndarray: World coordinates of each point, shape (M, 3), or (3,) for a single point.
+            Points seen by fewer than two cameras are NaN.
+    """
+    projections = np.asarray(projections, dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64)
+    single = points.ndim == 2
+    if single:
+        points = points[None]
+    n_points, n_cameras = points.shape[:2]
+    mask = np.ones((n_points, n_cameras), dtype=bool) if mask is None else np.asarray(mask, dtype=bool).reshape(n_points, n_cameras)
+
+    system = np.empty((n_points, n_cameras, 2, 4))
+    system[:, :, 0] = points[..., 0, None] * projections[None, :, 2] - projections[None, :, 0]
+    system[:, :, 1] = points[..., 1, None] * projections[None, :, 2] - projections[None, :, 1]
+    system *= mask[..., None, None]
+
+    _, _, v_transpose = np.linalg.svd(system.reshape(n_points, 2 * n_cameras, 4))
+    homogeneous = v_transpose[:, -1]
+    world = homogeneous[:, :3] / homogeneous[:, 3:]
+    world[mask.sum(axis=1) < 2] = np.nan
+
+    return world[0] if single else world
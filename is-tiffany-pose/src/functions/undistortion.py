@@ -1,12 +1,14 @@
+from classes.CameraModel import CameraModel
+from .triangulate import triangulate
 import numpy as np
-import cv2
 
-def undistortPoints(parameters: dict, points: np.ndarray):
+def undistortPoints(parameters: dict | CameraModel, points: np.ndarray):
     """
     Undistorts image points using camera calibration parameters.
 
     Args:
-        parameters (dict): Dictionary containing camera calibration data:
+        parameters (dict | CameraModel): The camera model, or a dictionary containing
+            camera calibration data (the derived matrices are then recomputed on every call):
             - 'mtx': Camera intrinsic matrix.
             - 'rt': Rotation-translation matrix.
             - 'dist': Distortion coefficients.
@@ -15,61 +17,34 @@ def undistortPoints(parameters: dict, points: np.ndarray):
     Returns:
         Tuple[np.ndarray, np.ndarray]:
             - Projection matrix (3x4) combining intrinsic and extrinsic parameters.
-            - Undistorted image points.
+            - Undistorted image points, shape (N,2).
     """
-    mtxK = parameters['mtx']
-    Rtcw = parameters['rt']
-    dis = parameters['dist']
+    camera = parameters if isinstance(parameters, CameraModel) else CameraModel.from_parameters(parameters)
+    return camera.P, camera.undistort(points)
 
-    resolution = (1280, 720)
-    newK, roi = cv2.getOptimalNewCameraMatrix(mtxK, dis, resolution, 1, resolution)
 
-    x, y, _, _ = roi
-    newK[0, 2] -= x
-    newK[1, 2] -= y
-
-    undistorted = cv2.undistortPoints(points, mtxK, dis, None, newK).squeeze(axis=0)
-    mtxP = newK @ Rtcw
-
-    return mtxP, undistorted
-
-
-def point2world(parameters: dict, points: dict) -> np.ndarray:
+def point2world(parameters: dict, points: dict, undistorted: bool = False) -> np.ndarray:
     """
     Computes 3D world coordinates from 2D image points across multiple cameras.
 
+    Kept for single points; see `triangulate` to reconstruct several points at once.
+
     Args:
-        parameters (dict): Camera calibration parameters for each camera.
+        parameters (dict): Camera model (or calibration parameters) of each camera.
         points (dict): Dictionary of 2D image points per camera {camera_id: points}.
+        undistorted (bool): If True, the points were already undistorted with
+            `CameraModel.undistort`, and `parameters` must hold camera models.
 
     Returns:
         np.ndarray: 3D coordinates of the reconstructed point in world space.
     """
-    mtxA = []
+    projections, undistorted_points = [], []
     for cam_id in points.keys():
-        mtxP, unds = undistortPoints(parameters[cam_id], points[cam_id])
-        unds = unds[0]
-        u = np.array([[int(unds[0]), int(unds[1]), 1]]).T
-        zeros = np.zeros((3, 1))
-        mtx = np.array(mtxP)
-
-        # Construct matrix with extrinsic info for each camera
-        for i in points.keys():
-            if i == cam_id:
-                mtx = np.hstack((mtx, -u))
-            else:
-                mtx = np.hstack((mtx, zeros))
-
-        # Stack to form the full A matrix
-        if len(mtxA) == 0:
-            mtxA = mtx
+        if undistorted:
+            mtxP, unds = parameters[cam_id].P, np.reshape(points[cam_id], (-1, 2))
         else:
-            mtxA = np.vstack((mtxA, mtx))
-
-    # Solve using SVD
-    _, _, V_transpose = np.linalg.svd(mtxA)
-    mtxV = V_transpose[-1]
-    mtxV = mtxV / mtxV[3]  # normalize homogeneous coordinate
-    Xw = mtxV[:3]
+            mtxP, unds = undistortPoints(parameters[cam_id], points[cam_id])
+        projections.append(mtxP)
+        undistorted_points.append(unds[0])
 
-    return Xw
+    return triangulate(np.stack(projections), np.stack(undistorted_points))
@@ -0,0 +1,111 @@
+from importlib.util import module_from_spec, spec_from_file_location
+import numpy as np
+import pytest
+import os
+
+KEYPOINTS_BUFFER_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "classes", "KeypointsBuffer.py")
+
+# KeypointsBuffer only needs NumPy, so it is loaded on its own instead of through `classes`
+spec = spec_from_file_location("KeypointsBuffer", KEYPOINTS_BUFFER_PATH)
+module = module_from_spec(spec)
+spec.loader.exec_module(module)
+KeypointsBuffer = module.KeypointsBuffer
+
+
+def keypoints(value: float) -> np.ndarray:
+    return np.full((2, 2), value)
+
+
+def test_empty_buffer_returns_none():
+    buffer = KeypointsBuffer(size=4)
+    out = np.zeros((2, 2))
+    assert buffer.latest() is None
+    assert buffer.sample(1.0, 0.03, out) is None
+
+
+def test_interpolates_between_samples_around_target():
+    buffer = KeypointsBuffer(size=4)
+    buffer.append(1.00, keypoints(10.0), score=0.9)
+    buffer.append(1.02, keypoints(20.0), score=0.8)
+    out = np.zeros((2, 2))
+    confidence, offset = buffer.sample(1.015, 0.03, out)
+    np.testing.assert_allclose(out, keypoints(17.5))
+    assert confidence == pytest.approx(0.8)
+    assert offset == pytest.approx(0.005)
+
+
+def test_only_before_sample_is_used_as_is():
+    buffer = KeypointsBuffer(size=4)
+    buffer.append(1.00, keypoints(10.0), score=0.9)
+    out = np.zeros((2, 2))
+    confidence, offset = buffer.sample(1.02, 0.03, out)
+    np.testing.assert_allclose(out, keypoints(10.0))
+    assert confidence == pytest.approx(0.9)
+    assert offset == pytest.approx(0.02)
+
+
+def test_only_after_sample_is_used_as_is():
+    buffer = KeypointsBuffer(size=4)
+    buffer.append(1.02, keypoints(20.0), score=0.7)
+    out = np.zeros((2, 2))
+    confidence, offset = buffer.sample(1.00, 0.03, out)
+    np.testing.assert_allclose(out, keypoints(20.0))
+    assert confidence == pytest.approx(0.7)
+    assert offset == pytest.approx(0.02)
+
+
+def test_closest_sample_wins_when_only_one_side_is_in_window():
+    # The sample before the target is outside the window, so the one after is used alone
+    buffer = KeypointsBuffer(size=4)
+    buffer.append(0.90, keypoints(0.0))
+    buffer.append(1.01, keypoints(30.0))
+    out = np.zeros((2, 2))
+    _, offset = buffer.sample(1.00, 0.03, out)
+    np.testing.assert_allclose(out, keypoints(30.0))
+    assert offset == pytest.approx(0.01)
+
+
+def test_samples_outside_window_return_none():
+    buffer = KeypointsBuffer(size=4)
+    buffer.append(1.00, keypoints(10.0))
+    buffer.append(1.10, keypoints(20.0))
+    out = np.full((2, 2), -1.0)
+    assert buffer.sample(1.05, 0.03, out) is None
+    np.testing.assert_array_equal(out, keypoints(-1.0))
+
+
+def test_exact_match_uses_that_sample():
+    buffer = KeypointsBuffer(size=4)
+    buffer.append(1.00, keypoints(10.0), score=0.6)
+    buffer.append(1.02, keypoints(20.0), score=0.9)
+    out = np.zeros((2, 2))
+    confidence, offset = buffer.sample(1.02, 0.03, out)
+    np.testing.assert_allclose(out, keypoints(20.0))
+    assert confidence == pytest.approx(0.9)
+    assert offset == 0.0
+
+
+def test_oldest_samples_are_overwritten_after_size_appends():
+    buffer = KeypointsBuffer(size=3)
+    for i in range(5):
+        buffer.append(1.0 + 0.1 * i, keypoints(float(i)))
+    assert buffer.count == 3
+    assert buffer.latest() == pytest.approx(1.4)
+    out = np.zeros((2, 2))
+    # The first two samples (1.0 and 1.1) were overwritten
+    assert buffer.sample(1.0, 0.03, out) is None
+    assert buffer.sample(1.1, 0.03, out) is None
+    buffer.sample(1.2, 0.03, out)
+    np.testing.assert_allclose(out, keypoints(2.0))
+
+
+def test_clear_discards_every_sample():
+    buffer = KeypointsBuffer(size=3)
+    buffer.append(1.0, keypoints(1.0))
+    buffer.clear()
+    out = np.zeros((2, 2))
+    assert buffer.count == 0
+    assert buffer.latest() is None
+    assert buffer.sample(1.0, 0.03, out) is None
+    buffer.append(2.0, keypoints(2.0))
+    assert buffer.latest() == pytest.approx(2.0)
@@ -0,0 +1,49 @@
+from importlib.util import module_from_spec, spec_from_file_location
+import numpy as np
+import os
+
+SELECT_CAMERAS_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "functions", "select_cameras.py")
+
+# select_cameras only needs NumPy, so it is loaded on its own instead of through `functions`
+spec = spec_from_file_location("select_cameras", SELECT_CAMERAS_PATH)
+module = module_from_spec(spec)
+spec.loader.exec_module(module)
+select_cameras = module.select_cameras
+
+
+def unit(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float64)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_all_cameras_kept_when_within_limit():
+    rays = unit([[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+    assert list(select_cameras(rays, np.ones(3), np.zeros(3), 4, 0.03)) == [0, 1, 2]
+    assert list(select_cameras(rays, np.ones(3), np.zeros(3), 0, 0.03)) == [0, 1, 2]
+
+
+def test_wide_baseline_preferred_over_parallel_view():
+    # Camera 1 looks almost along camera 0, camera 2 at a right angle to it
+    rays = unit([[1, 0, 0], [1, 0.01, 0], [0, 1, 0]])
+    confidence = np.array([1.0, 0.99, 0.9])
+    assert list(select_cameras(rays, confidence, np.zeros(3), 2, 0.03)) == [0, 2]
+
+
+def test_stale_keypoints_lower_the_score():
+    rays = unit([[1, 0, 0], [0, 1, 0], [0, 1, 0.05]])
+    offsets = np.array([0.0, 0.029, 0.0])
+    assert list(select_cameras(rays, np.ones(3), offsets, 2, 0.03)) == [0, 2]
+
+
+def test_no_camera_selected_twice_when_scores_are_zero():
+    rays = unit([[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0], [1, 0, 1]])
+    for confidence, offsets in [(np.zeros(5), np.zeros(5)), (np.ones(5), np.full(5, 0.05))]:
+        selected = select_cameras(rays, confidence, offsets, 4, 0.03)
+        assert len(selected) == 4
+        assert len(set(selected.tolist())) == 4
+
+
+def test_identical_rays_do_not_repeat_cameras():
+    rays = unit([[1, 0, 0]] * 6)
+    selected = select_cameras(rays, np.ones(6), np.zeros(6), 3, 0.03)
+    assert len(set(selected.tolist())) == 3
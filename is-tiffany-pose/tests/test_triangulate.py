@@ -0,0 +1,86 @@
+from importlib.util import module_from_spec, spec_from_file_location
+import numpy as np
+import pytest
+import glob
+import os
+import cv2
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+def load(name: str, path: str):
+    # Loaded on their own, as `classes` and `functions` import the service's messaging dependencies
+    spec = spec_from_file_location(name, os.path.join(SRC_DIR, path))
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+triangulate = load("triangulate", os.path.join("functions", "triangulate.py")).triangulate
+CameraModel = load("CameraModel", os.path.join("classes", "CameraModel.py")).CameraModel
+
+CALIBRATIONS = sorted(glob.glob(os.path.join(SRC_DIR, "calibrations", "calib_rt*.npz")))
+
+
+@pytest.fixture(scope="module")
+def cameras() -> list:
+    if len(CALIBRATIONS) < 3:
+        pytest.skip("At least three calibration files are needed")
+    return [CameraModel.load(path) for path in CALIBRATIONS]
+
+
+@pytest.fixture(scope="module")
+def world() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return np.column_stack([rng.uniform(-1, 1, 20), rng.uniform(-1, 1, 20), rng.uniform(0, 0.3, 20)])
+
+
+def project(cameras: list, world: np.ndarray) -> np.ndarray:
+    """Distorted pixels of each world point in each camera, shape (M, K, 2)."""
+    pixels = []
+    for camera in cameras:
+        rvec, _ = cv2.Rodrigues(camera.Rt[:, :3])
+        projected, _ = cv2.projectPoints(world, rvec, camera.Rt[:, 3], camera.K, camera.dist)
+        pixels.append(projected.reshape(-1, 2))
+    return np.stack(pixels, axis=1)
+
+
+def undistorted(cameras: list, world: np.ndarray) -> np.ndarray:
+    pixels = project(cameras, world)
+    return np.stack([camera.undistort(pixels[:, k]) for k, camera in enumerate(cameras)], axis=1)
+
+
+def test_recovers_world_points(cameras, world):
+    projections = np.stack([camera.P for camera in cameras])
+    points = undistorted(cameras, world)
+    np.testing.assert_allclose(triangulate(projections, points), world, atol=1e-4)
+
+
+def test_single_point(cameras, world):
+    projections = np.stack([camera.P for camera in cameras])
+    points = undistorted(cameras, world[:1])[0]
+    np.testing.assert_allclose(triangulate(projections, points), world[0], atol=1e-4)
+
+
+def test_masked_cameras_are_left_out(cameras, world):
+    projections = np.stack([camera.P for camera in cameras])
+    points = undistorted(cameras, world)
+    # Corrupt the pixels of a different camera for each point, and mask it out
+    mask = np.ones(points.shape[:2], dtype=bool)
+    for m in range(len(world)):
+        k = m % len(cameras)
+        points[m, k] = (-5000.0, 9000.0)
+        mask[m, k] = False
+    np.testing.assert_allclose(triangulate(projections, points, mask), world, atol=1e-4)
+
+
+def test_fewer_than_two_cameras_give_nan(cameras, world):
+    projections = np.stack([camera.P for camera in cameras])
+    points = undistorted(cameras, world[:3])
+    mask = np.zeros(points.shape[:2], dtype=bool)
+    mask[1, 0] = True
+    mask[2, :2] = True
+    result = triangulate(projections, points, mask)
+    assert np.isnan(result[0]).all()
+    assert np.isnan(result[1]).all()
+    np.testing.assert_allclose(result[2], world[2], atol=1e-4)